@@ -1,153 +1,156 @@
-import re
+import argparse
+import hashlib
 import json
 import os
+from concurrent.futures import ProcessPoolExecutor
 
-def extract_panels(input_file, output_file):
-    print(f"Reading {input_file}...")
-    with open(input_file, 'r', encoding='utf-8') as f:
-        content = f.read()
+from vega_spec import iter_panels, read_specs, resolve_data
 
-    # Extract the JSON spec
-    # Looking for: var spec = { ... };
-    # We can use a regex to capture everything between "var spec = " and the matching closing brace/semicolon.
-    # Since it might be multi-line and complex, let's find the start and assume it ends before the next script tag or at the end of the script block.
-    
-    match = re.search(r'var spec = ({.*});', content, re.DOTALL)
-    if not match:
-        # Try without semicolon if it was missed
-        match = re.search(r'var spec = ({.*})', content, re.DOTALL)
-    
-    if not match:
-        print("Could not find 'var spec = ...' in the file.")
-        return
+# Default input and output
+INPUT_PATH = "war_dead_panels.html"
+OUTPUT_PATH = "frontend/src/data/war_dead_panels.json"
 
-    json_str = match.group(1)
-    
-    # The regex might capture too much if there is code after the semicolon.
-    # A safer way for a large JSON blob in a file is to find the start index, count braces to find the end.
-    start_marker = "var spec = "
-    start_idx = content.find(start_marker)
-    if start_idx == -1:
-        print("Start marker not found.")
-        return
-    
-    start_idx += len(start_marker)
-    
-    # Simple brace counter to find the end of the JSON object
-    brace_count = 0
-    json_end_idx = start_idx
-    found_start = False
-    
-    for i, char in enumerate(content[start_idx:], start=start_idx):
-        if char == '{':
-            brace_count += 1
-            found_start = True
-        elif char == '}':
-            brace_count -= 1
-        
-        if found_start and brace_count == 0:
-            json_end_idx = i + 1
-            break
-            
-    json_str = content[start_idx:json_end_idx]
-    
-    try:
-        full_spec = json.loads(json_str)
-    except json.JSONDecodeError as e:
-        print(f"Failed to parse JSON: {e}")
-        return
+# Each distinct dataset is written once to DATA_DIR and panels load it from
+# DATA_URL, so panels sharing rows don't each carry a copy in the bundle
+DATA_DIR = "frontend/public/data"
+DATA_URL = "/data"
 
-    print("Successfully parsed full Vega-Lite spec.")
-    
-    datasets = full_spec.get('datasets', {})
-    panels = []
+def write_dataset(values, data_dir, data_url):
+    """Writes values as compact JSON named by its content hash; returns the data reference.
 
-    # Helper to create a standalone spec
-    def create_panel_spec(source_spec):
-        new_spec = {
-            "$schema": "https://vega.github.io/schema/vega-lite/v5.json",
-            "description": source_spec.get("title", "Untitled Chart"),
-            "mark": source_spec.get("mark"),
-            "encoding": source_spec.get("encoding"),
-            "title": source_spec.get("title"),
-            "width": "container", # Responsive width
-            "height": 300,
-            "config": {
-                "background": "transparent",
-                "view": {"stroke": "transparent"},
-                "axis": {
-                    "domain": False,
-                    "tickColor": "#4A7C59", # brand-sage
-                    "labelColor": "#4A7C59",
-                    "titleColor": "#4A7C59",
-                    "gridColor": "#e5e7eb"
-                },
-                "legend": {
-                    "labelColor": "#4A7C59",
-                    "titleColor": "#4A7C59"
-                },
-                "title": {
-                    "color": "#4A7C59",
-                    "font": "Inter",
-                    "fontSize": 16,
-                    "anchor": "start"
-                }
-            }
-        }
-        
-        # Handle Layered charts
-        if "layer" in source_spec:
-            new_spec.pop("mark", None)
-            new_spec.pop("encoding", None)
-            new_spec["layer"] = source_spec["layer"]
-        
-        # Resolve Data
-        if "data" in source_spec and "name" in source_spec["data"]:
-            data_name = source_spec["data"]["name"]
-            if data_name in datasets:
-                new_spec["data"] = {"values": datasets[data_name]}
-        
-        return new_spec
-
-    # Navigate the specific structure of this file
-    # Root -> vconcat
-    vconcat = full_spec.get("vconcat", [])
-    
-    if len(vconcat) > 0:
-        # 1. Deaths by date
-        panels.append(create_panel_spec(vconcat[0]))
-        
-        if len(vconcat) > 1:
-            # hconcat container
-            hconcat = vconcat[1].get("hconcat", [])
-            if len(hconcat) > 0:
-                # 2. Death by rank (Layered)
-                panels.append(create_panel_spec(hconcat[0]))
-                
-                if len(hconcat) > 1:
-                    # vconcat container
-                    inner_vconcat = hconcat[1].get("vconcat", [])
-                    if len(inner_vconcat) > 0:
-                        # 3. Top 10 deaths by surname
-                        panels.append(create_panel_spec(inner_vconcat[0]))
-                    if len(inner_vconcat) > 1:
-                        # 4. Death by age
-                        panels.append(create_panel_spec(inner_vconcat[1]))
+    The same rows always get the same file, so identical datasets (across
+    panels, specs or files) are stored once and the URL can be cached forever.
+    """
+    payload = json.dumps(values, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    name = f"{hashlib.sha256(payload).hexdigest()[:16]}.json"
+    path = os.path.join(data_dir, name)
+    if not os.path.exists(path):
+        os.makedirs(data_dir, exist_ok=True)
+        # Write then rename, so parallel workers never see a partial file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+    return {"url": f"{data_url}/{name}"}
+
+def extract_panels(input_file, output_file, data_dir=DATA_DIR, data_url=DATA_URL):
+    """Writes one standalone spec per panel to output_file.
+
+    Datasets go to data_dir as external files; with data_dir=None they are
+    inlined into each panel instead.
+    """
+    print(f"Reading {input_file}...")
+    specs = read_specs(input_file)
+    if not specs:
+        print(f"No Vega-Lite spec found in {input_file}.")
+        return 0
+
+    print(f"Successfully parsed {len(specs)} Vega-Lite spec(s).")
+
+    panels = []
+    files = set()
+    for full_spec in specs:
+        datasets = full_spec.get('datasets', {})
+        if data_dir is None:
+            refs = {name: {"values": values} for name, values in datasets.items()}
+        else:
+            refs = {name: write_dataset(values, data_dir, data_url) for name, values in datasets.items()}
+            files.update(ref["url"] for ref in refs.values())
+        # Every leaf view of the (arbitrarily nested) concatenation becomes a panel
+        for view, data in iter_panels(full_spec):
+            panels.append(create_panel_spec(view, data, refs))
 
     print(f"Extracted {len(panels)} panels.")
-    
+    if data_dir is not None:
+        print(f"{len(files)} distinct datasets in {data_dir}")
+
     # Ensure directory exists
-    os.makedirs(os.path.dirname(output_file), exist_ok=True)
-    
+    os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+
     with open(output_file, 'w', encoding='utf-8') as f:
         json.dump(panels, f, indent=2)
     print(f"Saved to {output_file}")
+    return len(panels)
 
-if __name__ == "__main__":
-    input_path = "war_dead_panels.html"
-    output_path = "frontend/src/data/war_dead_panels.json"
+def create_panel_spec(source_spec, data, refs):
+    """Builds a standalone, themed spec for one panel."""
+    new_spec = {
+        "$schema": "https://vega.github.io/schema/vega-lite/v5.json",
+        "description": source_spec.get("title", "Untitled Chart"),
+        "mark": source_spec.get("mark"),
+        "encoding": source_spec.get("encoding"),
+        "title": source_spec.get("title"),
+        "width": "container", # Responsive width
+        "height": 300,
+        "config": {
+            "background": "transparent",
+            "view": {"stroke": "transparent"},
+            "axis": {
+                "domain": False,
+                "tickColor": "#4A7C59", # brand-sage
+                "labelColor": "#4A7C59",
+                "titleColor": "#4A7C59",
+                "gridColor": "#e5e7eb"
+            },
+            "legend": {
+                "labelColor": "#4A7C59",
+                "titleColor": "#4A7C59"
+            },
+            "title": {
+                "color": "#4A7C59",
+                "font": "Inter",
+                "fontSize": 16,
+                "anchor": "start"
+            }
+        }
+    }
     
-    if not os.path.exists(input_path):
-        print(f"Error: {input_path} not found.")
+    # Handle Layered charts; layers may name their own datasets
+    if "layer" in source_spec:
+        new_spec.pop("mark", None)
+        new_spec.pop("encoding", None)
+        new_spec["layer"] = [
+            dict(layer, data=resolve_data(layer["data"], refs)) if "data" in layer else layer
+            for layer in source_spec["layer"]
+        ]
+
+    # Resolve Data (declared on the view or inherited from a parent)
+    data = resolve_data(data, refs)
+    if data is not None:
+        new_spec["data"] = data
+    
+    return new_spec
+
+def extract_directory(input_dir, output_dir, workers=1, data_dir=DATA_DIR, data_url=DATA_URL):
+    """Extracts every HTML export in input_dir to output_dir/<name>_panels.json.
+
+    Datasets shared between files are still only written once.
+    """
+    inputs = sorted(os.path.join(input_dir, f) for f in os.listdir(input_dir) if f.lower().endswith(".html"))
+    outputs = [os.path.join(output_dir, os.path.splitext(os.path.basename(f))[0] + "_panels.json") for f in inputs]
+    data_dirs = [data_dir] * len(inputs)
+    data_urls = [data_url] * len(inputs)
+    if workers > 1 and len(inputs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            counts = list(pool.map(extract_panels, inputs, outputs, data_dirs, data_urls))
+    else:
+        counts = list(map(extract_panels, inputs, outputs, data_dirs, data_urls))
+    print(f"Extracted {sum(counts)} panels from {len(inputs)} files.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Split Altair/Vega-Lite HTML exports into standalone panel specs.")
+    parser.add_argument("input", nargs="?", default=INPUT_PATH, help="HTML file, or a directory of them")
+    parser.add_argument("output", nargs="?", help="JSON file, or a directory when input is one")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processes for directory mode")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="where dataset files are written")
+    parser.add_argument("--data-url", default=DATA_URL, help="URL the frontend loads --data-dir from")
+    parser.add_argument("--inline", action="store_true", help="embed the rows in every panel instead of writing data files")
+    args = parser.parse_args()
+    data_dir = None if args.inline else args.data_dir
+
+    if os.path.isdir(args.input):
+        extract_directory(args.input, args.output or os.path.dirname(OUTPUT_PATH), args.workers, data_dir, args.data_url)
+    elif not os.path.exists(args.input):
+        print(f"Error: {args.input} not found.")
     else:
-        extract_panels(input_path, output_path)
+        extract_panels(args.input, args.output or OUTPUT_PATH, data_dir, args.data_url)
@@ -0,0 +1,97 @@
+import os
+import sqlite3
+
+# Persistent cache of per-PDF work for organize_archive.py
+MANIFEST_FILE = "archive_manifest.sqlite"
+
+# Bump when analyze_text changes so cached titles/dates are recomputed
+# (from the cached text; the PDFs themselves aren't parsed again)
+ANALYZER_VERSION = 1
+
+# Commit every this many updates so an interrupted run keeps its progress
+COMMIT_EVERY = 100
+
+class ArchiveManifest:
+    """SQLite manifest of hashed and analysed PDFs, keyed by absolute path.
+
+    A row is trusted while the file's size and mtime are unchanged, so a
+    rerun over an unchanged archive needs one stat() per file and no reads.
+    """
+
+    def __init__(self, path=MANIFEST_FILE):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                sha256 TEXT NOT NULL,
+                text TEXT,
+                title TEXT,
+                date TEXT,
+                analyzer_version INTEGER
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_files_sha256 ON files (sha256)")
+        self.pending = 0
+
+    def lookup(self, filepath, stat):
+        """Returns the cached row for filepath as a dict, or None if missing or stale."""
+        row = self.conn.execute(
+            "SELECT sha256, text, title, date, analyzer_version FROM files WHERE path = ? AND size = ? AND mtime_ns = ?",
+            (os.path.abspath(filepath), stat.st_size, stat.st_mtime_ns),
+        ).fetchone()
+        if row is None:
+            return None
+        sha256, text, title, date, version = row
+        return {"sha256": sha256, "text": text, "title": title, "date": date, "analyzer_version": version}
+
+    def text_for_hash(self, sha256):
+        """Extracted text of any file with the same content, or None."""
+        row = self.conn.execute(
+            "SELECT text FROM files WHERE sha256 = ? AND text IS NOT NULL LIMIT 1", (sha256,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def store(self, filepath, stat, sha256, text=None, title=None, date=None):
+        analyzer_version = ANALYZER_VERSION if text is not None else None
+        self.conn.execute(
+            "INSERT OR REPLACE INTO files (path, size, mtime_ns, sha256, text, title, date, analyzer_version) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (os.path.abspath(filepath), stat.st_size, stat.st_mtime_ns, sha256, text, title, date, analyzer_version),
+        )
+        self._changed()
+
+    def move(self, src, dest):
+        """Follows a file to its new path after a rename or move."""
+        self.conn.execute("DELETE FROM files WHERE path = ?", (os.path.abspath(dest),))
+        self.conn.execute(
+            "UPDATE files SET path = ? WHERE path = ?", (os.path.abspath(dest), os.path.abspath(src))
+        )
+        self._changed()
+
+    def prune(self, directory, seen_paths):
+        """Drops rows for files directly in directory that no longer exist."""
+        directory = os.path.abspath(directory)
+        seen = {os.path.abspath(p) for p in seen_paths}
+        stale = [
+            path for (path,) in self.conn.execute("SELECT path FROM files")
+            if os.path.dirname(path) == directory and path not in seen
+        ]
+        self.conn.executemany("DELETE FROM files WHERE path = ?", [(p,) for p in stale])
+        self._changed()
+        return len(stale)
+
+    def _changed(self):
+        self.pending += 1
+        if self.pending >= COMMIT_EVERY:
+            self.commit()
+
+    def commit(self):
+        self.conn.commit()
+        self.pending = 0
+
+    def close(self):
+        self.commit()
+        self.conn.close()
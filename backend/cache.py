@@ -0,0 +1,345 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+from urllib.parse import quote, urlencode
+
+from fastapi import Request, Response
+
+from .metrics import CACHE_FILL_SECONDS
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# How long a cached archive response is served before it is refetched
+DEFAULT_TTL = int(os.environ.get("RESPONSE_CACHE_TTL", "3600"))
+
+# Total size of the cached bodies (every content-coding counted); the least
+# recently used responses are dropped beyond it
+MAX_CACHE_BYTES = int(os.environ.get("RESPONSE_CACHE_MAX_MB", "128")) * 1024 * 1024
+
+# Import scripts bump per-table versions in this file to invalidate the cache
+STAMP_FILE = os.environ.get("CACHE_STAMP_FILE", "backend/data/cache_stamps.json")
+
+# The stamp file is stat'ed at most this often
+STAMP_CHECK_INTERVAL = 1.0
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 1024
+
+# (gzip level, brotli quality). On the 2.7 MB war dead body brotli 5 takes
+# ~0.05s against ~6s for quality 11, for output ~20% larger
+FAST_LEVELS = (6, 5)
+BEST_LEVELS = (9, 11)
+
+
+def serialize(data):
+    """Compact JSON bytes for a response body."""
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def read_stamps(path=STAMP_FILE):
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def invalidate_tables(tables, path=STAMP_FILE):
+    """Marks tables as changed so a running backend drops what it cached from them.
+
+    Called by the import_*.py scripts after a successful load.
+    """
+    stamps = read_stamps(path)
+    now = time.time()
+    for table in tables:
+        stamps[table] = now
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(stamps, f, indent=2)
+    os.replace(tmp_path, path)
+
+    # A deployed backend doesn't share our filesystem, so tell it over HTTP too
+    api_url = os.environ.get("API_BASE_URL")
+    token = os.environ.get("CACHE_INVALIDATE_TOKEN")
+    if api_url and token:
+        request = urllib.request.Request(
+            f"{api_url.rstrip('/')}/api/cache/invalidate",
+            data=json.dumps({"tables": list(tables)}).encode("utf-8"),
+            headers={"Content-Type": "application/json", "X-Cache-Token": token},
+            method="POST",
+        )
+        try:
+            urllib.request.urlopen(request, timeout=10).close()
+        except Exception as e:
+            print(f"Error invalidating remote cache: {e}")
+
+
+def compress(body, best=False):
+    """Pre-compressed variants of body, keyed by content-coding.
+
+    Cache fills run on the request path, so they use fast settings; best
+    is for offline output such as the response snapshot.
+    """
+    if len(body) < MIN_COMPRESS_SIZE:
+        return {}
+    gzip_level, brotli_quality = BEST_LEVELS if best else FAST_LEVELS
+    variants = {"gzip": gzip.compress(body, compresslevel=gzip_level, mtime=0)}
+    if brotli is not None:
+        variants["br"] = brotli.compress(body, quality=brotli_quality, mode=brotli.MODE_TEXT)
+    return variants
+
+
+def cache_key(path, params=None):
+    """Cache key for path and the query parameters its endpoint reads.
+
+    params holds the parsed values; None values are left out and the rest
+    sorted, so parameter order, spelling ("010" vs "10") and parameters the
+    endpoint ignores (e.g. cache busters) don't make new entries. Lists are
+    joined with commas.
+    """
+    query = []
+    for name, value in sorted((params or {}).items()):
+        if value is None:
+            continue
+        if isinstance(value, (list, tuple)):
+            value = ",".join(str(v) for v in value)
+        query.append((name, str(value)))
+    return path + ("?" + urlencode(query, quote_via=quote) if query else "")
+
+
+def choose_encoding(accept_encoding, available):
+    """Picks the best available content-coding allowed by Accept-Encoding, or None."""
+    if not accept_encoding or not available:
+        return None
+
+    weights = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[coding.strip().lower()] = q
+
+    best = None
+    # Prefer brotli over gzip when the client rates them equally
+    for coding in ("br", "gzip"):
+        q = weights.get(coding, weights.get("*", 0.0))
+        if coding in available and q > 0 and (best is None or q > best[1]):
+            best = (coding, q)
+    return best[0] if best else None
+
+
+def etag_matches(if_none_match, etags):
+    """If-None-Match uses weak comparison, so W/ prefixes are ignored."""
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") in etags for tag in tags)
+
+
+class CacheEntry:
+    def __init__(self, body, tables, ttl, variants=None):
+        self.body = body
+        self.tables = tuple(tables)
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        self.expires_at = time.monotonic() + ttl
+        # Compressed once per fill (or taken ready-made from the snapshot);
+        # each coding is its own representation with its own ETag
+        self.variants = compress(body) if variants is None else variants
+        self.etags = {None: self.etag}
+        for coding in self.variants:
+            self.etags[coding] = self.etag[:-1] + "-" + coding + '"'
+        self.size = len(body) + sum(len(data) for data in self.variants.values())
+
+    def expired(self):
+        return time.monotonic() >= self.expires_at
+
+
+class ResponseCache:
+    """Serialized-response cache for endpoints backed by immutable archive tables.
+
+    Entries are keyed by path + the parameters the endpoint reads (see
+    cache_key) and tagged with the tables they were built from, so
+    invalidating a table drops exactly the responses (and any registered
+    in-memory indexes) derived from it. The entries are an LRU bounded by
+    max_bytes; expired ones are dropped when next looked up.
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL, stamp_file=STAMP_FILE, max_bytes=MAX_CACHE_BYTES):
+        self.ttl = ttl
+        self.stamp_file = stamp_file
+        self.max_bytes = max_bytes
+        # key -> CacheEntry, least recently used first
+        self.entries = OrderedDict()
+        self.size = 0
+        self.listeners = {}
+        self.fill_locks = {}
+        self.lock = threading.Lock()
+        self.snapshot = None
+        self._stamps = read_stamps(stamp_file)
+        self._stamp_mtime = self._mtime()
+        self._next_stamp_check = 0.0
+
+    def _mtime(self):
+        try:
+            return os.stat(self.stamp_file).st_mtime
+        except FileNotFoundError:
+            return None
+
+    def on_invalidate(self, table, callback):
+        """Registers a callback run whenever table is invalidated."""
+        self.listeners.setdefault(table, []).append(callback)
+
+    def attach_snapshot(self, snapshot):
+        """Seeds misses from an on-disk ResponseSnapshot (see snapshot.py)."""
+        self.snapshot = snapshot
+
+    def invalidate(self, tables=None):
+        """Drops cached responses built from any of tables (or everything)."""
+        with self.lock:
+            if tables is None:
+                self.entries.clear()
+                self.size = 0
+            else:
+                tables = set(tables)
+                for key in [k for k, e in self.entries.items() if tables.intersection(e.tables)]:
+                    self.size -= self.entries.pop(key).size
+            if self.snapshot is not None:
+                self.snapshot.discard(tables)
+
+        for table in (tables if tables is not None else list(self.listeners)):
+            for callback in self.listeners.get(table, []):
+                callback()
+
+    def check_stamps(self):
+        """Picks up invalidations written by import scripts in other processes."""
+        now = time.monotonic()
+        if now < self._next_stamp_check:
+            return
+        self._next_stamp_check = now + STAMP_CHECK_INTERVAL
+
+        mtime = self._mtime()
+        if mtime == self._stamp_mtime:
+            return
+        self._stamp_mtime = mtime
+
+        stamps = read_stamps(self.stamp_file)
+        changed = [t for t, v in stamps.items() if self._stamps.get(t) != v]
+        self._stamps = stamps
+        if changed:
+            print(f"Invalidating cache for {', '.join(changed)}")
+            self.invalidate(changed)
+
+    def key_for(self, request: Request, params=None):
+        return cache_key(request.url.path, params)
+
+    def _store(self, key, entry):
+        """Adds entry as the most recently used, evicting the least recently
+        used beyond max_bytes. Call with self.lock held."""
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.size -= old.size
+        self.entries[key] = entry
+        self.size += entry.size
+        while self.size > self.max_bytes and len(self.entries) > 1:
+            _key, evicted = self.entries.popitem(last=False)
+            self.size -= evicted.size
+
+    def lookup(self, key):
+        """Returns the live entry for key, or None on a miss."""
+        self.check_stamps()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                if entry.expired():
+                    del self.entries[key]
+                    self.size -= entry.size
+                    return None
+                self.entries.move_to_end(key)
+                return entry
+        if self.snapshot is not None:
+            return self._from_snapshot(key)
+        return None
+
+    def _from_snapshot(self, key):
+        found = self.snapshot.take(key, self._stamps)
+        if found is None:
+            return None
+        tables, variants = found
+        entry = CacheEntry(variants.pop(None), tables, self.ttl, variants)
+        with self.lock:
+            self._store(key, entry)
+        return entry
+
+    def fill(self, key, tables, producer):
+        """Calls producer() and stores its serialized result under key.
+
+        Concurrent fills of the same key wait for the first one instead of
+        all hitting the database. The key's lock is dropped once no fill
+        holds it, so fill_locks only ever holds keys being filled.
+        """
+        with self.lock:
+            fill_lock, waiting = self.fill_locks.get(key, (threading.Lock(), 0))
+            self.fill_locks[key] = (fill_lock, waiting + 1)
+        try:
+            with fill_lock:
+                return self._fill_locked(key, tables, producer)
+        finally:
+            with self.lock:
+                _lock, waiting = self.fill_locks[key]
+                if waiting == 1:
+                    del self.fill_locks[key]
+                else:
+                    self.fill_locks[key] = (fill_lock, waiting - 1)
+
+    def _fill_locked(self, key, tables, producer):
+        entry = self.lookup(key)
+        if entry is None:
+            start = time.perf_counter()
+            data = producer()
+            produced = time.perf_counter()
+            body = serialize(data)
+            serialized = time.perf_counter()
+            entry = CacheEntry(body, tables, self.ttl)
+            CACHE_FILL_SECONDS.observe(produced - start, "produce")
+            CACHE_FILL_SECONDS.observe(serialized - produced, "serialize")
+            CACHE_FILL_SECONDS.observe(time.perf_counter() - serialized, "compress")
+            with self.lock:
+                self._store(key, entry)
+        return entry
+
+    def get(self, key, tables, producer):
+        """Returns the entry for key, calling producer() to fill it if needed."""
+        return self.lookup(key) or self.fill(key, tables, producer)
+
+    def build_response(self, request: Request, entry):
+        """JSON response for a cache entry, or 304 if the client's ETag matches.
+
+        The body is served pre-compressed when Accept-Encoding allows it.
+        """
+        coding = choose_encoding(request.headers.get("accept-encoding"), entry.variants)
+        headers = {"ETag": entry.etags[coding], "Cache-Control": "public, no-cache", "Vary": "Accept-Encoding"}
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and etag_matches(if_none_match, entry.etags.values()):
+            return Response(status_code=304, headers=headers)
+
+        if coding is None:
+            return Response(content=entry.body, media_type="application/json", headers=headers)
+        headers["Content-Encoding"] = coding
+        return Response(content=entry.variants[coding], media_type="application/json", headers=headers)
+
+    def respond(self, request: Request, tables, producer, params=None):
+        """Cached response for request, filling the cache inline on a miss."""
+        return self.build_response(request, self.get(self.key_for(request, params), tables, producer))
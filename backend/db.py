@@ -0,0 +1,48 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+# supabase-py is synchronous, so its calls run on this bounded pool instead of
+# the event loop. The pool also caps how many upstream requests are in flight.
+DB_MAX_WORKERS = int(os.environ.get("DB_MAX_WORKERS", "8"))
+
+executor = ThreadPoolExecutor(max_workers=DB_MAX_WORKERS, thread_name_prefix="db")
+
+
+async def run_db(fn, *args, **kwargs):
+    """Runs a blocking database call on the DB pool and awaits its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, partial(fn, *args, **kwargs))
+
+
+class LazyValue:
+    """A value built on first use, at most once at a time, and resettable.
+
+    get() blocks while building; aget() returns the cached value directly and
+    only hops to the DB pool when a build (i.e. a database fetch) is needed.
+    """
+
+    def __init__(self, build):
+        self.build = build
+        self.value = None
+        self.lock = threading.Lock()
+
+    def get(self):
+        value = self.value
+        if value is None:
+            with self.lock:
+                if self.value is None:
+                    self.value = self.build()
+                value = self.value
+        return value
+
+    async def aget(self):
+        value = self.value
+        if value is None:
+            value = await run_db(self.get)
+        return value
+
+    def reset(self):
+        self.value = None
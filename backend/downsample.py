@@ -0,0 +1,114 @@
+import numpy as np
+
+# Smallest max_points LTTB can honour: the first and last point plus one bucket
+MIN_POINTS = 3
+
+# Largest max_points the endpoints accept; longer series than any chart can
+# show gain nothing, and each distinct value is memoised separately
+MAX_POINTS = 1000
+
+
+def lttb_indices(x, y, max_points):
+    """Indices of at most max_points points that keep the shape of (x, y).
+
+    Largest-Triangle-Three-Buckets: the first and last points are kept, the
+    points between them are split into max_points - 2 buckets, and from each
+    bucket the point forming the largest triangle with the previously kept
+    point and the next bucket's average is kept. Areas within a bucket are
+    computed in one vectorised step. NaN points are only kept if a bucket
+    has nothing else. Returns every index when no downsampling is needed.
+    """
+    n = len(x)
+    if max_points is None or max_points >= n or max_points < MIN_POINTS:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # Bucket i holds points edges[i]:edges[i + 1]; the last point is its own bucket
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    edges = np.append(edges, n)
+
+    # Average of each bucket, used as the third vertex for the bucket before it
+    with np.errstate(invalid="ignore"):
+        sums_x = np.add.reduceat(x, edges[:-1])
+        sums_y = np.add.reduceat(np.nan_to_num(y), edges[:-1])
+        counts = np.add.reduceat((~np.isnan(y)).astype(np.int64), edges[:-1])
+    avg_x = sums_x / np.diff(edges)
+    avg_y = np.where(counts > 0, sums_y / np.maximum(counts, 1), np.nan)
+
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    previous = 0
+    for bucket in range(max_points - 2):
+        lo, hi = edges[bucket], edges[bucket + 1]
+        ax, ay = x[previous], y[previous]
+        cx, cy = avg_x[bucket + 1], avg_y[bucket + 1]
+        if np.isnan(cy):
+            cy = ay
+        areas = np.abs((ax - cx) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (cy - ay))
+        areas[np.isnan(areas)] = -1.0
+        previous = lo + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+    return selected
+
+
+def downsample_series(series, x_key, y_key, list_keys, max_points):
+    """Copy of a compact series (parallel lists) with at most max_points entries.
+
+    The points are chosen by LTTB on (series[x_key], series[y_key]) and the
+    same positions are kept in every list in list_keys.
+    """
+    if max_points is None or len(series[x_key]) <= max_points:
+        return series
+    y = [np.nan if v is None else v for v in series[y_key]]
+    keep = lttb_indices(series[x_key], y, max_points).tolist()
+    result = dict(series)
+    for key in list_keys:
+        if key in series:
+            values = series[key]
+            result[key] = [values[i] for i in keep]
+    return result
+
+
+def combined_series(columns):
+    """One series standing in for several: each column scaled to [0, 1] and
+    the scaled values averaged, ignoring NaN. Scaling keeps a column with
+    large values from drowning out the others."""
+    columns = np.asarray(columns, dtype=np.float64)
+    valid = ~np.isnan(columns)
+    lo = np.where(valid, columns, np.inf).min(axis=1)
+    hi = np.where(valid, columns, -np.inf).max(axis=1)
+    span = hi - lo
+    lo = np.where(np.isfinite(lo), lo, 0.0)
+    span = np.where(np.isfinite(span) & (span > 0), span, 1.0)
+    scaled = (columns - lo[:, None]) / span[:, None]
+    counts = valid.sum(axis=0)
+    sums = np.where(valid, scaled, 0.0).sum(axis=0)
+    return np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+
+
+def downsample_rows(rows, x_key, y_keys, max_points, group_key=None):
+    """Rows thinned to at most max_points per group.
+
+    Rows are grouped by group_key (one group if None) and ordered by x_key.
+    The points are picked once per group, by LTTB on the combined y columns
+    (see combined_series), so every line drawn from the rows is thinned at
+    the same x values.
+    """
+    if max_points is None:
+        return rows
+    groups = {}
+    for i, row in enumerate(rows):
+        groups.setdefault(row.get(group_key) if group_key else None, []).append(i)
+
+    keep = set()
+    for members in groups.values():
+        if len(members) <= max_points:
+            keep.update(members)
+            continue
+        members.sort(key=lambda i: rows[i].get(x_key) or 0)
+        x = [rows[i].get(x_key) or 0 for i in members]
+        columns = [[np.nan if rows[i].get(y_key) is None else rows[i][y_key] for i in members] for y_key in y_keys]
+        keep.update(members[j] for j in lttb_indices(x, combined_series(columns), max_points).tolist())
+    return [row for i, row in enumerate(rows) if i in keep]
@@ -0,0 +1,201 @@
+import json
+import os
+import sqlite3
+import threading
+
+from .schema import ARCHIVE_TABLES, column_names, json_columns, sqlite_ddl
+
+# SQLite file holding local copies of the *_archive tables
+LOCAL_DB_PATH = os.environ.get("LOCAL_DB_PATH", "backend/data/archive.db")
+
+# Comma-separated tables to serve locally, or "*" for all of them. Without
+# Supabase credentials every table is served locally if LOCAL_DB_PATH exists.
+LOCAL_DB_TABLES = os.environ.get("LOCAL_DB_TABLES", "")
+
+
+def local_tables():
+    return {t.strip() for t in LOCAL_DB_TABLES.split(",") if t.strip()}
+
+
+def use_local(table_name, remote_available, path=LOCAL_DB_PATH):
+    """Whether table_name should be read from (and imported into) the local backend."""
+    if table_name not in ARCHIVE_TABLES:
+        return False
+    tables = local_tables()
+    if "*" in tables or table_name in tables:
+        return True
+    return not remote_available and os.path.exists(path)
+
+
+class LocalResponse:
+    def __init__(self, data):
+        self.data = data
+
+
+class LocalQuery:
+    """The subset of the supabase-py query builder the backend and importers use."""
+
+    def __init__(self, client, table_name):
+        if table_name not in ARCHIVE_TABLES:
+            raise ValueError(f"Unknown archive table: {table_name}")
+        self.client = client
+        self.table_name = table_name
+        self.columns = column_names(table_name)
+        self.json_columns = json_columns(table_name)
+        self.action = "select"
+        self.selected = self.columns
+        self.rows = []
+        self.on_conflict = None
+        self.filters = []
+        self.ordering = []
+        self.limit_count = None
+        self.offset = 0
+
+    def _column(self, name):
+        if name not in self.columns:
+            raise ValueError(f"Unknown column {name} in {self.table_name}")
+        return name
+
+    def select(self, columns="*"):
+        self.action = "select"
+        if columns.strip() != "*":
+            self.selected = [self._column(c.strip()) for c in columns.split(",")]
+        return self
+
+    def insert(self, rows):
+        self.action = "insert"
+        self.rows = rows if isinstance(rows, list) else [rows]
+        return self
+
+    def upsert(self, rows, on_conflict="id"):
+        self.action = "upsert"
+        self.rows = rows if isinstance(rows, list) else [rows]
+        self.on_conflict = self._column(on_conflict)
+        return self
+
+    def delete(self):
+        self.action = "delete"
+        return self
+
+    def eq(self, column, value):
+        self.filters.append((f"{self._column(column)} = ?", [value]))
+        return self
+
+    def gt(self, column, value):
+        self.filters.append((f"{self._column(column)} > ?", [value]))
+        return self
+
+    def gte(self, column, value):
+        self.filters.append((f"{self._column(column)} >= ?", [value]))
+        return self
+
+    def lt(self, column, value):
+        self.filters.append((f"{self._column(column)} < ?", [value]))
+        return self
+
+    def in_(self, column, values):
+        values = list(values)
+        if not values:
+            self.filters.append(("0", []))
+        else:
+            self.filters.append((f"{self._column(column)} IN ({', '.join('?' * len(values))})", values))
+        return self
+
+    def order(self, column, desc=False):
+        self.ordering.append(f"{self._column(column)} {'DESC' if desc else 'ASC'}")
+        return self
+
+    def limit(self, count):
+        self.limit_count = count
+        return self
+
+    def range(self, start, end):
+        self.offset = start
+        self.limit_count = end - start + 1
+        return self
+
+    def _where(self):
+        if not self.filters:
+            return "", []
+        params = []
+        for _clause, values in self.filters:
+            params.extend(values)
+        return " WHERE " + " AND ".join(clause for clause, _values in self.filters), params
+
+    def _encode(self, row):
+        return [json.dumps(row.get(c)) if c in self.json_columns and row.get(c) is not None else row.get(c) for c in self.row_columns]
+
+    def execute(self):
+        return LocalResponse(getattr(self, f"_execute_{self.action}")())
+
+    def _execute_select(self):
+        where, params = self._where()
+        sql = f"SELECT {', '.join(self.selected)} FROM {self.table_name}{where}"
+        if self.ordering:
+            sql += " ORDER BY " + ", ".join(self.ordering)
+        if self.limit_count is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params += [self.limit_count, self.offset]
+
+        data = []
+        for values in self.client.connection().execute(sql, params):
+            row = dict(zip(self.selected, values))
+            for c in self.json_columns.intersection(row):
+                if row[c] is not None:
+                    row[c] = json.loads(row[c])
+            data.append(row)
+        return data
+
+    def _execute_insert(self):
+        if not self.rows:
+            return []
+        self.row_columns = [self._column(c) for c in self.rows[0]]
+        sql = f"INSERT INTO {self.table_name} ({', '.join(self.row_columns)}) VALUES ({', '.join('?' * len(self.row_columns))})"
+        if self.action == "upsert":
+            updates = [c for c in self.row_columns if c != self.on_conflict]
+            sql += f" ON CONFLICT ({self.on_conflict}) DO UPDATE SET " + ", ".join(f"{c} = excluded.{c}" for c in updates)
+        with self.client.connection() as conn:
+            conn.executemany(sql, [self._encode(row) for row in self.rows])
+        return self.rows
+
+    _execute_upsert = _execute_insert
+
+    def _execute_delete(self):
+        where, params = self._where()
+        with self.client.connection() as conn:
+            conn.execute(f"DELETE FROM {self.table_name}{where}", params)
+        return []
+
+
+class SQLiteClient:
+    """Embedded stand-in for the Supabase client over a local SQLite file.
+
+    Exposes client.table(name) with the same chained select/insert/upsert/
+    delete calls, so fetch_all_rows and the import engine work unchanged.
+    Each thread gets its own connection; WAL mode lets readers run while an
+    import writes.
+    """
+
+    def __init__(self, path=LOCAL_DB_PATH):
+        self.path = path
+        self.local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.create_tables()
+
+    def connection(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    def create_tables(self):
+        with self.connection() as conn:
+            for table_name in ARCHIVE_TABLES:
+                for statement in sqlite_ddl(table_name):
+                    conn.execute(statement)
+
+    def table(self, table_name):
+        return LocalQuery(self, table_name)
@@ -1,16 +1,75 @@
+import time
+
+# Measured from here so the first response's latency covers the imports too
+BOOT_STARTED = time.perf_counter()
+
+import argparse
 import os
 import random
+import secrets
+import threading
+from contextlib import asynccontextmanager
 from typing import Optional
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response
 from pydantic import BaseModel
 from supabase import create_client, Client
 from dotenv import load_dotenv
 from fastapi.middleware.cors import CORSMiddleware
 
+from .cache import ResponseCache, cache_key, compress, read_stamps, serialize
+from .db import LazyValue, run_db
+from .downsample import MAX_POINTS, MIN_POINTS, downsample_rows
+from .local_db import SQLiteClient, use_local
+from .metrics import CACHE_REQUESTS, CONTENT_TYPE, Gauge, MetricsMiddleware, db_call, render_metrics, route_label
+from .names import TREND_EXTRAS, BabyNameStore, NamePrefixIndex
+from .regions import ROLLUP_KEYS, RegionSeries
+from .schema import ARCHIVE_TABLES, postgres_ddl, served_columns
+from .search import ArticleIndex
+from .snapshot import SNAPSHOT_FILE, ResponseSnapshot, write_snapshot
+from .spatial import CrimeIndex, WarDeadIndex, parse_bbox
+from .tarot_log import JsonLinesSink, LogSink, SupabaseSink
+
 # Load environment variables
 load_dotenv()
 
-app = FastAPI()
+def warm_up():
+    """Connects to Supabase and builds the tarot log sink and the in-memory
+    map indexes, off the startup path."""
+    if supabase_configured:
+        try:
+            supabase_client.get()
+        except Exception as e:
+            print(f"Error connecting to Supabase: {e}")
+            return
+    tarot_sink.get()
+    for index, table_name in ((crime_index, "crime_data_archive"), (war_dead_index, "war_dead_archive"), (name_index, "baby_names_archive")):
+        if has_db(table_name):
+            try:
+                index.get()
+            except Exception as e:
+                print(f"Error building {index.build.__name__[6:]}: {e}")
+    print(f"Warm-up finished {time.perf_counter() - BOOT_STARTED:.2f}s after boot.")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Archive responses are served from the snapshot until the database is
+    # reachable; the client and indexes are built in the background so
+    # startup never waits on the network
+    snapshot = ResponseSnapshot.load()
+    if snapshot is not None:
+        response_cache.attach_snapshot(snapshot)
+        print(f"Loaded response snapshot with {len(snapshot)} responses.")
+    threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+    yield
+    # Drain queued log entries before the worker exits
+    if tarot_sink.value is not None:
+        tarot_sink.value.close()
+
+app = FastAPI(lifespan=lifespan)
+
+def log_first_response(path, status):
+    """Reports how long after boot the first response was ready."""
+    print(f"First response ({path}, {status}) {(time.perf_counter() - BOOT_STARTED) * 1000:.0f} ms after boot.")
 
 # CORS Configuration
 origins = [
@@ -28,61 +87,193 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route request counts, latency and response sizes, served on /metrics
+app.add_middleware(MetricsMiddleware, on_first_response=log_first_response)
+
 # Supabase Setup
 url: str = os.environ.get("SUPABASE_URL")
 key: str = os.environ.get("SUPABASE_KEY")
 
-supabase: Optional[Client] = None
+supabase_configured = bool(url and key)
+
+def build_supabase_client() -> Client:
+    client = create_client(url, key)
+    print(f"Supabase client ready {time.perf_counter() - BOOT_STARTED:.2f}s after boot.")
+    return client
+
+# Created on first use (normally by warm_up) rather than at import time
+supabase_client = LazyValue(build_supabase_client)
+
+if not supabase_configured:
+    print("Warning: SUPABASE_URL or SUPABASE_KEY not found. Database logging will be disabled and archive tables served from the local database if present.")
+
+# Supabase/PostgREST caps a single select at 1000 rows, so page through tables
+FETCH_PAGE_SIZE = 1000
+
+# Columns served from each archive table; the import bookkeeping columns
+# (import_key, row_hash) stay out of API responses
+ARCHIVE_COLUMNS = {table_name: served_columns(table_name) for table_name in ARCHIVE_TABLES}
+
+# Archive tables can be served from an embedded SQLite copy instead, per
+# table (LOCAL_DB_TABLES) or for everything when Supabase isn't configured
+local_client: Optional[SQLiteClient] = None
+
+def has_db(table_name):
+    """Whether a database is configured for table_name, without connecting to it."""
+    return supabase_configured or use_local(table_name, supabase_configured)
+
+def db_for(table_name):
+    """Client serving table_name, or None if no database is configured for it.
+
+    Blocks while the Supabase client is created, so call it from the DB pool.
+    """
+    global local_client
+    if use_local(table_name, supabase_configured):
+        if local_client is None:
+            local_client = SQLiteClient()
+        return local_client
+    return supabase_client.get() if supabase_configured else None
+
+def execute(table_name, query):
+    """Runs a query on table_name, recording its duration (and failure) per table."""
+    with db_call(table_name, "sqlite" if use_local(table_name, supabase_configured) else "supabase"):
+        return query.execute()
+
+def fetch_all_rows(table_name, columns=None):
+    """Fetches every row of a table, paging by id.
+
+    Each page starts after the last id seen (keyset paging) rather than at an
+    offset, so every page is an index range scan; columns must include id.
+    """
+    columns = columns or ARCHIVE_COLUMNS.get(table_name, "*")
+    rows = []
+    last_id = None
+    while True:
+        query = db_for(table_name).table(table_name) \
+            .select(columns) \
+            .order("id") \
+            .limit(FETCH_PAGE_SIZE)
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        response = execute(table_name, query)
+        rows.extend(response.data)
+        if len(response.data) < FETCH_PAGE_SIZE:
+            return rows
+        last_id = response.data[-1]["id"]
+
+def sexes_time_series_rows():
+    table_name = "sexes_time_series_archive"
+    return execute(table_name, db_for(table_name).table(table_name).select(ARCHIVE_COLUMNS[table_name]).order("year")).data
+
+def sexes_summary_rows():
+    table_name = "sexes_summary_archive"
+    return execute(table_name, db_for(table_name).table(table_name).select(ARCHIVE_COLUMNS[table_name])).data
+
+def build_crime_index():
+    index = CrimeIndex(fetch_all_rows("crime_data_archive"))
+    print(f"Built crime index with {len(index)} points.")
+    return index
+
+def build_war_dead_index():
+    index = WarDeadIndex(fetch_all_rows("war_dead_archive"))
+    print(f"Built war dead index with {len(index)} cemeteries.")
+    return index
+
+def build_baby_name_store():
+    store = BabyNameStore(fetch_all_rows("baby_names_archive", "id,name,sex,year,count,rank"))
+    print(f"Loaded baby name store with {len(store)} rows.")
+    return store
+
+def build_region_series():
+    series = RegionSeries(fetch_all_rows("regions_time_series_archive"))
+    print(f"Loaded region series with {len(series)} rows.")
+    return series
+
+def build_name_index():
+    index = NamePrefixIndex(baby_name_store.get().name_totals())
+    print(f"Built name index with {len(index)} distinct names.")
+    return index
+
+# In-memory indexes over the archive tables, built on first use (or at startup)
+crime_index = LazyValue(build_crime_index)
+war_dead_index = LazyValue(build_war_dead_index)
+baby_name_store = LazyValue(build_baby_name_store)
+name_index = LazyValue(build_name_index)
+region_series = LazyValue(build_region_series)
+
+# Full-text index over the article PDFs, built offline by build_article_index.py
+article_index = LazyValue(ArticleIndex)
 
-if url and key:
-    supabase = create_client(url, key)
-else:
-    print("Warning: SUPABASE_URL or SUPABASE_KEY not found. Database logging will be disabled.")
+# Series plotted from each time-series table, thinned together by max_points
+SEXES_SERIES = ["adm_per_male", "adm_per_female", "adm_per_male_rebased", "adm_per_female_rebased", "admissions_total"]
+
+# Archive responses are serialized once and revalidated with ETags
+response_cache = ResponseCache()
+
+response_cache.on_invalidate("crime_data_archive", crime_index.reset)
+response_cache.on_invalidate("war_dead_archive", war_dead_index.reset)
+response_cache.on_invalidate("baby_names_archive", baby_name_store.reset)
+response_cache.on_invalidate("baby_names_archive", name_index.reset)
+response_cache.on_invalidate("regions_time_series_archive", region_series.reset)
+response_cache.on_invalidate("article_index", article_index.reset)
+
+Gauge("response_cache_entries", "Responses currently held in the response cache.", lambda: len(response_cache.entries))
+Gauge("response_cache_bytes", "Size of the cached bodies, every content-coding counted.", lambda: response_cache.size)
+
+async def cached_response(request: Request, tables, producer, params=None):
+    """Serves from the response cache; on a miss the fetch, serialization and
+    compression all run on the DB pool rather than the event loop.
+
+    params are the parsed query parameters the endpoint reads; only they
+    (not the raw query string) go into the cache key.
+    """
+    key = response_cache.key_for(request, params)
+    entry = response_cache.lookup(key)
+    CACHE_REQUESTS.inc(route_label(request.scope), "hit" if entry is not None else "miss")
+    if entry is None:
+        entry = await run_db(response_cache.fill, key, tables, producer)
+    return response_cache.build_response(request, entry)
+
+def build_tarot_sink() -> LogSink:
+    """The tarot log sink, with its writer started.
+
+    With Supabase configured, inserts are batched on a background thread and
+    failed batches spill to the local JSON Lines log; otherwise entries go
+    straight to the local log.
+    """
+    if supabase_configured:
+        return SupabaseSink(supabase_client.get(), "tarot_logs", fallback=JsonLinesSink())
+    return JsonLinesSink()
+
+# Built by warm_up, or on the DB pool by the first question if that comes
+# first: creating the Supabase client does network setup
+tarot_sink = LazyValue(build_tarot_sink)
 
 class Question(BaseModel):
     question: str
 
+class CacheInvalidation(BaseModel):
+    tables: Optional[list[str]] = None
+
 @app.post("/api/submit-question")
 async def submit_question(q: Question):
     answer = random.choice(["Yes", "No"])
     
-    # Log to Supabase if configured, otherwise log to local JSON
-    if supabase:
-        try:
-            data = {
-                "question": q.question,
-                "answer": answer,
-            }
-            supabase.table("tarot_logs").insert(data).execute()
-        except Exception as e:
-            print(f"Error logging to Supabase: {e}")
+    # Queued for Supabase if configured, otherwise for the local JSON Lines log
+    if supabase_configured:
+        entry = {
+            "question": q.question,
+            "answer": answer,
+        }
     else:
-        # Fallback: Log to local JSON file
-        import json
         from datetime import datetime
-        
-        log_file = "backend/data/tarot_history.json"
-        log_entry = {
+
+        entry = {
             "timestamp": datetime.now().isoformat(),
             "question": q.question,
             "answer": answer
         }
-        
-        try:
-            history = []
-            if os.path.exists(log_file):
-                with open(log_file, "r") as f:
-                    try:
-                        history = json.load(f)
-                    except json.JSONDecodeError:
-                        history = []
-            
-            history.append(log_entry)
-            
-            with open(log_file, "w") as f:
-                json.dump(history, f, indent=2)
-        except Exception as e:
-            print(f"Error logging to local file: {e}")
+    (await tarot_sink.aget()).write(entry)
 
     return {"answer": answer}
 
@@ -90,186 +281,354 @@ async def submit_question(q: Question):
 async def root():
     return {"message": "Elksie5000 API is running"}
 
+@app.get("/metrics")
+async def get_metrics():
+    """Request, response cache and database metrics in the Prometheus text format."""
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE)
+
+@app.post("/api/cache/invalidate")
+async def invalidate_cache(body: CacheInvalidation, x_cache_token: Optional[str] = Header(None)):
+    """Drops cached responses and indexes after an import. Requires CACHE_INVALIDATE_TOKEN."""
+    token = os.environ.get("CACHE_INVALIDATE_TOKEN")
+    if not token or not secrets.compare_digest(x_cache_token or "", token):
+        raise HTTPException(status_code=403, detail="Invalid cache token")
+
+    response_cache.invalidate(body.tables)
+    return {"invalidated": body.tables or "all"}
+
 @app.get("/api/war-dead/all")
-async def get_all_war_dead():
-    if not supabase:
+async def get_all_war_dead(request: Request):
+    if not has_db("war_dead_archive"):
         raise HTTPException(status_code=500, detail="Database not configured")
     
     try:
-        response = supabase.table("war_dead_archive").select("*").execute()
-        return response.data
+        return await cached_response(request, ["war_dead_archive"], lambda: fetch_all_rows("war_dead_archive"))
     except Exception as e:
         # If the table doesn't exist, this will error
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/war-dead")
+async def get_war_dead(bbox: str, zoom: int = Query(..., ge=0, le=22)):
+    """Viewport query: clusters with summed num_commemorated at low zoom, bare cemeteries otherwise."""
+    if not has_db("war_dead_archive"):
+        raise HTTPException(status_code=500, detail="Database not configured")
+
+    try:
+        bounds = parse_bbox(bbox)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        index = await war_dead_index.aget()
+        return index.query(bounds, zoom)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/war-dead/{cemetery_id}/bio")
+async def get_war_dead_bio(cemetery_id: int):
+    if not has_db("war_dead_archive"):
+        raise HTTPException(status_code=500, detail="Database not configured")
+
+    try:
+        index = await war_dead_index.aget()
+        bio_html = index.bio(cemetery_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if bio_html is None:
+        raise HTTPException(status_code=404, detail="Cemetery not found")
+    return {"id": cemetery_id, "bio_html": bio_html}
+
 @app.get("/api/crime/all")
-async def get_all_crime_data():
-    if not supabase:
+async def get_all_crime_data(request: Request):
+    if not has_db("crime_data_archive"):
         raise HTTPException(status_code=500, detail="Database not configured")
     
     try:
         # Select all columns
-        response = supabase.table("crime_data_archive").select("*").execute()
-        return response.data
+        return await cached_response(request, ["crime_data_archive"], lambda: fetch_all_rows("crime_data_archive"))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/crime")
+async def get_crime_data(
+    bbox: str,
+    zoom: int = Query(..., ge=0, le=22),
+    cursor: Optional[int] = None,
+    limit: int = Query(500, ge=1, le=2000),
+    crime_type: Optional[str] = None,
+):
+    """Viewport query: grid clusters at low zoom, keyset-paginated points otherwise."""
+    if not has_db("crime_data_archive"):
+        raise HTTPException(status_code=500, detail="Database not configured")
+
+    try:
+        bounds = parse_bbox(bbox)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        index = await crime_index.aget()
+        return index.query(bounds, zoom, cursor=cursor, limit=limit, crime_type=crime_type)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/crime/types")
+async def get_crime_types():
+    if not has_db("crime_data_archive"):
+        raise HTTPException(status_code=500, detail="Database not configured")
+    try:
+        index = await crime_index.aget()
+        crime_types = index.crime_types
+        return [{"crime_type": t, "count": crime_types[t]} for t in sorted(crime_types, key=lambda t: t or "")]
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/sexes/time-series")
-async def get_sexes_time_series():
-    if not supabase:
+async def get_sexes_time_series(request: Request, max_points: Optional[int] = Query(None, ge=MIN_POINTS, le=MAX_POINTS)):
+    """Rows by year; max_points keeps at most that many years, picked by LTTB over all the series together."""
+    if not has_db("sexes_time_series_archive"):
         raise HTTPException(status_code=500, detail="Database not configured")
     try:
-        response = supabase.table("sexes_time_series_archive").select("*").order("year").execute()
-        return response.data
+        return await cached_response(
+            request,
+            ["sexes_time_series_archive"],
+            lambda: downsample_rows(sexes_time_series_rows(), "year", SEXES_SERIES, max_points),
+            {"max_points": max_points},
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/sexes/summary")
-async def get_sexes_summary():
-    if not supabase:
+async def get_sexes_summary(request: Request):
+    if not has_db("sexes_summary_archive"):
         raise HTTPException(status_code=500, detail="Database not configured")
     try:
-        response = supabase.table("sexes_summary_archive").select("*").execute()
-        return response.data
+        return await cached_response(
+            request,
+            ["sexes_summary_archive"],
+            sexes_summary_rows,
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def region_filters(region, major_region, year_from, year_to):
+    """Query parameters shared by the regions endpoints; region is comma-separated."""
+    if year_from is not None and year_to is not None and year_from > year_to:
+        raise HTTPException(status_code=400, detail="year_from must not be after year_to")
+    regions = [r.strip() for r in region.split(',') if r.strip()] if region else None
+    return {"regions": regions, "major_region": major_region, "year_from": year_from, "year_to": year_to}
+
 @app.get("/api/regions/time-series")
-async def get_regions_time_series():
-    if not supabase:
+async def get_regions_time_series(
+    request: Request,
+    region: Optional[str] = None,
+    major_region: Optional[str] = None,
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    max_points: Optional[int] = Query(None, ge=MIN_POINTS, le=MAX_POINTS),
+):
+    """Archive rows, optionally filtered by region(s), major region and year
+    range; max_points keeps at most that many years per region (LTTB)."""
+    if not has_db("regions_time_series_archive"):
+        raise HTTPException(status_code=500, detail="Database not configured")
+    filters = region_filters(region, major_region, year_from, year_to)
+    try:
+        if not any(v is not None for v in filters.values()):
+            producer = lambda: fetch_all_rows("regions_time_series_archive")
+        else:
+            producer = lambda: region_series.get().filtered_rows(**filters)
+        return await cached_response(
+            request,
+            ["regions_time_series_archive"],
+            lambda: downsample_rows(producer(), "year", ["adm_per_100k"], max_points, group_key="region"),
+            {**filters, "max_points": max_points},
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/regions/series")
+async def get_regions_series(
+    request: Request,
+    region: Optional[str] = None,
+    major_region: Optional[str] = None,
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    max_points: Optional[int] = Query(None, ge=MIN_POINTS, le=MAX_POINTS),
+):
+    """One compact series per region with year-over-year change and rank within year.
+
+    A whole major region is precomputed, so switching the chart's dropdown is
+    a dict lookup and a small cached body. max_points thins each series (LTTB).
+    """
+    if not has_db("regions_time_series_archive"):
+        raise HTTPException(status_code=500, detail="Database not configured")
+    filters = region_filters(region, major_region, year_from, year_to)
+    try:
+        return await cached_response(
+            request,
+            ["regions_time_series_archive"],
+            lambda: region_series.get().series(**filters, max_points=max_points),
+            {**filters, "max_points": max_points},
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/regions/rollups")
+async def get_regions_rollups(request: Request, by: str = "major_region"):
+    """Precomputed rollups per major region (by year) or per year across all regions."""
+    if not has_db("regions_time_series_archive"):
         raise HTTPException(status_code=500, detail="Database not configured")
+    if by not in ROLLUP_KEYS:
+        raise HTTPException(status_code=400, detail=f"by must be one of: {', '.join(ROLLUP_KEYS)}")
     try:
-        response = supabase.table("regions_time_series_archive").select("*").execute()
-        return response.data
+        return await cached_response(request, ["regions_time_series_archive"], lambda: region_series.get().rollups[by], {"by": by})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/articles/search")
+async def search_articles(q: str = Query(..., min_length=1), limit: int = Query(10, ge=1, le=50)):
+    """BM25 full-text search over every page of the archive PDFs.
+
+    "Quoted phrases" must match exactly; results carry the page of the best
+    hit and an HTML snippet with matched terms in <mark>.
+    """
+    # Picks up a rebuilt index (build_article_index.py stamps article_index)
+    response_cache.check_stamps()
+    try:
+        index = await article_index.aget()
+        return await run_db(index.search, q, limit)
+    except FileNotFoundError as e:
+        # Not an error in the request or the server: the index just isn't there yet
+        raise HTTPException(status_code=503, detail=f"{e}. Run build_article_index.py to build it.")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/baby-names/search")
 async def search_baby_names(query: str):
-    if not supabase:
+    if not has_db("baby_names_archive"):
         raise HTTPException(status_code=500, detail="Database not configured")
     try:
-        # ILIKE for case-insensitive prefix search
-        # We use a raw SQL query or rpc if possible, but simple select with ilike works
-        # Note: distinct on a large table can be slow. 
-        # Ideally we'd have a separate table of unique names, but let's try this first.
-        # Or we can limit the search.
-        
-        # Using .ilike() on the 'name' column
-        response = supabase.table("baby_names_archive") \
-            .select("name") \
-            .ilike("name", f"{query}%") \
-            .limit(10) \
-            .execute()
-            
-        # Extract unique names from the result (Supabase might return duplicates if we don't use distinct)
-        # Supabase-py doesn't easily support DISTINCT in the builder chain without .rpc() or raw sql.
-        # But for a simple autocomplete, fetching a few matches and deduplicating in python is okay for now,
-        # though inefficient for "John" which has 100s of rows.
-        # A better approach is a separate "unique_names" table or an RPC.
-        # Let's assume for now we just return what we find and the frontend handles it, 
-        # or we try to be smarter.
-        
-        # Actually, for autocomplete, we really want unique names.
-        # Let's try to fetch a bit more and dedupe.
-        
-        names = list(set([item['name'] for item in response.data]))
-        return sorted(names)[:10]
-        
+        # Served from the in-memory prefix index: distinct names, ranked by total count
+        index = await name_index.aget()
+        return index.search(query)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/baby-names/trends")
-async def get_baby_name_trends(names: str):
-    # names is a comma-separated string
-    if not supabase:
+async def get_baby_name_trends(names: str, extras: Optional[str] = None, max_points: Optional[int] = Query(None, ge=MIN_POINTS, le=MAX_POINTS)):
+    """Per-(name, sex) series from the columnar store.
+
+    names is a comma-separated string; extras optionally lists computed
+    series to add ('share', 'rank_delta'); max_points thins each series (LTTB).
+    """
+    if not has_db("baby_names_archive"):
         raise HTTPException(status_code=500, detail="Database not configured")
-    
-    name_list = [n.strip() for n in names.split(',')]
-    
+
+    name_list = [n.strip() for n in names.split(',') if n.strip()]
+    extra_list = [e.strip() for e in extras.split(',') if e.strip()] if extras else []
+    unknown = [e for e in extra_list if e not in TREND_EXTRAS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown extras: {', '.join(unknown)}")
+
     try:
-        response = supabase.table("baby_names_archive") \
-            .select("*") \
-            .in_("name", name_list) \
-            .order("year") \
-            .execute()
-        return response.data
+        store = await baby_name_store.aget()
+        return store.trends(name_list, extra_list, max_points)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def snapshot_routes(tables=None):
+    """Cache key -> (tables, producer) for the responses stored in the snapshot:
+    the fixed-URL archive endpoints and the views the regions chart opens with.
+
+    The per-major-region series need the regions table loaded to list them,
+    so they are only included when it is among tables (or tables is None).
+    """
+    regions = ["regions_time_series_archive"]
+    routes = {
+        "/api/war-dead/all": (["war_dead_archive"], lambda: fetch_all_rows("war_dead_archive")),
+        "/api/crime/all": (["crime_data_archive"], lambda: fetch_all_rows("crime_data_archive")),
+        "/api/sexes/time-series": (["sexes_time_series_archive"], sexes_time_series_rows),
+        "/api/sexes/summary": (["sexes_summary_archive"], sexes_summary_rows),
+        "/api/regions/time-series": (regions, lambda: fetch_all_rows("regions_time_series_archive")),
+        "/api/regions/series": (regions, lambda: region_series.get().series()),
+        cache_key("/api/regions/rollups", {"by": "major_region"}): (regions, lambda: region_series.get().rollups["major_region"]),
+        cache_key("/api/regions/rollups", {"by": "year"}): (regions, lambda: region_series.get().rollups["year"]),
+    }
+    if has_db("regions_time_series_archive") and (tables is None or "regions_time_series_archive" in tables):
+        try:
+            for major in region_series.get().majors:
+                routes[cache_key("/api/regions/series", {"major_region": major})] = (regions, lambda major=major: region_series.get().series(major_region=major))
+        except Exception as e:
+            print(f"Skipping the per-region series in the snapshot: {e}")
+    return routes
+
+def write_response_snapshot(path=SNAPSHOT_FILE, tables=None):
+    """Serializes and compresses the snapshot routes into path for the next boot.
+
+    With tables, only the responses built from them are rebuilt; the rest
+    are copied from the existing snapshot unless a table they came from has
+    been invalidated since it was written.
+
+    Run by the import scripts after a load that changed rows, or with
+    `python -m backend.main --snapshot`.
+    """
+    start = time.perf_counter()
+    entries = {}
+    previous = ResponseSnapshot.load(path) if tables is not None else None
+    if previous is not None:
+        stamps = read_stamps()
+        for key in list(previous.entries):
+            found = previous.read(key, stamps)
+            if found is not None and not set(tables).intersection(found[0]):
+                entries[key] = (found[0], {coding: bytes(data) for coding, data in found[1].items()})
+        previous.close()
+        kept = len(entries)
+    else:
+        # Without a snapshot to copy from, everything is rebuilt
+        tables = None
+        kept = 0
+
+    for key, (route_tables, producer) in snapshot_routes(tables).items():
+        if key in entries or (tables is not None and not set(tables).intersection(route_tables)):
+            continue
+        if not all(has_db(table) for table in route_tables):
+            continue
+        try:
+            body = serialize(producer())
+        except Exception as e:
+            print(f"Skipping {key} in the snapshot: {e}")
+            continue
+        entries[key] = (route_tables, {None: body, **compress(body, best=True)})
+    size = write_snapshot(entries, path)
+    print(f"Wrote {len(entries)} responses ({len(entries) - kept} rebuilt, {size / 1e6:.1f} MB) to {path} in {time.perf_counter() - start:.1f}s")
+
 def create_tables():
     """
     Function to print SQL for creating tables.
+
+    The schemas live in backend/schema.py, which the local SQLite backend
+    also builds its tables from.
+
+    import_key and row_hash are maintained by import_engine.py, which upserts
+    on import_key. Tables created before they existed need them added, and
+    their rows cleared once so the next import can repopulate them with keys:
+
+        ALTER TABLE <table> ADD COLUMN IF NOT EXISTS import_key TEXT UNIQUE;
+        ALTER TABLE <table> ADD COLUMN IF NOT EXISTS row_hash TEXT;
+        TRUNCATE <table>;
     """
-    print("--- SQL for War Dead Table ---")
-    print("""
-    CREATE TABLE IF NOT EXISTS war_dead_archive (
-        id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
-        cemetery_name TEXT,
-        coordinates JSONB,
-        bio_html TEXT,
-        num_commemorated INTEGER
-    );
-    """)
-    
-    print("\n--- SQL for Crime Data Table ---")
-    print("""
-    CREATE TABLE IF NOT EXISTS crime_data_archive (
-        id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
-        crime_type TEXT,
-        location TEXT,
-        coordinates JSONB,
-        original_color TEXT
-    );
-    """)
-
-    print("\n--- SQL for Sexes Time Series Table ---")
-    print("""
-    CREATE TABLE IF NOT EXISTS sexes_time_series_archive (
-        id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
-        year INTEGER,
-        adm_per_male FLOAT,
-        adm_per_female FLOAT,
-        adm_per_male_rebased FLOAT,
-        adm_per_female_rebased FLOAT,
-        admissions_total BIGINT
-    );
-    """)
-
-    print("\n--- SQL for Sexes Summary Table ---")
-    print("""
-    CREATE TABLE IF NOT EXISTS sexes_summary_archive (
-        id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
-        gender TEXT,
-        admissions FLOAT,
-        percentage FLOAT
-    );
-    """)
-
-    print("\n--- SQL for Regions Time Series Table ---")
-    print("""
-    CREATE TABLE IF NOT EXISTS regions_time_series_archive (
-        id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
-        region TEXT,
-        major_region TEXT,
-        year INTEGER,
-        adm_per_100k FLOAT,
-        admissions_total BIGINT
-    );
-    """)
-    
-    print("\n--- SQL for Baby Names Table ---")
-    print("""
-    CREATE TABLE IF NOT EXISTS baby_names_archive (
-        id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
-        name TEXT NOT NULL,
-        sex TEXT NOT NULL,
-        year INTEGER NOT NULL,
-        count INTEGER,
-        rank INTEGER
-    );
-    CREATE INDEX IF NOT EXISTS idx_baby_names_name ON baby_names_archive (name);
-    """)
+    for table_name in ARCHIVE_TABLES:
+        title = table_name.removesuffix("_archive").replace("_", " ").title()
+        print(f"\n--- SQL for {title} Table ---")
+        print(postgres_ddl(table_name))
 
 if __name__ == "__main__":
-    create_tables()
+    parser = argparse.ArgumentParser(description="Print the archive table DDL, or write the response snapshot.")
+    parser.add_argument("--snapshot", action="store_true", help=f"write {SNAPSHOT_FILE} from the current tables")
+    args = parser.parse_args()
+
+    if args.snapshot:
+        write_response_snapshot()
+    else:
+        create_tables()
@@ -0,0 +1,218 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Served on /metrics in the Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Request latency buckets (seconds), the Prometheus client defaults
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Response size buckets (bytes), 256 B to 16 MB in powers of 4
+SIZE_BUCKETS = tuple(256 * 4 ** i for i in range(9))
+
+# Every metric created, in the order /metrics lists them
+REGISTRY = []
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(names, values, extra=None):
+    pairs = [f'{name}="{escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """A labelled metric whose values are sharded per thread.
+
+    Each thread updates only its own {label values: value} dict, so recording
+    takes no lock: the event loop and every DB pool thread write to separate
+    shards. Shards are summed when /metrics is scraped; a shard outlives its
+    thread, so totals never go backwards.
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name, help, labels=(), registry=REGISTRY):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.local = threading.local()
+        self.shards = []
+        # Only taken the first time a thread records a value
+        self.shards_lock = threading.Lock()
+        registry.append(self)
+
+    def _shard(self):
+        try:
+            return self.local.values
+        except AttributeError:
+            values = self.local.values = {}
+            with self.shards_lock:
+                self.shards.append(values)
+            return values
+
+    def collect(self):
+        """{label values: value} summed over every thread's shard."""
+        totals = {}
+        for shard in list(self.shards):
+            for labels, value in list(shard.items()):
+                totals[labels] = self._merge(totals.get(labels), value)
+        return totals
+
+    def _merge(self, total, value):
+        return value if total is None else total + value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for labels, value in sorted(self.collect().items()):
+            lines.append(f"{self.name}{format_labels(self.labels, labels)} {format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+
+class Histogram(Metric):
+    """Counts per bucket (upper bounds, plus +Inf) and the sum of observed values."""
+
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS, registry=REGISTRY):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help, labels, registry)
+
+    def observe(self, value, *labels):
+        shard = self._shard()
+        counts = shard.get(labels)
+        if counts is None:
+            # One slot per bucket, one for +Inf, then the sum
+            counts = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        counts[bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def _merge(self, total, value):
+        value = list(value)
+        return value if total is None else [a + b for a, b in zip(total, value)]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        bounds = [format_value(b) for b in self.buckets] + ["+Inf"]
+        for labels, counts in sorted(self.collect().items()):
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{format_labels(self.labels, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{format_labels(self.labels, labels)} {format_value(counts[-1])}")
+            lines.append(f"{self.name}_count{format_labels(self.labels, labels)} {cumulative}")
+        return lines
+
+
+class Gauge(Metric):
+    """A single value read by calling read() at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name, help, read, registry=REGISTRY):
+        self.read = read
+        super().__init__(name, help, (), registry)
+
+    def collect(self):
+        return {(): self.read()}
+
+
+def render_metrics(registry=REGISTRY):
+    """Every metric in the Prometheus text format."""
+    lines = []
+    for metric in registry:
+        lines.extend(metric.render())
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+REQUESTS = Counter("http_requests_total", "HTTP requests by route template and status.", ("method", "route", "status"))
+REQUEST_SECONDS = Histogram("http_request_duration_seconds", "Time from receiving a request to sending the last body byte.", ("method", "route"))
+RESPONSE_BYTES = Histogram("http_response_size_bytes", "Response body size as sent (after compression).", ("route",), buckets=SIZE_BUCKETS)
+
+CACHE_REQUESTS = Counter("response_cache_requests_total", "Response cache lookups by route; result is hit or miss.", ("route", "result"))
+CACHE_FILL_SECONDS = Histogram("response_cache_fill_seconds", "Time spent filling a cache miss, by stage: produce (fetch and build), serialize, compress.", ("stage",))
+
+DB_CALL_SECONDS = Histogram("db_call_duration_seconds", "Duration of each database call by table and backend (supabase or sqlite).", ("table", "backend"))
+DB_CALL_ERRORS = Counter("db_call_errors_total", "Database calls that raised, by table and backend.", ("table", "backend"))
+
+
+def route_label(scope):
+    """The matched route's path template, so /api/war-dead/{cemetery_id}/bio
+    is one series; requests that matched no route share one label."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+@contextmanager
+def db_call(table, backend):
+    """Times the database call in the block, counting it as an error if it raises."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        DB_CALL_ERRORS.inc(table, backend)
+        raise
+    finally:
+        DB_CALL_SECONDS.observe(time.perf_counter() - start, table, backend)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording each request's count, latency and response size.
+
+    Plain ASGI rather than @app.middleware("http"), so the body is counted
+    as it is sent and streaming responses pass through untouched.
+    on_first_response(path, status) is called once, after the first request.
+    """
+
+    def __init__(self, app, on_first_response=None):
+        self.app = app
+        self.on_first_response = on_first_response
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def send_counted(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_counted)
+        finally:
+            route = route_label(scope)
+            REQUESTS.inc(scope["method"], route, str(status))
+            REQUEST_SECONDS.observe(time.perf_counter() - start, scope["method"], route)
+            RESPONSE_BYTES.observe(size, route)
+            if self.on_first_response is not None:
+                callback, self.on_first_response = self.on_first_response, None
+                callback(scope["path"], status)
@@ -0,0 +1,188 @@
+import heapq
+from bisect import bisect_left
+from collections import OrderedDict, defaultdict
+from typing import Optional
+
+import numpy as np
+
+from .downsample import lttb_indices
+
+# Top results for prefixes up to this length are precomputed; longer prefixes
+# cover few enough names that ranking them on the fly is cheap
+PRECOMPUTED_PREFIX_LEN = 3
+
+
+class NamePrefixIndex:
+    """Case-insensitive prefix search over distinct baby names.
+
+    Names are kept in a sorted array of lowercase keys, so a prefix maps to a
+    contiguous slice found with bisect. Results are ranked by the total count
+    of each name across all years and sexes.
+    """
+
+    def __init__(self, rows, limit=10):
+        self.limit = limit
+
+        totals = defaultdict(int)
+        for row in rows:
+            totals[row["name"]] += row.get("count") or 0
+
+        entries = sorted((name.lower(), name, total) for name, total in totals.items())
+        self.keys = [key for key, _name, _total in entries]
+        self.names = [name for _key, name, _total in entries]
+        self.weights = [total for _key, _name, total in entries]
+
+        self.top = {}
+        for key in self.keys:
+            for length in range(1, min(len(key), PRECOMPUTED_PREFIX_LEN) + 1):
+                prefix = key[:length]
+                if prefix not in self.top:
+                    self.top[prefix] = self._rank(prefix)
+
+    def __len__(self):
+        return len(self.names)
+
+    def _rank(self, prefix):
+        lo = bisect_left(self.keys, prefix)
+        # Every key starting with the prefix sorts before prefix + U+FFFF
+        hi = bisect_left(self.keys, prefix + "\uffff", lo)
+        best = heapq.nlargest(self.limit, range(lo, hi), key=lambda i: (self.weights[i], -i))
+        return [self.names[i] for i in best]
+
+    def search(self, query):
+        """Returns up to `limit` names starting with query, most popular first."""
+        prefix = query.strip().lower()
+        if not prefix:
+            return []
+        if prefix in self.top:
+            return self.top[prefix]
+        if len(prefix) <= PRECOMPUTED_PREFIX_LEN:
+            # Short prefix that matches no name at all
+            return []
+        return self._rank(prefix)
+
+
+SEXES = ("F", "M")
+
+# Extras that trends() can compute on top of the raw series
+TREND_EXTRAS = ("share", "rank_delta")
+
+# Most downsampled series whose LTTB picks are remembered; the least
+# recently used are dropped first
+DOWNSAMPLE_CACHE_SIZE = 4096
+
+
+class BabyNameStore:
+    """Columnar in-memory copy of baby_names_archive.
+
+    Rows are sorted by (name, sex, year) into parallel NumPy arrays, and
+    offsets[i]:offsets[i + 1] is the slice holding every row of name i, so a
+    trend query is a dict lookup plus array slicing. Missing counts are
+    stored as 0 and missing ranks as -1.
+    """
+
+    def __init__(self, rows):
+        rows = sorted(rows, key=lambda r: (r["name"], r["sex"], r["year"]))
+
+        self.names = []
+        self.name_ids = {}
+        name_ids = np.empty(len(rows), dtype=np.int32)
+        for i, row in enumerate(rows):
+            name_id = self.name_ids.get(row["name"])
+            if name_id is None:
+                name_id = self.name_ids[row["name"]] = len(self.names)
+                self.names.append(row["name"])
+            name_ids[i] = name_id
+        self.lower_ids = {name.lower(): i for i, name in reversed(list(enumerate(self.names)))}
+
+        self.name_id = name_ids
+        self.sex = np.fromiter((SEXES.index(r["sex"]) for r in rows), dtype=np.int8, count=len(rows))
+        self.year = np.fromiter((r["year"] for r in rows), dtype=np.int16, count=len(rows))
+        self.count = np.fromiter((r.get("count") or 0 for r in rows), dtype=np.int32, count=len(rows))
+        self.rank = np.fromiter((r["rank"] if r.get("rank") is not None else -1 for r in rows), dtype=np.int32, count=len(rows))
+        self.offsets = np.searchsorted(self.name_id, np.arange(len(self.names) + 1)).astype(np.int64)
+
+        # Total recorded births per (sex, year), the denominator for share-of-births
+        self.first_year = int(self.year.min()) if len(rows) else 0
+        span = int(self.year.max()) - self.first_year + 1 if len(rows) else 0
+        self.births = np.zeros((len(SEXES), span), dtype=np.int64)
+        np.add.at(self.births, (self.sex, self.year - self.first_year), self.count)
+
+        # (name id, sex code, max_points) -> row offsets kept by LTTB, in LRU order
+        self.downsampled = OrderedDict()
+
+    def __len__(self):
+        return len(self.year)
+
+    def name_totals(self):
+        """Yields {'name', 'count'} with each name's count summed over all rows."""
+        if not len(self.names):
+            return
+        totals = np.add.reduceat(self.count.astype(np.int64), self.offsets[:-1])
+        for name, total in zip(self.names, totals.tolist()):
+            yield {"name": name, "count": total}
+
+    def lookup(self, name) -> Optional[int]:
+        name_id = self.name_ids.get(name)
+        if name_id is None:
+            name_id = self.lower_ids.get(name.lower())
+        return name_id
+
+    def trends(self, names, extras=(), max_points=None):
+        """Returns one compact series per (name, sex) for the requested names.
+
+        Each series holds parallel 'years', 'counts' and 'ranks' lists, plus
+        'share' (count / recorded births of that sex that year) and
+        'rank_delta' (places climbed since the previous listed year, None for
+        the first year or a missing rank) when asked for in extras. With
+        max_points, longer series are thinned by LTTB on the counts; extras
+        are computed on the full series first.
+        """
+        series = []
+        for name in names:
+            name_id = self.lookup(name)
+            if name_id is None:
+                continue
+            start, end = self.offsets[name_id], self.offsets[name_id + 1]
+            sexes = self.sex[start:end]
+            # Rows are sorted by sex within a name, so each sex is one sub-slice
+            for sex_code in np.unique(sexes).tolist():
+                lo = start + int(np.searchsorted(sexes, sex_code, side="left"))
+                hi = start + int(np.searchsorted(sexes, sex_code, side="right"))
+                years = self.year[lo:hi]
+                counts = self.count[lo:hi]
+                ranks = self.rank[lo:hi]
+
+                entry = {
+                    "name": self.names[name_id],
+                    "sex": SEXES[sex_code],
+                    "years": years.tolist(),
+                    "counts": counts.tolist(),
+                    "ranks": [r if r >= 0 else None for r in ranks.tolist()],
+                }
+                if "share" in extras:
+                    births = self.births[sex_code, years - self.first_year]
+                    share = np.divide(counts, births, out=np.zeros(len(counts)), where=births > 0)
+                    entry["share"] = np.round(share, 8).tolist()
+                if "rank_delta" in extras:
+                    delta = (ranks[:-1] - ranks[1:]).tolist()
+                    valid = ((ranks[:-1] >= 0) & (ranks[1:] >= 0)).tolist()
+                    entry["rank_delta"] = [None] + [d if ok else None for d, ok in zip(delta, valid)]
+                if max_points is not None and hi - lo > max_points:
+                    keep = self._downsample(name_id, sex_code, max_points, years, counts)
+                    for key in ("years", "counts", "ranks", "share", "rank_delta"):
+                        if key in entry:
+                            entry[key] = [entry[key][i] for i in keep]
+                series.append(entry)
+        return series
+
+    def _downsample(self, name_id, sex_code, max_points, years, counts):
+        key = (name_id, sex_code, max_points)
+        keep = self.downsampled.get(key)
+        if keep is None:
+            keep = self.downsampled[key] = lttb_indices(years, counts, max_points).tolist()
+            if len(self.downsampled) > DOWNSAMPLE_CACHE_SIZE:
+                self.downsampled.popitem(last=False)
+        else:
+            self.downsampled.move_to_end(key)
+        return keep
@@ -0,0 +1,252 @@
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+from .downsample import downsample_series
+
+# Decimals kept for rates in the series and rollup responses
+RATE_DECIMALS = 3
+
+# What /api/regions/rollups can group by
+ROLLUP_KEYS = ("major_region", "year")
+
+# Parallel lists in each series, thinned together when downsampling
+SERIES_LISTS = ("years", "adm_per_100k", "admissions_total", "yoy_change", "rank")
+
+# Most downsampled series kept; the least recently used are dropped first
+DOWNSAMPLE_CACHE_SIZE = 4096
+
+
+def rounded(values, decimals=RATE_DECIMALS):
+    """Float array as a list, NaN (missing) as None."""
+    return [None if v != v else v for v in np.round(values, decimals).tolist()]
+
+
+def whole(values):
+    """Float array of counts as a list of ints, NaN (missing) as None."""
+    return [None if v != v else int(v) for v in np.round(values).tolist()]
+
+
+def ranks_within(groups, values):
+    """Rank of each value within its group, 1 = highest; NaN values get 0.
+
+    Ties share the best rank (1, 2, 2, 4).
+    """
+    ranks = np.zeros(len(values), dtype=np.int32)
+    valid = ~np.isnan(values)
+    for group in np.unique(groups):
+        members = np.flatnonzero((groups == group) & valid)
+        ascending = np.sort(values[members])
+        # 1 + how many values in the group are strictly greater
+        ranks[members] = 1 + len(members) - np.searchsorted(ascending, values[members], side="right")
+    return ranks
+
+
+class RegionSeries:
+    """Columnar in-memory copy of regions_time_series_archive.
+
+    Rows are sorted by (major region, region, year) into parallel NumPy
+    arrays, so every region is one contiguous slice and every major region a
+    run of them. Year-over-year change and rank within year are computed
+    once for all rows, and the per-major-region series and both rollups are
+    materialised up front; requests without a year range are a dict lookup.
+    Missing rates and totals are stored as NaN.
+    """
+
+    def __init__(self, rows):
+        self.rows = sorted(rows, key=lambda r: (r.get("major_region") or "", r.get("region") or "", r.get("year") or 0))
+
+        self.regions = []
+        self.region_ids = {}
+        self.region_major = []
+        region_id = np.empty(len(self.rows), dtype=np.int32)
+        for i, row in enumerate(self.rows):
+            rid = self.region_ids.get(row.get("region"))
+            if rid is None:
+                rid = self.region_ids[row.get("region")] = len(self.regions)
+                self.regions.append(row.get("region"))
+                self.region_major.append(row.get("major_region"))
+            region_id[i] = rid
+        self.lower_ids = {(name or "").lower(): i for i, name in reversed(list(enumerate(self.regions)))}
+        self.majors = list(dict.fromkeys(m for m in self.region_major if m is not None))
+
+        self.region_id = region_id
+        self.year = np.fromiter((r.get("year") or 0 for r in self.rows), dtype=np.int16, count=len(self.rows))
+        self.rate = np.array([r.get("adm_per_100k") for r in self.rows], dtype=np.float64) if self.rows else np.empty(0)
+        self.total = np.array([r.get("admissions_total") for r in self.rows], dtype=np.float64) if self.rows else np.empty(0)
+        self.offsets = np.searchsorted(self.region_id, np.arange(len(self.regions) + 1)).astype(np.int64)
+
+        # Change since the same region's previous year (NaN at the start of a
+        # series or after a gap)
+        self.yoy = np.full(len(self.rows), np.nan)
+        if len(self.rows) > 1:
+            follows = (self.region_id[1:] == self.region_id[:-1]) & (self.year[1:] == self.year[:-1] + 1)
+            self.yoy[1:][follows] = (self.rate[1:] - self.rate[:-1])[follows]
+        self.rank = ranks_within(self.year, self.rate)
+
+        self.series_by_major = {major: self._series(self._major_slice(major)) for major in self.majors}
+        self.rollups = {"major_region": self._major_rollup(), "year": self._year_rollup()}
+
+        # (region, year_from, year_to, max_points) -> downsampled series
+        self.downsampled = OrderedDict()
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _major_slice(self, major):
+        """Row indices of every region in major (contiguous, as rows are sorted by major region)."""
+        ids = [i for i, m in enumerate(self.region_major) if m == major]
+        return np.arange(self.offsets[ids[0]], self.offsets[ids[-1] + 1]) if ids else np.empty(0, dtype=np.int64)
+
+    def lookup(self, region) -> Optional[int]:
+        rid = self.region_ids.get(region)
+        if rid is None:
+            rid = self.lower_ids.get(region.lower())
+        return rid
+
+    def select(self, regions=None, major_region=None, year_from=None, year_to=None):
+        """Indices of the rows matching every given filter, in (major, region, year) order."""
+        mask = np.ones(len(self.rows), dtype=bool)
+        if regions is not None:
+            ids = [rid for rid in (self.lookup(r) for r in regions) if rid is not None]
+            mask &= np.isin(self.region_id, ids)
+        if major_region is not None:
+            majors = np.array([m == major_region for m in self.region_major] or [False])
+            mask &= majors[self.region_id]
+        if year_from is not None:
+            mask &= self.year >= year_from
+        if year_to is not None:
+            mask &= self.year <= year_to
+        return np.flatnonzero(mask)
+
+    def filtered_rows(self, **filters):
+        """The archive rows matching the filters, as fetched from the table (in id order)."""
+        return sorted((self.rows[i] for i in self.select(**filters).tolist()), key=lambda r: r.get("id") or 0)
+
+    def series(self, regions=None, major_region=None, year_from=None, year_to=None, max_points=None):
+        """One compact series per region: parallel 'years', 'adm_per_100k',
+        'admissions_total', 'yoy_change' and 'rank' (within the year, across
+        all regions) lists.
+
+        With max_points, longer series are thinned by LTTB on the rate.
+        """
+        if regions is None and year_from is None and year_to is None and major_region in self.series_by_major:
+            result = self.series_by_major[major_region]
+        else:
+            result = self._series(self.select(regions, major_region, year_from, year_to))
+        if max_points is None:
+            return result
+        return [self._downsample(s, year_from, year_to, max_points) for s in result]
+
+    def _downsample(self, series, year_from, year_to, max_points):
+        if len(series["years"]) <= max_points:
+            return series
+        key = (series["region"], year_from, year_to, max_points)
+        result = self.downsampled.get(key)
+        if result is None:
+            result = self.downsampled[key] = downsample_series(series, "years", "adm_per_100k", SERIES_LISTS, max_points)
+            if len(self.downsampled) > DOWNSAMPLE_CACHE_SIZE:
+                self.downsampled.popitem(last=False)
+        else:
+            self.downsampled.move_to_end(key)
+        return result
+
+    def _series(self, indices):
+        series = []
+        if not len(indices):
+            return series
+        # Split the selection wherever the region changes
+        ids = self.region_id[indices]
+        bounds = np.flatnonzero(np.diff(ids)) + 1
+        for chunk in np.split(indices, bounds):
+            rid = int(self.region_id[chunk[0]])
+            series.append({
+                "region": self.regions[rid],
+                "major_region": self.region_major[rid],
+                "years": self.year[chunk].tolist(),
+                "adm_per_100k": rounded(self.rate[chunk]),
+                "admissions_total": whole(self.total[chunk]),
+                "yoy_change": rounded(self.yoy[chunk]),
+                "rank": [r or None for r in self.rank[chunk].tolist()],
+            })
+        return series
+
+    def _aggregate(self, keys):
+        """Per distinct key: summed admissions and the population-weighted rate.
+
+        Each row's population is recovered as admissions / rate, so the
+        group rate is total admissions per 100,000 of the summed population.
+        """
+        unique, inverse = np.unique(keys, return_inverse=True)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            population = self.total / self.rate * 100_000
+        weighted = ~np.isnan(population) & (self.rate > 0)
+        totals = np.bincount(inverse, weights=np.nan_to_num(self.total), minlength=len(unique))
+        weighted_totals = np.bincount(inverse, weights=np.where(weighted, self.total, 0), minlength=len(unique))
+        populations = np.bincount(inverse, weights=np.where(weighted, population, 0), minlength=len(unique))
+        counts = np.bincount(inverse, minlength=len(unique))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rates = np.where(populations > 0, weighted_totals / populations * 100_000, np.nan)
+        return unique, totals, rates, counts
+
+    def _major_rollup(self):
+        """Per major region and year, with year-over-year change and rank among major regions."""
+        if not len(self.rows):
+            return []
+        majors = np.array([self.majors.index(m) if m in self.majors else -1 for m in self.region_major] or [-1])
+        major_of_row = majors[self.region_id]
+        keep = major_of_row >= 0
+        years = self.year.astype(np.int64)
+        span = int(years.max()) - int(years.min()) + 1
+        first_year = int(years.min())
+        keys = np.where(keep, major_of_row * span + (years - first_year), -1)
+
+        unique, totals, rates, counts = self._aggregate(keys)
+        valid = unique >= 0
+        unique, totals, rates, counts = unique[valid], totals[valid], rates[valid], counts[valid]
+        major_ids, year_values = unique // span, unique % span + first_year
+        ranks = ranks_within(year_values, rates)
+
+        rollup = []
+        bounds = np.flatnonzero(np.diff(major_ids)) + 1
+        for chunk in np.split(np.arange(len(unique)), bounds):
+            chunk_years = year_values[chunk]
+            chunk_rates = rates[chunk]
+            yoy = np.full(len(chunk), np.nan)
+            follows = chunk_years[1:] == chunk_years[:-1] + 1
+            yoy[1:][follows] = (chunk_rates[1:] - chunk_rates[:-1])[follows]
+            rollup.append({
+                "major_region": self.majors[int(major_ids[chunk[0]])],
+                "years": chunk_years.tolist(),
+                "regions": counts[chunk].tolist(),
+                "admissions_total": whole(totals[chunk]),
+                "adm_per_100k": rounded(chunk_rates),
+                "yoy_change": rounded(yoy),
+                "rank": [r or None for r in ranks[chunk].tolist()],
+            })
+        return rollup
+
+    def _year_rollup(self):
+        """Per year across every region: totals, weighted rate and the spread of regional rates."""
+        if not len(self.rows):
+            return []
+        years, totals, rates, counts = self._aggregate(self.year)
+        yoy = np.full(len(years), np.nan)
+        follows = years[1:] == years[:-1] + 1
+        yoy[1:][follows] = (rates[1:] - rates[:-1])[follows]
+
+        rollup = []
+        for i, year in enumerate(years.tolist()):
+            members = np.flatnonzero((self.year == year) & ~np.isnan(self.rate))
+            top = members[np.argmax(self.rate[members])] if len(members) else None
+            rollup.append({
+                "year": year,
+                "regions": int(counts[i]),
+                "admissions_total": whole(totals[i:i + 1])[0],
+                "adm_per_100k": rounded(rates[i:i + 1])[0],
+                "yoy_change": rounded(yoy[i:i + 1])[0],
+                "median_adm_per_100k": rounded(np.median(self.rate[members], keepdims=True))[0] if len(members) else None,
+                "top_region": self.regions[int(self.region_id[top])] if top is not None else None,
+            })
+        return rollup
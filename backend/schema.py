@@ -0,0 +1,116 @@
+# Schemas of the *_archive tables, shared by the Postgres SQL that
+# create_tables() prints and the local SQLite backend.
+
+# Maintained by import_engine.py and never served by the API
+IMPORT_COLUMNS = ("import_key", "row_hash")
+
+ARCHIVE_TABLES = {
+    "war_dead_archive": {
+        "columns": [
+            ("cemetery_name", "TEXT"),
+            ("coordinates", "JSONB"),
+            ("bio_html", "TEXT"),
+            ("num_commemorated", "INTEGER"),
+        ],
+        "indexes": [],
+    },
+    "crime_data_archive": {
+        "columns": [
+            ("crime_type", "TEXT"),
+            ("location", "TEXT"),
+            ("coordinates", "JSONB"),
+            ("original_color", "TEXT"),
+        ],
+        "indexes": [("crime_type",)],
+    },
+    "sexes_time_series_archive": {
+        "columns": [
+            ("year", "INTEGER"),
+            ("adm_per_male", "FLOAT"),
+            ("adm_per_female", "FLOAT"),
+            ("adm_per_male_rebased", "FLOAT"),
+            ("adm_per_female_rebased", "FLOAT"),
+            ("admissions_total", "BIGINT"),
+        ],
+        "indexes": [("year",)],
+    },
+    "sexes_summary_archive": {
+        "columns": [
+            ("gender", "TEXT"),
+            ("admissions", "FLOAT"),
+            ("percentage", "FLOAT"),
+        ],
+        "indexes": [],
+    },
+    "regions_time_series_archive": {
+        "columns": [
+            ("region", "TEXT"),
+            ("major_region", "TEXT"),
+            ("year", "INTEGER"),
+            ("adm_per_100k", "FLOAT"),
+            ("admissions_total", "BIGINT"),
+        ],
+        "indexes": [("region", "year")],
+    },
+    "baby_names_archive": {
+        "columns": [
+            ("name", "TEXT NOT NULL"),
+            ("sex", "TEXT NOT NULL"),
+            ("year", "INTEGER NOT NULL"),
+            ("count", "INTEGER"),
+            ("rank", "INTEGER"),
+        ],
+        "indexes": [("name",)],
+    },
+}
+
+# Postgres column types and their SQLite storage classes
+SQLITE_TYPES = {
+    "TEXT": "TEXT",
+    "JSONB": "TEXT",
+    "INTEGER": "INTEGER",
+    "BIGINT": "INTEGER",
+    "FLOAT": "REAL",
+}
+
+
+def served_columns(table_name):
+    """Comma-separated columns the API selects from an archive table."""
+    return ",".join(["id"] + [name for name, _type in ARCHIVE_TABLES[table_name]["columns"]])
+
+
+def json_columns(table_name):
+    """Columns stored as JSON text by the local backend."""
+    return {name for name, col_type in ARCHIVE_TABLES[table_name]["columns"] if col_type == "JSONB"}
+
+
+def column_names(table_name):
+    return ["id"] + [name for name, _type in ARCHIVE_TABLES[table_name]["columns"]] + list(IMPORT_COLUMNS)
+
+
+def index_name(table_name, columns):
+    return f"idx_{table_name.removesuffix('_archive')}_{'_'.join(columns)}"
+
+
+def postgres_ddl(table_name):
+    table = ARCHIVE_TABLES[table_name]
+    lines = ["id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY"]
+    lines += [f"{name} {col_type}" for name, col_type in table["columns"]]
+    lines += ["import_key TEXT UNIQUE", "row_hash TEXT"]
+    sql = f"CREATE TABLE IF NOT EXISTS {table_name} (\n    " + ",\n    ".join(lines) + "\n);"
+    for columns in table["indexes"]:
+        sql += f"\nCREATE INDEX IF NOT EXISTS {index_name(table_name, columns)} ON {table_name} ({', '.join(columns)});"
+    return sql
+
+
+def sqlite_ddl(table_name):
+    table = ARCHIVE_TABLES[table_name]
+    lines = ["id INTEGER PRIMARY KEY AUTOINCREMENT"]
+    for name, col_type in table["columns"]:
+        base, _, constraint = col_type.partition(" ")
+        lines.append(f"{name} {SQLITE_TYPES[base]} {constraint}".rstrip())
+    lines += ["import_key TEXT UNIQUE", "row_hash TEXT"]
+    statements = [f"CREATE TABLE IF NOT EXISTS {table_name} ({', '.join(lines)})"]
+    for columns in table["indexes"]:
+        statements.append(f"CREATE INDEX IF NOT EXISTS {index_name(table_name, columns)} ON {table_name} ({', '.join(columns)})")
+    return statements
@@ -0,0 +1,254 @@
+import html
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import zlib
+
+# Written by build_article_index.py, read by /api/articles/search
+INDEX_FILE = os.environ.get("ARTICLE_INDEX_FILE", "backend/data/article_index.sqlite")
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Tokens either side of the best hit shown in a snippet
+SNIPPET_RADIUS = 15
+
+# The char offset of every MARK_INTERVAL-th token is stored, so snippets
+# only re-tokenize the text right around the hit
+MARK_INTERVAL = 64
+
+TOKEN_RE = re.compile(r"\w+")
+QUERY_RE = re.compile(r'"([^"]*)"|(\S+)')
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS docs (
+        id INTEGER PRIMARY KEY,
+        path TEXT UNIQUE NOT NULL,
+        size INTEGER NOT NULL,
+        mtime_ns INTEGER NOT NULL,
+        title TEXT,
+        pdf_path TEXT,
+        portfolio_id INTEGER,
+        length INTEGER NOT NULL,
+        page_starts TEXT NOT NULL,
+        token_marks TEXT NOT NULL,
+        text BLOB NOT NULL
+    )""",
+    # One row per (term, doc); positions are delta+varint encoded
+    """CREATE TABLE IF NOT EXISTS postings (
+        term TEXT NOT NULL,
+        doc_id INTEGER NOT NULL,
+        tf INTEGER NOT NULL,
+        positions BLOB NOT NULL,
+        PRIMARY KEY (term, doc_id)
+    ) WITHOUT ROWID""",
+    "CREATE INDEX IF NOT EXISTS idx_postings_doc ON postings (doc_id)",
+]
+
+
+def tokenize(text):
+    return [m.group().lower() for m in TOKEN_RE.finditer(text)]
+
+
+def encode_positions(positions):
+    """Ascending ints as varint-encoded gaps."""
+    out = bytearray()
+    previous = 0
+    for position in positions:
+        gap = position - previous
+        previous = position
+        while gap >= 0x80:
+            out.append((gap & 0x7F) | 0x80)
+            gap >>= 7
+        out.append(gap)
+    return bytes(out)
+
+
+def decode_positions(data):
+    positions = []
+    value = shift = previous = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        previous += value
+        positions.append(previous)
+        value = shift = 0
+    return positions
+
+
+def parse_query(query):
+    """Splits a query into loose terms and "quoted phrases" (as token lists)."""
+    terms, phrases = [], []
+    for phrase, word in QUERY_RE.findall(query):
+        if phrase:
+            tokens = tokenize(phrase)
+            if len(tokens) > 1:
+                phrases.append(tokens)
+            else:
+                terms.extend(tokens)
+        else:
+            terms.extend(tokenize(word))
+    return terms, phrases
+
+
+def phrase_starts(positions_by_term, phrase):
+    """Positions in a doc where every token of phrase occurs in sequence."""
+    starts = set(positions_by_term[phrase[0]])
+    for offset, term in enumerate(phrase[1:], 1):
+        following = positions_by_term[term]
+        starts = {p for p in starts if p + offset in following}
+        if not starts:
+            break
+    return starts
+
+
+class ArticleIndex:
+    """BM25 search over the positional index built by build_article_index.py.
+
+    Document metadata and collection statistics are loaded once; postings
+    are read per query term from SQLite, which keeps them clustered by term.
+    """
+
+    def __init__(self, path=INDEX_FILE):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Article index not built: {path}")
+        self.path = path
+        self.local = threading.local()
+
+        self.docs = {}
+        for doc_id, title, pdf_path, portfolio_id, length, page_starts in self.connection().execute(
+            "SELECT id, title, pdf_path, portfolio_id, length, page_starts FROM docs"
+        ):
+            self.docs[doc_id] = {
+                "title": title,
+                "pdf_path": pdf_path,
+                "portfolio_id": portfolio_id,
+                "length": length,
+                "page_starts": json.loads(page_starts),
+            }
+        self.avg_length = sum(d["length"] for d in self.docs.values()) / max(len(self.docs), 1)
+
+    def __len__(self):
+        return len(self.docs)
+
+    def connection(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+            self.local.conn = conn
+        return conn
+
+    def postings(self, term):
+        """{doc_id: (tf, encoded positions)} for term."""
+        rows = self.connection().execute("SELECT doc_id, tf, positions FROM postings WHERE term = ?", (term,))
+        return {doc_id: (tf, positions) for doc_id, tf, positions in rows}
+
+    def search(self, query, limit=10):
+        """Ranked matches for query; every quoted phrase must match exactly."""
+        terms, phrases = parse_query(query)
+        all_terms = list(dict.fromkeys(terms + [t for phrase in phrases for t in phrase]))
+        if not all_terms:
+            return []
+        postings = {term: self.postings(term) for term in all_terms}
+
+        if phrases:
+            # Only docs containing every phrase term can match
+            candidates = set.intersection(*(set(postings[t]) for phrase in phrases for t in phrase))
+        else:
+            candidates = set().union(*(set(p) for p in postings.values()))
+
+        hits = {}
+        for doc_id in candidates:
+            doc = self.docs.get(doc_id)
+            if doc is None:
+                continue
+            decoded = {}
+
+            def positions(term):
+                if term not in decoded:
+                    entry = postings[term].get(doc_id)
+                    decoded[term] = set(decode_positions(entry[1])) if entry else set()
+                return decoded[term]
+
+            first_hit = None
+            matched = True
+            for phrase in phrases:
+                starts = phrase_starts({t: positions(t) for t in phrase}, phrase)
+                if not starts:
+                    matched = False
+                    break
+                first_hit = min(starts) if first_hit is None else min(first_hit, min(starts))
+            if not matched:
+                continue
+
+            score = 0.0
+            for term in all_terms:
+                entry = postings[term].get(doc_id)
+                if entry is None:
+                    continue
+                tf = entry[0]
+                df = len(postings[term])
+                idf = math.log(1 + (len(self.docs) - df + 0.5) / (df + 0.5))
+                score += idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * doc["length"] / self.avg_length))
+            hits[doc_id] = (score, first_hit)
+
+        ranked = sorted(hits.items(), key=lambda item: (-item[1][0], item[0]))[:limit]
+        highlight = set(all_terms)
+        results = []
+        for doc_id, (score, first_hit) in ranked:
+            doc = self.docs[doc_id]
+            if first_hit is None:
+                first_hit = min(min(decode_positions(postings[t][doc_id][1])) for t in terms if doc_id in postings[t])
+            results.append({
+                "id": doc["portfolio_id"],
+                "title": doc["title"],
+                "pdf_path": doc["pdf_path"],
+                "page": self.page_of(doc, first_hit),
+                "score": round(score, 4),
+                "snippet": self.snippet(doc_id, first_hit, highlight),
+            })
+        return results
+
+    def page_of(self, doc, position):
+        page = 0
+        for number, start in enumerate(doc["page_starts"]):
+            if start <= position:
+                page = number
+        return page + 1
+
+    def snippet(self, doc_id, position, highlight):
+        """HTML-escaped text around token position with matched terms in <mark>."""
+        blob, token_marks = self.connection().execute("SELECT text, token_marks FROM docs WHERE id = ?", (doc_id,)).fetchone()
+        text = zlib.decompress(blob).decode("utf-8")
+
+        # Resume tokenizing from the nearest stored offset before the window
+        marks = json.loads(token_marks)
+        mark = min(max(position - SNIPPET_RADIUS, 0) // MARK_INTERVAL, len(marks) - 1)
+        if mark < 0:
+            return ""
+        matches = []
+        for i, match in enumerate(TOKEN_RE.finditer(text, marks[mark]), mark * MARK_INTERVAL):
+            if i >= position + SNIPPET_RADIUS:
+                break
+            if i >= position - SNIPPET_RADIUS:
+                matches.append(match)
+        if not matches:
+            return ""
+
+        parts = []
+        cursor = matches[0].start()
+        for match in matches:
+            parts.append(html.escape(text[cursor:match.start()]))
+            word = html.escape(match.group())
+            parts.append(f"<mark>{word}</mark>" if match.group().lower() in highlight else word)
+            cursor = match.end()
+        snippet = " ".join("".join(parts).split())
+        prefix = "… " if matches[0].start() > 0 else ""
+        suffix = " …" if cursor < len(text) else ""
+        return prefix + snippet + suffix
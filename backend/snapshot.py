@@ -0,0 +1,116 @@
+import json
+import mmap
+import os
+import struct
+import time
+
+# Written by the import scripts (see write_response_snapshot in main.py) and
+# memory-mapped at startup, so archive responses can be served before the
+# database has been contacted
+SNAPSHOT_FILE = os.environ.get("RESPONSE_SNAPSHOT_FILE", "backend/data/response_snapshot.bin")
+
+# File layout: MAGIC, a little-endian uint32 header length, the JSON header,
+# then the response bodies back to back. The header maps each cache key to
+# its tables and the (offset, length) of every stored content-coding.
+MAGIC = b"RSNAP"
+VERSION = 1
+
+HEADER_LENGTH = struct.Struct("<I")
+
+
+def write_snapshot(entries, path=SNAPSHOT_FILE):
+    """Writes {key: (tables, {coding or None: bytes})} atomically."""
+    index = {}
+    blobs = []
+    offset = 0
+    for key, (tables, variants) in entries.items():
+        spans = {}
+        for coding, data in variants.items():
+            spans[coding or "identity"] = [offset, len(data)]
+            blobs.append(data)
+            offset += len(data)
+        index[key] = {"tables": list(tables), "spans": spans}
+
+    header = json.dumps({"version": VERSION, "created": time.time(), "entries": index}).encode("utf-8")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(HEADER_LENGTH.pack(len(header)))
+        f.write(header)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp_path, path)
+    return offset
+
+
+class ResponseSnapshot:
+    """Read-only, memory-mapped view of a snapshot file.
+
+    Bodies are only paged in when a key is first served. An entry is used
+    at most once, to seed the response cache; after that the cache's own TTL
+    and invalidation apply as usual.
+    """
+
+    def __init__(self, path=SNAPSHOT_FILE):
+        self.path = path
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"Not a response snapshot: {path}")
+        start = len(MAGIC) + HEADER_LENGTH.size
+        (header_length,) = HEADER_LENGTH.unpack(self.map[len(MAGIC):start])
+        header = json.loads(self.map[start:start + header_length])
+        if header.get("version") != VERSION:
+            raise ValueError(f"Unsupported response snapshot version {header.get('version')}: {path}")
+        self.created = header["created"]
+        self.entries = header["entries"]
+        self.base = start + header_length
+
+    @classmethod
+    def load(cls, path=SNAPSHOT_FILE):
+        """The snapshot at path, or None if there isn't a usable one."""
+        if not os.path.exists(path):
+            return None
+        try:
+            return cls(path)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring response snapshot: {e}")
+            return None
+
+    def __len__(self):
+        return len(self.entries)
+
+    def take(self, key, stamps):
+        """Returns (tables, {coding or None: bytes}) for key and forgets it.
+
+        Returns None if there is no entry, or if one of its tables has been
+        invalidated (stamped) since the snapshot was written.
+        """
+        found = self.read(key, stamps)
+        self.entries.pop(key, None)
+        return found
+
+    def read(self, key, stamps):
+        """Like take(), but leaves the entry in place."""
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if any((stamps.get(table) or 0) > self.created for table in entry["tables"]):
+            return None
+        variants = {}
+        for coding, (offset, length) in entry["spans"].items():
+            start = self.base + offset
+            variants[None if coding == "identity" else coding] = self.map[start:start + length]
+        return entry["tables"], variants
+
+    def discard(self, tables=None):
+        """Drops entries built from any of tables (or all of them)."""
+        if tables is None:
+            self.entries.clear()
+            return
+        tables = set(tables)
+        self.entries = {k: e for k, e in self.entries.items() if not tables.intersection(e["tables"])}
+
+    def close(self):
+        self.map.close()
@@ -0,0 +1,239 @@
+import math
+from collections import defaultdict
+from typing import Optional
+
+# Fine grid used to bucket raw points (~1 km cells at UK latitudes)
+POINT_CELL_SIZE = 0.01
+
+# Below this zoom the map endpoints return grid clusters instead of raw points
+CLUSTER_MAX_ZOOM = 13
+
+# Number of cluster cells across one 256px map tile (i.e. ~64px cells on screen)
+CLUSTER_CELLS_PER_TILE = 4
+
+
+def parse_bbox(value):
+    """Parses a Leaflet-style 'west,south,east,north' string into floats."""
+    try:
+        west, south, east, north = (float(part) for part in value.split(","))
+    except (AttributeError, ValueError):
+        raise ValueError("bbox must be 'west,south,east,north'")
+
+    # nan and inf parse as floats but can't be mapped to grid cells
+    if not all(math.isfinite(v) for v in (west, south, east, north)):
+        raise ValueError("bbox values must be finite numbers")
+    if not (-180 <= west <= 180 and -180 <= east <= 180 and -90 <= south <= 90 and -90 <= north <= 90):
+        raise ValueError("bbox longitudes must be within -180..180 and latitudes within -90..90")
+    if west > east or south > north:
+        raise ValueError("bbox must be ordered 'west,south,east,north'")
+    return west, south, east, north
+
+
+def cluster_cell_size(zoom):
+    """Width in degrees of a cluster cell at the given zoom level."""
+    return 360.0 / (2 ** zoom) / CLUSTER_CELLS_PER_TILE
+
+
+class GridBuckets:
+    """Uniform lat/lon grid mapping cell -> list of items."""
+
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.cells = defaultdict(list)
+
+    def cell_for(self, lat, lon):
+        return (math.floor(lon / self.cell_size), math.floor(lat / self.cell_size))
+
+    def add(self, lat, lon, item):
+        self.cells[self.cell_for(lat, lon)].append(item)
+
+    def query(self, bbox):
+        """Yields the items of every cell overlapping the bbox.
+
+        Walks the cell range covered by the bbox, or the occupied cells if
+        that is smaller, so the cost is bounded by the visible area and never
+        exceeds the number of non-empty cells.
+        """
+        west, south, east, north = bbox
+        x0, y0 = self.cell_for(south, west)
+        x1, y1 = self.cell_for(north, east)
+
+        if (x1 - x0 + 1) * (y1 - y0 + 1) <= len(self.cells):
+            for x in range(x0, x1 + 1):
+                for y in range(y0, y1 + 1):
+                    items = self.cells.get((x, y))
+                    if items:
+                        yield from items
+        else:
+            for (x, y), items in self.cells.items():
+                if x0 <= x <= x1 and y0 <= y <= y1:
+                    yield from items
+
+
+class ClusterPyramid:
+    """Pre-aggregated grid clusters for every zoom level below max_zoom.
+
+    Each cluster carries its centroid and point count, the summed weight_field
+    if given, and a per-value breakdown of group_field if given. Clusters are
+    also kept per group value so a filtered map is just a different lookup.
+    """
+
+    def __init__(self, max_zoom=CLUSTER_MAX_ZOOM, weight_field=None, group_field=None):
+        self.max_zoom = max_zoom
+        self.weight_field = weight_field
+        self.group_field = group_field
+        # (zoom, group value or None) -> GridBuckets of cluster dicts
+        self.levels = {}
+        self._aggregates = defaultdict(lambda: {"count": 0, "weight": 0, "lat": 0.0, "lon": 0.0, "groups": defaultdict(int)})
+
+    def add(self, lat, lon, row):
+        weight = (row.get(self.weight_field) or 0) if self.weight_field else 0
+        group = row.get(self.group_field) if self.group_field else None
+        keys = ((None,), (group,)) if self.group_field else ((None,),)
+
+        for zoom in range(self.max_zoom):
+            size = cluster_cell_size(zoom)
+            cell = (math.floor(lon / size), math.floor(lat / size))
+            for key in keys:
+                agg = self._aggregates[(zoom,) + key + cell]
+                agg["count"] += 1
+                agg["weight"] += weight
+                agg["lat"] += lat
+                agg["lon"] += lon
+                agg["groups"][group] += 1
+
+    def build(self):
+        """Turns the running aggregates into the per-zoom cluster grids."""
+        for (zoom, group, _x, _y), agg in self._aggregates.items():
+            buckets = self.levels.get((zoom, group))
+            if buckets is None:
+                buckets = self.levels[(zoom, group)] = GridBuckets(cluster_cell_size(zoom))
+            lat = agg["lat"] / agg["count"]
+            lon = agg["lon"] / agg["count"]
+            cluster = {"coordinates": [round(lat, 6), round(lon, 6)], "count": agg["count"]}
+            if self.weight_field:
+                cluster[self.weight_field] = agg["weight"]
+            if self.group_field:
+                cluster[self.group_field + "s"] = dict(agg["groups"])
+            buckets.add(lat, lon, cluster)
+        self._aggregates.clear()
+        return self
+
+    def query(self, bbox, zoom, group=None):
+        """Returns the clusters at this zoom whose centroid lies inside the bbox."""
+        buckets = self.levels.get((max(zoom, 0), group))
+        if buckets is None:
+            return []
+        return [c for c in buckets.query(bbox) if in_bbox(c["coordinates"], bbox)]
+
+
+def in_bbox(coordinates, bbox):
+    lat, lon = coordinates
+    west, south, east, north = bbox
+    return south <= lat <= north and west <= lon <= east
+
+
+class CrimeIndex:
+    """Spatial index over crime_data_archive rows.
+
+    Raw points are bucketed on a fine grid and served with keyset pagination
+    on the row id. For low zoom levels, clusters are pre-aggregated once per
+    (zoom, crime_type) so the response size depends on the viewport only.
+    """
+
+    def __init__(self, rows):
+        self.points = GridBuckets(POINT_CELL_SIZE)
+        self.clusters = ClusterPyramid(CLUSTER_MAX_ZOOM, group_field="crime_type")
+        self.crime_types = defaultdict(int)
+
+        for row in rows:
+            coords = row.get("coordinates")
+            if not coords or len(coords) != 2:
+                continue
+            lat, lon = float(coords[0]), float(coords[1])
+
+            point = {
+                "id": row["id"],
+                "crime_type": row.get("crime_type"),
+                "location": row.get("location"),
+                "coordinates": [lat, lon],
+                "original_color": row.get("original_color"),
+            }
+            self.points.add(lat, lon, point)
+            self.clusters.add(lat, lon, point)
+            self.crime_types[point["crime_type"]] += 1
+
+        self.clusters.build()
+
+    def __len__(self):
+        return sum(self.crime_types.values())
+
+    def query(self, bbox, zoom, cursor: Optional[int] = None, limit=500, crime_type: Optional[str] = None):
+        """Returns clusters (low zoom) or one page of points inside the bbox."""
+        if zoom < self.clusters.max_zoom:
+            items = self.clusters.query(bbox, zoom, crime_type)
+            return {"mode": "clusters", "items": items, "next_cursor": None}
+
+        matches = []
+        for point in self.points.query(bbox):
+            if cursor is not None and point["id"] <= cursor:
+                continue
+            if crime_type is not None and point["crime_type"] != crime_type:
+                continue
+            if in_bbox(point["coordinates"], bbox):
+                matches.append(point)
+
+        matches.sort(key=lambda p: p["id"])
+        page = matches[:limit]
+        next_cursor = page[-1]["id"] if len(matches) > limit else None
+        return {"mode": "points", "items": page, "next_cursor": next_cursor}
+
+
+# Cemeteries are sparse, so the war dead map switches to single markers earlier
+WAR_DEAD_CLUSTER_MAX_ZOOM = 9
+
+
+class WarDeadIndex:
+    """Tile pyramid over war_dead_archive rows.
+
+    Map queries only ever see coordinates, names and counts; the bio_html
+    blobs are kept aside and served one cemetery at a time.
+    """
+
+    def __init__(self, rows):
+        self.points = GridBuckets(POINT_CELL_SIZE)
+        self.clusters = ClusterPyramid(WAR_DEAD_CLUSTER_MAX_ZOOM, weight_field="num_commemorated")
+        self.bios = {}
+
+        for row in rows:
+            coords = row.get("coordinates")
+            if not coords or len(coords) != 2:
+                continue
+            lat, lon = float(coords[0]), float(coords[1])
+
+            point = {
+                "id": row["id"],
+                "cemetery_name": row.get("cemetery_name"),
+                "coordinates": [lat, lon],
+                "num_commemorated": row.get("num_commemorated") or 0,
+            }
+            self.points.add(lat, lon, point)
+            self.clusters.add(lat, lon, point)
+            self.bios[row["id"]] = row.get("bio_html") or ""
+
+        self.clusters.build()
+
+    def __len__(self):
+        return len(self.bios)
+
+    def query(self, bbox, zoom):
+        """Returns clusters (low zoom) or every cemetery inside the bbox."""
+        if zoom < self.clusters.max_zoom:
+            return {"mode": "clusters", "items": self.clusters.query(bbox, zoom)}
+
+        items = [p for p in self.points.query(bbox) if in_bbox(p["coordinates"], bbox)]
+        items.sort(key=lambda p: p["id"])
+        return {"mode": "points", "items": items}
+
+    def bio(self, cemetery_id) -> Optional[str]:
+        return self.bios.get(cemetery_id)
@@ -0,0 +1,222 @@
+import abc
+import glob
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Optional
+
+from .metrics import db_call
+
+# Legacy read-modify-write JSON array, still read by the compatibility reader
+LEGACY_LOG_FILE = "backend/data/tarot_history.json"
+
+# Append-only JSON Lines log that replaces it
+LOG_FILE = "backend/data/tarot_history.jsonl"
+
+# The writer flushes after this many entries or this many milliseconds
+FLUSH_BATCH_SIZE = int(os.environ.get("TAROT_LOG_BATCH_SIZE", "50"))
+FLUSH_INTERVAL = int(os.environ.get("TAROT_LOG_FLUSH_MS", "500")) / 1000
+
+# The live file is rotated to .1, .2, ... once it grows past this size
+MAX_LOG_BYTES = 10 * 1024 * 1024
+MAX_ROTATED_FILES = 20
+
+
+class LogSink(abc.ABC):
+    """Destination for tarot log entries.
+
+    write() must be cheap and safe to call from request handlers; sinks that
+    do I/O hand entries to a background writer instead of doing it inline.
+    """
+
+    @abc.abstractmethod
+    def write(self, entry):
+        """Accepts one entry (a dict)."""
+
+    def close(self):
+        pass
+
+
+class BackgroundSink(LogSink):
+    """Queues entries and hands them to flush_batch() on a writer thread.
+
+    A batch is flushed once batch_size entries are waiting or flush_interval
+    seconds have passed since the first of them, whichever comes first.
+    close() drains the queue, so no accepted entry is dropped on shutdown.
+    """
+
+    def __init__(self, batch_size=FLUSH_BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue()
+        self._stop = object()
+        self.thread = threading.Thread(target=self._run, name=type(self).__name__, daemon=True)
+        self.thread.start()
+
+    def write(self, entry):
+        self.queue.put(entry)
+
+    def close(self):
+        self.queue.put(self._stop)
+        self.thread.join()
+
+    @abc.abstractmethod
+    def flush_batch(self, batch):
+        """Writes one batch of entries; runs on the writer thread."""
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self.queue.get()
+            if item is self._stop:
+                break
+            batch = [item]
+            # Wait briefly for more entries so one flush covers a burst of requests
+            deadline = time.monotonic() + self.flush_interval
+            try:
+                while len(batch) < self.batch_size:
+                    item = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                    if item is self._stop:
+                        stopping = True
+                        break
+                    batch.append(item)
+            except queue.Empty:
+                pass
+            self._flush(batch)
+
+        # Drain anything queued after the stop marker
+        rest = []
+        while not self.queue.empty():
+            item = self.queue.get_nowait()
+            if item is not self._stop:
+                rest.append(item)
+        if rest:
+            self._flush(rest)
+
+    def _flush(self, batch):
+        try:
+            self.flush_batch(batch)
+        except Exception as e:
+            print(f"Error flushing {len(batch)} tarot log entries: {e}")
+
+
+class JsonLinesSink(BackgroundSink):
+    """Append-only JSON Lines log with batched fsync and size-based rotation.
+
+    Each batch goes out as a single O_APPEND write, so lines from concurrent
+    writers never interleave, and the cost per entry doesn't depend on how
+    much history is already on disk.
+    """
+
+    def __init__(self, path=LOG_FILE, max_bytes=MAX_LOG_BYTES, max_files=MAX_ROTATED_FILES, **kwargs):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        super().__init__(**kwargs)
+
+    def flush_batch(self, batch):
+        data = "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in batch).encode("utf-8")
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, data)
+            os.fsync(fd)
+            size = os.fstat(fd).st_size
+        finally:
+            os.close(fd)
+
+        if size >= self.max_bytes:
+            self.rotate()
+
+    def rotate(self):
+        """Shifts path.N -> path.N+1 and moves the live file to path.1."""
+        oldest = f"{self.path}.{self.max_files}"
+        if os.path.exists(oldest):
+            os.remove(oldest)
+        for n in range(self.max_files - 1, 0, -1):
+            src = f"{self.path}.{n}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{n + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+
+class SupabaseSink(BackgroundSink):
+    """Batched inserts into a Supabase table from the writer thread.
+
+    One insert covers a whole batch, so request handlers never wait on the
+    network. Batches that fail to insert are handed to the fallback sink's
+    flush_batch() (e.g. the local JSON Lines log) rather than dropped.
+    """
+
+    def __init__(self, client, table_name, fallback: Optional[BackgroundSink] = None, **kwargs):
+        self.client = client
+        self.table_name = table_name
+        self.fallback = fallback
+        super().__init__(**kwargs)
+
+    def flush_batch(self, batch):
+        try:
+            with db_call(self.table_name, "supabase"):
+                self.client.table(self.table_name).insert(batch).execute()
+        except Exception as e:
+            if self.fallback is None:
+                raise
+            print(f"Error logging {len(batch)} entries to Supabase, writing locally: {e}")
+            self.fallback.flush_batch(batch)
+
+    def close(self):
+        super().close()
+        if self.fallback is not None:
+            self.fallback.close()
+
+
+def read_history(path=LOG_FILE, legacy_path=LEGACY_LOG_FILE):
+    """Returns every logged entry, oldest first.
+
+    Reads the legacy JSON array, then rotated files from oldest to newest,
+    then the live file. A torn final line (e.g. after a crash) is skipped.
+    """
+    history = []
+    if os.path.exists(legacy_path):
+        with open(legacy_path, "r") as f:
+            try:
+                history.extend(json.load(f))
+            except json.JSONDecodeError:
+                print(f"Skipping unreadable legacy log {legacy_path}")
+
+    rotated = []
+    for log_path in glob.glob(f"{glob.escape(path)}.*"):
+        suffix = log_path.rsplit(".", 1)[1]
+        if suffix.isdigit():
+            rotated.append((int(suffix), log_path))
+
+    # Higher suffixes are older
+    for log_path in [p for _n, p in sorted(rotated, reverse=True)] + [path]:
+        if not os.path.exists(log_path):
+            continue
+        with open(log_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    history.append(json.loads(line))
+                except json.JSONDecodeError:
+                    print(f"Skipping malformed line in {log_path}")
+    return history
+
+
+def export_json(output_file, path=LOG_FILE, legacy_path=LEGACY_LOG_FILE):
+    """Writes the whole history as a JSON array in the legacy format."""
+    history = read_history(path, legacy_path)
+    with open(output_file, "w") as f:
+        json.dump(history, f, indent=2)
+    print(f"Exported {len(history)} entries to {output_file}")
+
+
+if __name__ == "__main__":
+    # python -m backend.tarot_log [output.json]
+    export_json(sys.argv[1] if len(sys.argv) > 1 else "tarot_history_export.json")
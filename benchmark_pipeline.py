@@ -0,0 +1,355 @@
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from altair_extractor import extract_panels
+from crime_map_extractor import extract_crime_data
+from map_extractor import extract_map_data
+from organize_archive import analyze_text, calculate_file_hash, fix_double_text, is_noise
+
+# Benchmarks for the archive pipeline and extractor hot paths, on synthetic
+# inputs generated from a fixed seed so runs are comparable:
+#
+#   python benchmark_pipeline.py                       # run and print the tables
+#   python benchmark_pipeline.py --save baseline.json  # record a baseline
+#   python benchmark_pipeline.py --compare baseline.json
+#
+# --compare exits with status 1 if any case got slower (or used more memory)
+# than the baseline by more than --threshold.
+
+SEED = 1234
+
+# Inputs for each benchmark, smallest first; --quick runs the first two
+SCALES = {
+    "is_noise": [1_000, 10_000, 100_000],             # lines
+    "fix_double_text": [1_000, 10_000, 100_000],      # lines
+    "analyze_text": [10, 100, 1_000],                 # clippings
+    "calculate_file_hash": [1, 16, 64],               # MB
+    "extract_crime_data": [1_000, 10_000, 50_000],    # markers
+    "extract_map_data": [1_000, 10_000, 50_000],      # markers
+    "extract_panels": [10, 100, 1_000],               # panels
+}
+
+# Tracked timings are the median of this many runs
+DEFAULT_REPEAT = 5
+
+# Slowdown (or memory growth) against the baseline that counts as a regression
+DEFAULT_THRESHOLD = 1.25
+
+# Changes smaller than this many milliseconds are noise, whatever the ratio
+MIN_REGRESSION_MS = 2.0
+
+WORDS = (
+    "council plans new homes for the city centre after years of delay residents say "
+    "the scheme will bring jobs and investment but campaigners warn of traffic and "
+    "lost green space in the area a spokesman said the authority would consult widely "
+    "before any decision was made on the future of the site which has stood empty"
+).split()
+
+NOISE_LINES = [
+    "www.thesentinel.co.uk",
+    "By David Elks",
+    "Monday, March 4, 2019",
+    "12",
+    "Midlands Newspaper of the Year",
+    "Full story inside",
+    "w w w . t h e s e n t i n e l . c o . u k",
+]
+
+CRIME_TYPES = ["Anti-social behaviour", "Violence and sexual offences", "Burglary", "Vehicle crime", "Shoplifting", "Criminal damage and arson"]
+COLORS = ["#e31a1c", "#cab2d6", "#1f78b4", "#33a02c", "#ff7f00", "#6a3d9a"]
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+
+# --- Synthetic inputs ---
+
+def sentence(rng, low=6, high=18):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(low, high))).capitalize()
+
+
+def doubled(text):
+    """'THE CITY' -> 'TTHHEE CCIITTYY', the broken-font headline shape."""
+    return "".join(c if c.isspace() else c * 2 for c in text)
+
+
+def make_clipping(rng):
+    """Text shaped like one page extracted from a scanned clipping: masthead
+    and footer noise, a date, a headline (sometimes doubled), then paragraphs."""
+    lines = [rng.choice(NOISE_LINES), rng.choice(NOISE_LINES)]
+    lines.append(f"{rng.randint(1, 28)} {rng.choice(MONTHS)} {rng.randint(1995, 2023)}")
+    headline = sentence(rng, 5, 10).upper()
+    lines.append(doubled(headline) if rng.random() < 0.2 else headline)
+    for _ in range(rng.randint(8, 40)):
+        lines.append(sentence(rng) if rng.random() < 0.9 else rng.choice(NOISE_LINES))
+    lines.append(str(rng.randint(1, 64)))
+    return "\n".join(lines)
+
+
+def make_lines(rng, n):
+    """A mix of article lines, noise lines and doubled headlines."""
+    lines = []
+    for _ in range(n):
+        roll = rng.random()
+        if roll < 0.15:
+            lines.append(rng.choice(NOISE_LINES))
+        elif roll < 0.25:
+            lines.append(doubled(sentence(rng, 3, 8).upper()))
+        else:
+            lines.append(sentence(rng))
+    return lines
+
+
+def make_crime_html(rng, n, path):
+    """Folium-style map with n circles carrying inline bindPopup strings."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("<html><body><script>\nvar map_0 = L.map('map_0', {center: [52.7, -1.9], zoom: 13});\n")
+        for i in range(n):
+            color = rng.randrange(len(COLORS))
+            f.write(
+                f"    var circle_{i:08x} = L.circle(\n"
+                f"        [{rng.uniform(52.6, 52.9):.6f}, {rng.uniform(-2.1, -1.8):.6f}],\n"
+                f'        {{"bubblingMouseEvents": true, "color": "{COLORS[color]}", "fill": true, "radius": 10}}\n'
+                f"    ).addTo(map_0);\n"
+                f'    circle_{i:08x}.bindPopup("<h2>{CRIME_TYPES[color]}</h2><p>On or near {rng.choice(WORDS).title()} Street</p>");\n'
+            )
+        f.write("</script></body></html>\n")
+
+
+def make_war_dead_html(rng, n, path):
+    """Folium-style map with n circles whose popups are separate html blocks."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("<html><body><script>\nvar map_0 = L.map('map_0', {center: [50, 2], zoom: 5});\n")
+        for i in range(n):
+            names = "".join(f"<li>Pte. {rng.choice(WORDS).title()} {rng.choice(WORDS).title()}</li>" for _ in range(rng.randint(1, 12)))
+            f.write(
+                f"    var circle_{i:08x} = L.circle(\n"
+                f"        [{rng.uniform(35, 60):.6f}, {rng.uniform(-5, 40):.6f}],\n"
+                f'        {{"color": "#3388ff", "fillColor": "#ff0000", "radius": {rng.randint(100, 5000)}}}\n'
+                f"    ).addTo(map_0);\n"
+                f'    var popup_{i:08x} = L.popup({{"maxWidth": "100%"}});\n'
+                f"    var html_{i:08x} = $(`<div id=\"html_{i:08x}\" style=\"width: 100.0%;\"><h3>{rng.choice(WORDS).title()} Cemetery</h3>"
+                f"<p>There are {rng.randint(1, 900)} men commemorated here.</p><ul>{names}</ul></div>`)[0];\n"
+                f"    popup_{i:08x}.setContent(html_{i:08x});\n"
+                f"    circle_{i:08x}.bindPopup(popup_{i:08x});\n"
+            )
+        f.write("</script></body></html>\n")
+
+
+def make_altair_html(rng, n, path):
+    """Altair export with n panels nested in vconcat/hconcat, sharing a few datasets."""
+    datasets = {
+        f"data-{d}": [{"x": i, "y": rng.randint(0, 500), "label": rng.choice(WORDS)} for i in range(200)]
+        for d in range(4)
+    }
+    panels = [
+        {
+            "mark": {"type": rng.choice(["bar", "line", "point"])},
+            "encoding": {"x": {"field": "x", "type": "quantitative"}, "y": {"field": "y", "type": "quantitative"}},
+            "title": sentence(rng, 2, 5),
+            "data": {"name": f"data-{rng.randrange(len(datasets))}"},
+        }
+        for _ in range(n)
+    ]
+    # Rows of up to three panels side by side
+    rows = [{"hconcat": panels[i:i + 3]} for i in range(0, n, 3)]
+    spec = {"$schema": "https://vega.github.io/schema/vega-lite/v5.json", "vconcat": rows, "datasets": datasets}
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f'<html><body><div id="vis"></div><script>\n      var spec = {json.dumps(spec)};\n'
+                f'      var embedOpt = {{"mode": "vega-lite"}};\n      vegaEmbed("#vis", spec, embedOpt);\n</script></body></html>\n')
+
+
+def make_file(rng, megabytes, path):
+    with open(path, "wb") as f:
+        for _ in range(megabytes):
+            f.write(rng.randbytes(1024 * 1024))
+
+
+# --- Benchmarks ---
+# Each returns (items, fn): fn() is timed, items is what one run processes
+
+def bench_is_noise(rng, n, workdir):
+    lines = make_lines(rng, n)
+    return n, lambda: [is_noise(line) for line in lines]
+
+
+def bench_fix_double_text(rng, n, workdir):
+    lines = make_lines(rng, n)
+    return n, lambda: [fix_double_text(line) for line in lines]
+
+
+def bench_analyze_text(rng, n, workdir):
+    texts = [make_clipping(rng) for _ in range(n)]
+    return n, lambda: [analyze_text(text) for text in texts]
+
+
+def bench_calculate_file_hash(rng, megabytes, workdir):
+    path = os.path.join(workdir, f"blob_{megabytes}.bin")
+    make_file(rng, megabytes, path)
+    return megabytes, lambda: calculate_file_hash(path)
+
+
+def bench_extract_crime_data(rng, n, workdir):
+    source = os.path.join(workdir, f"crime_{n}.html")
+    make_crime_html(rng, n, source)
+    output = os.path.join(workdir, f"crime_{n}.json")
+    return n, lambda: extract_crime_data(source, output)
+
+
+def bench_extract_map_data(rng, n, workdir):
+    source = os.path.join(workdir, f"war_dead_{n}.html")
+    make_war_dead_html(rng, n, source)
+    output = os.path.join(workdir, f"war_dead_{n}.json")
+    return n, lambda: extract_map_data(source, output)
+
+
+def bench_extract_panels(rng, n, workdir):
+    source = os.path.join(workdir, f"panels_{n}.html")
+    make_altair_html(rng, n, source)
+    output = os.path.join(workdir, f"panels_{n}.json")
+    data_dir = os.path.join(workdir, f"panels_{n}_data")
+    return n, lambda: extract_panels(source, output, data_dir, "/data")
+
+
+BENCHMARKS = {
+    "is_noise": bench_is_noise,
+    "fix_double_text": bench_fix_double_text,
+    "analyze_text": bench_analyze_text,
+    "calculate_file_hash": bench_calculate_file_hash,
+    "extract_crime_data": bench_extract_crime_data,
+    "extract_map_data": bench_extract_map_data,
+    "extract_panels": bench_extract_panels,
+}
+
+
+def measure(fn, repeat):
+    """Median and min wall time in ms, and peak traced memory in MB.
+
+    Memory is traced on a separate run, since tracemalloc slows Python code
+    down. The extractors' progress output is swallowed.
+    """
+    times = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        fn()  # warm-up: imports, regex compilation, OS file cache
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            times.append((time.perf_counter() - start) * 1000)
+
+        tracemalloc.start()
+        try:
+            fn()
+            _current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return statistics.median(times), min(times), peak / (1024 * 1024)
+
+
+def scaling_exponent(points):
+    """Least-squares slope of log(time) against log(input size): ~1 is linear."""
+    xs = [math.log(items) for items, ms in points if ms > 0]
+    ys = [math.log(ms) for items, ms in points if ms > 0]
+    if len(xs) < 2:
+        return None
+    mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+    spread = sum((x - mean_x) ** 2 for x in xs)
+    if not spread:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / spread
+
+
+def run(names, quick=False, repeat=DEFAULT_REPEAT):
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="bench_") as workdir:
+        for name in names:
+            cases = []
+            for scale in SCALES[name][:2] if quick else SCALES[name]:
+                rng = random.Random(f"{SEED}-{name}-{scale}")
+                items, fn = BENCHMARKS[name](rng, scale, workdir)
+                median_ms, min_ms, peak_mb = measure(fn, repeat)
+                cases.append({
+                    "scale": scale,
+                    "median_ms": round(median_ms, 3),
+                    "min_ms": round(min_ms, 3),
+                    "us_per_item": round(median_ms * 1000 / items, 3),
+                    "peak_mb": round(peak_mb, 3),
+                })
+            exponent = scaling_exponent([(c["scale"], c["median_ms"]) for c in cases])
+            results[name] = {"cases": cases, "scaling_exponent": round(exponent, 3) if exponent is not None else None}
+            print_benchmark(name, results[name])
+    return results
+
+
+def print_benchmark(name, result):
+    """Table of the cases, with a bar per case showing time per item (the scaling curve)."""
+    print(f"\n{name}  (time ~ n^{result['scaling_exponent']})")
+    print(f"  {'scale':>8}  {'median ms':>10}  {'us/item':>9}  {'peak MB':>8}")
+    widest = max(c["us_per_item"] for c in result["cases"]) or 1
+    for case in result["cases"]:
+        bar = "#" * max(1, round(30 * case["us_per_item"] / widest))
+        print(f"  {case['scale']:>8}  {case['median_ms']:>10.2f}  {case['us_per_item']:>9.3f}  {case['peak_mb']:>8.2f}  {bar}")
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """Lists the cases slower (or using more memory) than the baseline by more than threshold."""
+    regressions = []
+    for name, result in results.items():
+        previous = {c["scale"]: c for c in baseline.get("results", {}).get(name, {}).get("cases", [])}
+        for case in result["cases"]:
+            old = previous.get(case["scale"])
+            if old is None:
+                continue
+            if case["median_ms"] > old["median_ms"] * threshold and case["median_ms"] - old["median_ms"] > MIN_REGRESSION_MS:
+                regressions.append(f"{name} @ {case['scale']}: {old['median_ms']:.2f} -> {case['median_ms']:.2f} ms")
+            if case["peak_mb"] > old["peak_mb"] * threshold and case["peak_mb"] - old["peak_mb"] > 1:
+                regressions.append(f"{name} @ {case['scale']}: peak {old['peak_mb']:.2f} -> {case['peak_mb']:.2f} MB")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the archive pipeline and extractor hot paths on synthetic inputs.")
+    parser.add_argument("names", nargs="*", help=f"benchmarks to run (default: all): {', '.join(BENCHMARKS)}")
+    parser.add_argument("--quick", action="store_true", help="only the two smallest scales")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="timed runs per case")
+    parser.add_argument("--save", help="write the results as a JSON baseline")
+    parser.add_argument("--compare", help="baseline JSON to check for regressions")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="allowed slowdown ratio")
+    args = parser.parse_args()
+
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+
+    results = run(args.names or list(BENCHMARKS), args.quick, args.repeat)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "seed": SEED,
+                "repeat": args.repeat,
+                "results": results,
+            }, f, indent=2)
+        print(f"\nSaved baseline to {args.save}")
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n--- REGRESSIONS (> {args.threshold:.2f}x {args.compare}) ---")
+            for line in regressions:
+                print(line)
+            sys.exit(1)
+        print(f"\nNo regressions against {args.compare}.")
@@ -0,0 +1,125 @@
+import argparse
+import json
+import os
+import sqlite3
+import time
+import zlib
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from backend.cache import invalidate_tables
+from backend.search import INDEX_FILE, MARK_INTERVAL, SCHEMA, TOKEN_RE, encode_positions, tokenize
+from organize_archive import extract_pages_from_pdf, fix_double_text, run_tasks
+
+# Configuration
+ARTICLES_DIR = "frontend/public/articles"
+PORTFOLIO_FILE = "frontend/src/data/portfolio.json"
+
+# Stamped in the cache file so a running backend reloads the index
+INDEX_TABLE = "article_index"
+
+def load_portfolio(path=PORTFOLIO_FILE):
+    """Maps PDF filename -> portfolio entry, for titles and ids."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        items = json.load(f)
+    return {os.path.basename(item["pdf_path"]): item for item in items if item.get("pdf_path")}
+
+def extract_document(filepath):
+    """Worker task: page texts with doubled-letter headings repaired."""
+    pages = []
+    for page in extract_pages_from_pdf(filepath):
+        pages.append("\n".join(fix_double_text(line) for line in page.split("\n")))
+    return pages
+
+def index_document(conn, filename, stat, pages, portfolio):
+    """Replaces the rows for one PDF with freshly built ones."""
+    conn.execute("DELETE FROM postings WHERE doc_id IN (SELECT id FROM docs WHERE path = ?)", (filename,))
+    conn.execute("DELETE FROM docs WHERE path = ?", (filename,))
+
+    # Pages are joined with a separator that can't merge tokens across pages
+    text = "\n\f\n".join(pages)
+
+    # Positions run across pages; page_starts maps them back to page numbers
+    page_starts = []
+    length = 0
+    for page in pages:
+        page_starts.append(length)
+        length += len(tokenize(page))
+
+    positions = defaultdict(list)
+    token_marks = []
+    for position, match in enumerate(TOKEN_RE.finditer(text)):
+        if position % MARK_INTERVAL == 0:
+            token_marks.append(match.start())
+        positions[match.group().lower()].append(position)
+    item = portfolio.get(filename, {})
+    cursor = conn.execute(
+        "INSERT INTO docs (path, size, mtime_ns, title, pdf_path, portfolio_id, length, page_starts, token_marks, text) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            filename, stat.st_size, stat.st_mtime_ns,
+            item.get("title") or os.path.splitext(filename)[0].replace("_", " "),
+            item.get("pdf_path") or f"/articles/{filename}",
+            item.get("id"),
+            length, json.dumps(page_starts), json.dumps(token_marks), zlib.compress(text.encode("utf-8"), 9),
+        ),
+    )
+    doc_id = cursor.lastrowid
+    conn.executemany(
+        "INSERT INTO postings (term, doc_id, tf, positions) VALUES (?, ?, ?, ?)",
+        [(term, doc_id, len(p), encode_positions(p)) for term, p in positions.items()],
+    )
+
+def build_index(directory=ARTICLES_DIR, index_file=INDEX_FILE, workers=1, rebuild=False):
+    """Brings the index in line with the PDFs in directory, re-extracting only new or changed files."""
+    if not os.path.exists(directory):
+        print(f"Directory not found: {directory}")
+        return
+
+    start = time.perf_counter()
+    if rebuild and os.path.exists(index_file):
+        os.remove(index_file)
+    os.makedirs(os.path.dirname(index_file) or ".", exist_ok=True)
+    conn = sqlite3.connect(index_file)
+    for statement in SCHEMA:
+        conn.execute(statement)
+
+    indexed = {path: (size, mtime_ns) for path, size, mtime_ns in conn.execute("SELECT path, size, mtime_ns FROM docs")}
+    files = sorted(f for f in os.listdir(directory) if f.lower().endswith(".pdf"))
+    stats = {f: os.stat(os.path.join(directory, f)) for f in files}
+    changed = [f for f in files if indexed.get(f) != (stats[f].st_size, stats[f].st_mtime_ns)]
+    removed = [f for f in indexed if f not in stats]
+
+    portfolio = load_portfolio()
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 and len(changed) > 1 else None
+    try:
+        pages_list = run_tasks(pool, workers, extract_document, [os.path.join(directory, f) for f in changed])
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    with conn:
+        for filename, pages in zip(changed, pages_list):
+            index_document(conn, filename, stats[filename], pages, portfolio)
+        for filename in removed:
+            conn.execute("DELETE FROM postings WHERE doc_id IN (SELECT id FROM docs WHERE path = ?)", (filename,))
+            conn.execute("DELETE FROM docs WHERE path = ?", (filename,))
+    if changed or removed:
+        conn.execute("VACUUM")
+    conn.close()
+
+    print(f"Indexed {len(files)} PDFs in {time.perf_counter() - start:.1f}s: "
+          f"{len(changed)} new or changed, {len(removed)} removed, {len(files) - len(changed)} unchanged.")
+    if changed or removed:
+        invalidate_tables([INDEX_TABLE])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the full-text index behind /api/articles/search.")
+    parser.add_argument("directory", nargs="?", default=ARTICLES_DIR)
+    parser.add_argument("--index", default=INDEX_FILE)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processes for PDF text extraction")
+    parser.add_argument("--rebuild", action="store_true", help="discard the existing index first")
+    args = parser.parse_args()
+
+    build_index(args.directory, args.index, args.workers, args.rebuild)
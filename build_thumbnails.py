@@ -0,0 +1,129 @@
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+# From the archive dependency group: uv sync --group archive
+import pypdfium2 as pdfium
+from PIL import Image
+
+from organize_archive import calculate_file_hash, run_tasks
+
+# Configuration (paths are relative to frontend/, like organize_archive.py)
+PUBLIC_DIR = "public"
+THUMBNAILS_DIR = os.path.join(PUBLIC_DIR, "thumbnails")
+PORTFOLIO_FILE = "src/data/portfolio.json"
+
+# Widths rendered for each PDF; the grid's cards are at most ~400px wide,
+# so the largest covers 2x displays
+THUMBNAIL_WIDTHS = (200, 400, 800)
+DEFAULT_WIDTH = 400
+WEBP_QUALITY = 80
+
+def thumbnail_name(file_hash, width):
+    # Keyed by content, so unchanged PDFs are never re-rendered and a
+    # changed PDF gets new URLs that can be cached forever
+    return f"{file_hash[:20]}-{width}.webp"
+
+def render_thumbnails(pdf_file, file_hash, output_dir, widths=THUMBNAIL_WIDTHS):
+    """Worker task: renders page 1 once at the largest width and downscales it.
+
+    Returns {width: height}.
+    """
+    pdf = pdfium.PdfDocument(pdf_file)
+    try:
+        page = pdf[0]
+        scale = max(widths) / page.get_width()
+        image = page.render(scale=scale).to_pil().convert("RGB")
+    finally:
+        pdf.close()
+
+    heights = {}
+    for width in sorted(widths, reverse=True):
+        height = round(image.height * width / image.width)
+        resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+        resized.save(os.path.join(output_dir, thumbnail_name(file_hash, width)), "WEBP", quality=WEBP_QUALITY, method=6)
+        heights[width] = height
+    return heights
+
+def build_thumbnails(portfolio_file=PORTFOLIO_FILE, public_dir=PUBLIC_DIR, output_dir=THUMBNAILS_DIR, workers=1, prune=True):
+    with open(portfolio_file, "r") as f:
+        items = json.load(f)
+
+    os.makedirs(output_dir, exist_ok=True)
+    url_dir = "/" + os.path.relpath(output_dir, public_dir).replace(os.sep, "/")
+
+    # Hash each PDF once, even when several items point at it
+    hashes = {}
+    for item in items:
+        pdf_path = item.get("pdf_path")
+        if not pdf_path:
+            continue
+        pdf_file = os.path.join(public_dir, pdf_path.lstrip("/"))
+        if pdf_file not in hashes:
+            if not os.path.exists(pdf_file):
+                print(f"PDF not found: {pdf_file}")
+                hashes[pdf_file] = None
+                continue
+            hashes[pdf_file] = calculate_file_hash(pdf_file)
+
+    # Only render PDFs missing at least one size
+    todo = [
+        (pdf_file, file_hash) for pdf_file, file_hash in hashes.items()
+        if file_hash and not all(os.path.exists(os.path.join(output_dir, thumbnail_name(file_hash, w))) for w in THUMBNAIL_WIDTHS)
+    ]
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 and len(todo) > 1 else None
+    try:
+        rendered = run_tasks(pool, workers, render_thumbnails, [p for p, _h in todo], [h for _p, h in todo], [output_dir] * len(todo))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    heights = {h: sizes for (_p, h), sizes in zip(todo, rendered)}
+
+    used = set()
+    for item in items:
+        pdf_path = item.get("pdf_path")
+        file_hash = hashes.get(os.path.join(public_dir, pdf_path.lstrip("/"))) if pdf_path else None
+        if not file_hash:
+            item.pop("thumbnail", None)
+            continue
+
+        if file_hash in heights:
+            height = heights[file_hash][DEFAULT_WIDTH]
+        else:
+            # Already rendered on an earlier run; read the size back from the file
+            with Image.open(os.path.join(output_dir, thumbnail_name(file_hash, DEFAULT_WIDTH))) as image:
+                height = image.height
+
+        names = [thumbnail_name(file_hash, w) for w in THUMBNAIL_WIDTHS]
+        used.update(names)
+        item["thumbnail"] = {
+            "src": f"{url_dir}/{thumbnail_name(file_hash, DEFAULT_WIDTH)}",
+            "srcset": ", ".join(f"{url_dir}/{name} {w}w" for name, w in zip(names, THUMBNAIL_WIDTHS)),
+            "width": DEFAULT_WIDTH,
+            "height": height,
+        }
+
+    with open(portfolio_file, "w") as f:
+        json.dump(items, f, indent=2)
+
+    removed = 0
+    if prune:
+        for name in os.listdir(output_dir):
+            if name.endswith(".webp") and name not in used:
+                os.remove(os.path.join(output_dir, name))
+                removed += 1
+
+    print(f"Thumbnails: {len(todo)} PDFs rendered, {sum(1 for h in hashes.values() if h) - len(todo)} up to date, {removed} stale files removed.")
+    print(f"Updated {portfolio_file}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render WebP thumbnails of each portfolio PDF's first page.")
+    parser.add_argument("--portfolio", default=PORTFOLIO_FILE)
+    parser.add_argument("--public-dir", default=PUBLIC_DIR)
+    parser.add_argument("--output-dir", default=THUMBNAILS_DIR)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processes for rendering")
+    parser.add_argument("--no-prune", action="store_true", help="keep thumbnails no longer referenced")
+    args = parser.parse_args()
+
+    build_thumbnails(args.portfolio, args.public_dir, args.output_dir, args.workers, not args.no_prune)
@@ -0,0 +1,289 @@
+import base64
+import json
+import os
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:
+    pa = None
+
+# Output stage shared by the extractors (map_extractor.py,
+# crime_map_extractor.py, multi_chart_extractor.py), and the reader the
+# importers use for their source files.
+#
+# A columnar bundle is a JSON object:
+#   {"format": "columnar", "version": 2, "length": n, "columns": [...]}
+# where each column is one of
+#   {"name", "type": "dict", "values": [...], "codes": <array>}   low-cardinality strings
+#   {"name", "type": "number", "scale"?, "nulls"?, ...<array>}     numbers or fixed-size number lists
+#   {"name", "type": "json", "data": [...]}                        anything else, as plain JSON
+# and an <array> is {"dtype", "shape", "data": base64 of the little-endian values}.
+# Numbers are stored losslessly by default: as fixed-point int32 when every
+# value has few enough decimals, else float32 if exact, else float64. Missing
+# numbers are stored as 0 and listed in "nulls" (a uint32 array of row indices).
+
+FORMAT = "columnar"
+VERSION = 2
+
+# Bundles this reader understands; version 1 had no "nulls"
+READ_VERSIONS = (1, 2)
+
+# Strings that mean "no value" in otherwise numeric columns, e.g. the "*"
+# small-number suppression marker in the regions export
+NULL_MARKERS = ("*", "")
+
+# Strings become a dictionary column when at most this share of rows is distinct
+MAX_DICT_RATIO = 0.5
+
+# Most decimals tried for fixed-point columns (coordinates usually have 5-6)
+MAX_SCALE = 7
+
+INT32 = np.iinfo(np.int32)
+
+
+def write_json_array(records, output_file):
+    """Streams records to output_file, formatted exactly like json.dump(list, indent=2).
+
+    Returns the number of records written.
+    """
+    count = 0
+    with open(output_file, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write("[\n  " if count == 0 else ",\n  ")
+            f.write(json.dumps(record, indent=2).replace("\n", "\n  "))
+            count += 1
+        f.write("\n]" if count else "[]")
+    return count
+
+
+def is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def parse_number(value):
+    """value as an int or float if it is a string that round-trips exactly, else None.
+
+    "154" -> 154 and "363.39" -> 363.39, but "0154" or "1e3" stay strings.
+    """
+    if not isinstance(value, str):
+        return None
+    try:
+        number = int(value)
+    except ValueError:
+        try:
+            number = float(value)
+        except ValueError:
+            return None
+    return number if repr(number) == value else None
+
+
+def normalize(values):
+    """Numbers stored as strings (e.g. "154" from a pandas export) become
+    numbers, and NULL_MARKERS become None.
+
+    Only applied when every other non-null value in the column is numeric,
+    so genuine text columns are left alone.
+    """
+    converted = []
+    parsed = []
+    for i, value in enumerate(values):
+        if value is None or is_number(value):
+            converted.append(value)
+            continue
+        if value in NULL_MARKERS:
+            converted.append(None)
+            parsed.append(i)
+            continue
+        number = parse_number(value)
+        if number is None:
+            return values
+        converted.append(number)
+        parsed.append(i)
+    # "400" next to "363.39" is a float column, not a mix of ints and floats
+    if any(isinstance(converted[i], float) for i in parsed):
+        for i in parsed:
+            if converted[i] is not None:
+                converted[i] = float(converted[i])
+    if parsed and all(v is None for v in converted):
+        # Nothing but markers: not evidence of a numeric column
+        return values
+    return converted if parsed else values
+
+
+def encode_array(array):
+    array = np.ascontiguousarray(array, dtype=array.dtype.newbyteorder("<"))
+    return {
+        "dtype": array.dtype.name,
+        "shape": list(array.shape),
+        "data": base64.b64encode(array.tobytes()).decode("ascii"),
+    }
+
+
+def decode_array(encoded):
+    data = base64.b64decode(encoded["data"])
+    return np.frombuffer(data, dtype=np.dtype(encoded["dtype"]).newbyteorder("<")).reshape(encoded["shape"])
+
+
+def number_column(values, float32=False):
+    """Encodes a list of numbers (or equal-length number lists) as a typed array.
+
+    With float32, floats are always stored as float32, accepting the loss of
+    precision (about 1 m for coordinates) for the smallest bundle.
+    """
+    array = np.array(values)
+    if array.dtype.kind in "iu":
+        if array.size == 0 or (array.min() >= INT32.min and array.max() <= INT32.max):
+            return {"type": "number", **encode_array(array.astype(np.int32))}
+        return {"type": "number", **encode_array(array.astype(np.int64))}
+
+    array = array.astype(np.float64)
+    if float32:
+        return {"type": "number", **encode_array(array.astype(np.float32))}
+    if np.isfinite(array).all():
+        for scale in range(MAX_SCALE + 1):
+            scaled = np.round(array * 10 ** scale)
+            if np.abs(scaled).max(initial=0) > INT32.max:
+                break
+            # Division is correctly rounded, so this is exactly what float(text) gave
+            if np.array_equal(scaled / 10 ** scale, array):
+                return {"type": "number", "scale": scale, **encode_array(scaled.astype(np.int32))}
+    single = array.astype(np.float32)
+    if np.array_equal(single.astype(np.float64), array, equal_nan=True):
+        return {"type": "number", **encode_array(single)}
+    return {"type": "number", **encode_array(array)}
+
+
+def encode_column(name, values, float32=False):
+    values = normalize(values)
+
+    present = [v for v in values if v is not None]
+    if present and all(is_number(v) for v in present) and len({type(v) for v in present}) == 1:
+        if len(present) == len(values):
+            return {"name": name, **number_column(values, float32)}
+        nulls = [i for i, v in enumerate(values) if v is None]
+        filled = [type(present[0])(0) if v is None else v for v in values]
+        return {"name": name, **number_column(filled, float32), "nulls": encode_array(np.array(nulls, dtype=np.uint32))}
+
+    # Fixed-size number lists, e.g. [lat, lon]
+    if values and all(isinstance(v, list) and v and all(is_number(x) for x in v) for v in values):
+        width = len(values[0])
+        kinds = {type(x) for v in values for x in v}
+        if all(len(v) == width for v in values) and len(kinds) == 1:
+            return {"name": name, **number_column(values, float32)}
+
+    if values and all(isinstance(v, str) for v in values):
+        index = {}
+        codes = [index.setdefault(v, len(index)) for v in values]
+        if len(index) <= max(1, len(values) * MAX_DICT_RATIO):
+            dtype = np.uint8 if len(index) <= 0x100 else np.uint16 if len(index) <= 0x10000 else np.uint32
+            return {"name": name, "type": "dict", "values": list(index), "codes": encode_array(np.array(codes, dtype=dtype))}
+
+    return {"name": name, "type": "json", "data": values}
+
+
+def encode_columns(records, float32=False):
+    """Turns a list of dicts into a columnar bundle (see the top of this file)."""
+    names = {}
+    for record in records:
+        for key in record:
+            names.setdefault(key, None)
+    columns = [
+        encode_column(name, [record.get(name) for record in records], float32)
+        for name in names
+    ]
+    return {"format": FORMAT, "version": VERSION, "length": len(records), "columns": columns}
+
+
+def decode_column(column):
+    if column["type"] == "json":
+        return column["data"]
+    if column["type"] == "dict":
+        values = column["values"]
+        return [values[code] for code in decode_array(column["codes"]).tolist()]
+    array = decode_array(column)
+    if "scale" in column:
+        array = array / 10 ** column["scale"]
+    values = array.tolist()
+    if "nulls" in column:
+        for i in decode_array(column["nulls"]).tolist():
+            values[i] = None
+    return values
+
+
+def decode_columns(bundle):
+    """The records a bundle was built from."""
+    if bundle.get("format") != FORMAT or bundle.get("version") not in READ_VERSIONS:
+        raise ValueError(f"Unsupported data format: {bundle.get('format')} v{bundle.get('version')}")
+    names = [column["name"] for column in bundle["columns"]]
+    data = [decode_column(column) for column in bundle["columns"]]
+    return [dict(zip(names, row)) for row in zip(*data)] if data else [{} for _ in range(bundle["length"])]
+
+
+def write_arrow(bundle, output_file):
+    """Writes the bundle as an Arrow IPC file (dictionary columns stay dictionary-encoded)."""
+    if pa is None:
+        print("pyarrow is not installed; skipping the Arrow sidecar.")
+        return False
+    arrays, names = [], []
+    for column in bundle["columns"]:
+        names.append(column["name"])
+        if column["type"] == "dict":
+            arrays.append(pa.DictionaryArray.from_arrays(decode_array(column["codes"]), column["values"]))
+        elif column["type"] == "number":
+            array = decode_array(column)
+            if "scale" in column:
+                array = array / 10 ** column["scale"]
+            if array.ndim == 2:
+                arrays.append(pa.FixedSizeListArray.from_arrays(pa.array(array.reshape(-1)), array.shape[1]))
+            elif "nulls" in column:
+                mask = np.zeros(len(array), dtype=bool)
+                mask[decode_array(column["nulls"])] = True
+                arrays.append(pa.array(array, mask=mask))
+            else:
+                arrays.append(pa.array(array))
+        else:
+            # Mixed or nested values have no single Arrow type; keep them as JSON text
+            data = column["data"]
+            if all(v is None or isinstance(v, str) for v in data):
+                arrays.append(pa.array(data, type=pa.string()))
+            else:
+                arrays.append(pa.array([json.dumps(v) for v in data], type=pa.string()))
+    table = pa.Table.from_arrays(arrays, names=names)
+    with pa.OSFile(output_file, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    return True
+
+
+def write_records(records, output_file, fmt=FORMAT, float32=False, arrow=False):
+    """Writes records as a columnar bundle (default) or as indented JSON rows ("rows").
+
+    With arrow, an Arrow IPC copy is written next to output_file. Returns
+    the number of records written.
+    """
+    os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+    if fmt == "rows" and not arrow:
+        return write_json_array(records, output_file)
+
+    records = list(records)
+    bundle = encode_columns(records, float32)
+    if fmt == "rows":
+        write_json_array(records, output_file)
+    else:
+        with open(output_file, "w", encoding="utf-8") as f:
+            json.dump(bundle, f, separators=(",", ":"), ensure_ascii=False)
+    if arrow and write_arrow(bundle, os.path.splitext(output_file)[0] + ".arrow"):
+        print(f"Saved Arrow copy to {os.path.splitext(output_file)[0]}.arrow")
+    return len(records)
+
+
+def read_records(path):
+    """Loads a data file written by either format as a list of dicts."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict) and data.get("format") == FORMAT:
+        return decode_columns(data)
+    return data
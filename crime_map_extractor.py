@@ -1,81 +1,48 @@
+import argparse
 import re
-import json
 import os
 
-def extract_crime_data(input_file, output_file):
-    print(f"Reading {input_file}...")
-    with open(input_file, 'r', encoding='utf-8') as f:
-        content = f.read()
-
-    # Regex to find circles
-    # var circle_1 = L.circle([52.768641, -1.954664], 100, {
-    #                       color: '#cab2d6',
-    #                       fillColor: '#cab2d6',
-    #                       fillOpacity: 0.6
-    #                       });
-    # circle_1.bindPopup("<h2>Violence and sexual offences</h2><p>On or near Pump Lane</p>");
-
-    # We need to capture:
-    # 1. Variable name (to link circle to popup)
-    # 2. Coordinates
-    # 3. Color (optional)
-    # 4. Popup content
-
-    # Pattern for circle definition
-    # Captures: var_name, lat, lon, color
-    circle_pattern = re.compile(r'var\s+(\w+)\s*=\s*L\.circle\(\s*\[([\d.-]+),\s*([\d.-]+)\],\s*\d+,\s*\{.*?color:\s*[\'"](#[\w\d]+)[\'"]', re.DOTALL)
-    
-    # Pattern for popup binding
-    # Captures: var_name, crime_type, location
-    popup_pattern = re.compile(r'(\w+)\.bindPopup\("<h2>(.*?)</h2><p>(.*?)</p>"\)', re.DOTALL)
-
-    circles = {}
-    
-    # Find all circles
-    for match in circle_pattern.finditer(content):
-        var_name = match.group(1)
-        lat = float(match.group(2))
-        lon = float(match.group(3))
-        color = match.group(4)
-        
-        circles[var_name] = {
-            "coordinates": [lat, lon],
-            "color": color
+from columnar import FORMAT, write_records
+from folium_parser import iter_circles
+
+# Popups look like:
+# circle_1.bindPopup("<h2>Violence and sexual offences</h2><p>On or near Pump Lane</p>");
+popup_pattern = re.compile(r'<h2>(.*?)</h2><p>(.*?)</p>', re.DOTALL)
+
+def iter_crimes(f):
+    """Yields one record per circle whose popup has a crime type and location."""
+    for circle in iter_circles(f):
+        match = popup_pattern.fullmatch(circle["popup"])
+        if not match or not circle["color"]:
+            continue
+        crime_type, location = match.groups()
+        yield {
+            "crime_type": crime_type,
+            "location": location,
+            "coordinates": circle["coordinates"],
+            "original_color": circle["color"]
         }
 
-    print(f"Found {len(circles)} circles.")
+def extract_crime_data(input_file, output_file, fmt=FORMAT, float32=False, arrow=False):
+    print(f"Reading {input_file}...")
 
-    results = []
-    
-    # Find all popups and link to circles
-    for match in popup_pattern.finditer(content):
-        var_name = match.group(1)
-        crime_type = match.group(2)
-        location = match.group(3)
-        
-        if var_name in circles:
-            circle_data = circles[var_name]
-            results.append({
-                "crime_type": crime_type,
-                "location": location,
-                "coordinates": circle_data["coordinates"],
-                "original_color": circle_data["color"]
-            })
+    # Circles and their popups are linked in a single streaming pass
+    with open(input_file, 'r', encoding='utf-8') as f:
+        count = write_records(iter_crimes(f), output_file, fmt, float32, arrow)
 
-    print(f"Extracted {len(results)} crime records.")
-    
-    # Ensure directory exists
-    os.makedirs(os.path.dirname(output_file), exist_ok=True)
-    
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(results, f, indent=2)
+    print(f"Extracted {count} crime records.")
     print(f"Saved to {output_file}")
 
 if __name__ == "__main__":
-    input_path = "crime_map.html"
-    output_path = "frontend/src/data/crime_data.json"
-    
-    if not os.path.exists(input_path):
-        print(f"Error: {input_path} not found.")
+    parser = argparse.ArgumentParser(description="Extract crime records from the Folium crime map.")
+    parser.add_argument("input", nargs="?", default="crime_map.html")
+    parser.add_argument("output", nargs="?", default="frontend/src/data/crime_data.json")
+    parser.add_argument("--format", choices=[FORMAT, "rows"], default=FORMAT, help="columnar bundle, or indented JSON rows")
+    parser.add_argument("--float32", action="store_true", help="store coordinates as float32 (smaller, ~1 m precision)")
+    parser.add_argument("--arrow", action="store_true", help="also write an Arrow IPC copy (needs pyarrow)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        print(f"Error: {args.input} not found.")
     else:
-        extract_crime_data(input_path, output_path)
+        extract_crime_data(args.input, args.output, args.format, args.float32, args.arrow)
@@ -155,6 +155,14 @@ def main():
     portfolio, next_id = parse_html_file(os.path.join(TEMPLATES_DIR, "portfolio.html"), "Portfolio", mapping, next_id)
     all_items.extend(portfolio)
 
+    # Keep thumbnails written by build_thumbnails.py for PDFs that are still listed
+    if os.path.exists(OUTPUT_FILE):
+        with open(OUTPUT_FILE, "r") as f:
+            thumbnails = {item.get("pdf_path"): item["thumbnail"] for item in json.load(f) if item.get("thumbnail")}
+        for item in all_items:
+            if item.get("pdf_path") in thumbnails:
+                item["thumbnail"] = thumbnails[item["pdf_path"]]
+
     # Ensure output dir exists
     os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
     
@@ -0,0 +1,132 @@
+import json
+import re
+
+# Shared single-pass reader for the Leaflet JS that Folium (and similar
+# generators) write into map HTML files. Used by map_extractor.py and
+# crime_map_extractor.py.
+
+CHUNK_SIZE = 1024 * 1024
+
+# A token whose end hasn't been found within this many characters is skipped
+MAX_TOKEN_SIZE = 16 * 1024 * 1024
+
+# Characters kept between chunks when no token starts in the tail, so a
+# token start split across two reads is still seen whole
+OVERLAP = 256
+
+# Where a token of interest may begin
+TOKEN_START = re.compile(r"\bvar\s+\w+\s*=\s*(?:L\.circle\(|\$\(`)|\b\w+\.(?:bindPopup|setContent)\(")
+
+# The complete tokens, matched at a start found above. Every alternative
+# ends in an explicit terminator and only uses negated character classes,
+# so a match can't be cut short by a chunk boundary and never backtracks.
+TOKEN = re.compile(
+    r"var\s+(?P<circle>\w+)\s*=\s*L\.circle\(\s*\[\s*(?P<lat>[-+\d.eE]+)\s*,\s*(?P<lon>[-+\d.eE]+)\s*\]"
+    r"\s*,\s*(?:[\d.]+\s*,\s*)?\{(?P<options>[^{}]*)\}"
+    r"|var\s+(?P<html>\w+)\s*=\s*\$\(`(?P<content>[^`]*)`\)\[0\]"
+    r"|(?P<set_popup>\w+)\.setContent\((?P<set_html>\w+)\)"
+    r"|(?P<bind_layer>\w+)\.bindPopup\((?P<bind_popup>\w+)\)"
+    r'|(?P<bind_string_layer>\w+)\.bindPopup\("(?P<bind_string>(?:[^"\\\n]|\\.)*)"'
+)
+
+COLOR = re.compile(r"""(?<!\w)["']?color["']?\s*:\s*["']([^"']*)["']""")
+
+
+def iter_tokens(f, chunk_size=CHUNK_SIZE):
+    """Yields TOKEN matches from a text file, reading it in chunks.
+
+    Memory stays at about one chunk plus the largest single token.
+    """
+    buffer = f.read(chunk_size)
+    eof = len(buffer) < chunk_size
+    pos = 0
+    while True:
+        start = TOKEN_START.search(buffer, pos)
+        if start is None:
+            if eof:
+                return
+            buffer = buffer[max(pos, len(buffer) - OVERLAP):]
+            pos = 0
+        else:
+            token = TOKEN.match(buffer, start.start())
+            if token is not None:
+                yield token
+                pos = token.end()
+                continue
+            if eof or len(buffer) - start.start() > MAX_TOKEN_SIZE:
+                # Not a token we understand (or malformed); move past it
+                pos = start.start() + 1
+                continue
+            # Probably cut off by the end of the chunk; read on and retry
+            buffer = buffer[start.start():]
+            pos = 0
+
+        chunk = f.read(chunk_size)
+        eof = len(chunk) < chunk_size
+        buffer += chunk
+
+
+def js_string(value):
+    """Unescapes the body of a double-quoted JS string literal."""
+    try:
+        return json.loads(f'"{value}"')
+    except ValueError:
+        return value
+
+
+def iter_circles(f, chunk_size=CHUNK_SIZE):
+    """Yields each L.circle with its popup content, resolved in one pass.
+
+    Handles both popup styles: circle.bindPopup("...") with an inline
+    string, and Folium's circle.bindPopup(popup) + popup.setContent(html)
+    with the content in a `var html = $(`...`)[0]` block. Records are
+    emitted as soon as their chain is complete and dropped from the
+    pending maps, so only markers still being defined are held in memory.
+
+    Record: {"id", "coordinates": [lat, lon], "color", "popup"}.
+    """
+    circles = {}       # circle id -> record, until its popup is known
+    htmls = {}         # html id -> content, until a popup takes it
+    popup_html = {}    # popup id -> content, until a circle binds it
+    waiting = {}       # popup id -> circle id, bound before its content was set
+
+    def emit(circle_id, content):
+        record = circles.pop(circle_id, None)
+        if record is not None:
+            record["popup"] = content
+        return record
+
+    for token in iter_tokens(f, chunk_size):
+        if token.group("circle"):
+            color = COLOR.search(token.group("options"))
+            circles[token.group("circle")] = {
+                "id": token.group("circle"),
+                "coordinates": [float(token.group("lat")), float(token.group("lon"))],
+                "color": color.group(1) if color else None,
+            }
+        elif token.group("html"):
+            htmls[token.group("html")] = token.group("content")
+        elif token.group("set_popup"):
+            content = htmls.pop(token.group("set_html"), None)
+            if content is None:
+                continue
+            popup_id = token.group("set_popup")
+            if popup_id in waiting:
+                record = emit(waiting.pop(popup_id), content)
+                if record:
+                    yield record
+            else:
+                popup_html[popup_id] = content
+        elif token.group("bind_layer"):
+            popup_id = token.group("bind_popup")
+            if popup_id in popup_html:
+                record = emit(token.group("bind_layer"), popup_html.pop(popup_id))
+                if record:
+                    yield record
+            else:
+                waiting[popup_id] = token.group("bind_layer")
+        else:
+            record = emit(token.group("bind_string_layer"), js_string(token.group("bind_string")))
+            if record:
+                yield record
+
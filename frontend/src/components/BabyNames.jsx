@@ -51,15 +51,16 @@ const BabyNames = () => {
                 const res = await fetch(`${baseUrl}/api/baby-names/trends?names=${namesParam}`);
                 if (res.ok) {
                     const data = await res.json();
-                    // Process data to add a display name with sex if needed
-                    // For now, just use name.
-                    // If we want to distinguish sex, we might need to handle that in the selection or post-processing.
-                    // The API returns all records for the name.
-                    // Let's create a "Label" field: "Name (Sex)"
-                    const processed = data.map(d => ({
-                        ...d,
-                        label: `${d.name} (${d.sex})`
-                    }));
+                    // The API returns one compact series per (name, sex);
+                    // expand it into rows for Vega with a "Name (Sex)" label
+                    const processed = data.flatMap(series => series.years.map((year, i) => ({
+                        name: series.name,
+                        sex: series.sex,
+                        year,
+                        count: series.counts[i],
+                        rank: series.ranks[i],
+                        label: `${series.name} (${series.sex})`
+                    })));
                     setChartData(processed);
                 }
             } catch (err) {
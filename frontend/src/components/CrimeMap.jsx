@@ -1,45 +1,92 @@
-import React, { useEffect, useState, useMemo } from 'react';
+import React, { useEffect, useState, useCallback, useRef } from 'react';
 import { MapContainer, TileLayer, CircleMarker, Popup } from 'react-leaflet';
 import 'leaflet/dist/leaflet.css';
 import { getApiBaseUrl } from '../utils/api';
+import ViewportWatcher from './ViewportWatcher';
+
+// Stop following cursors after this many pages to keep dense viewports responsive
+const MAX_PAGES = 10;
 
 const CrimeMap = () => {
-    const [crimeData, setCrimeData] = useState([]);
+    const [crimeData, setCrimeData] = useState({ mode: 'clusters', items: [] });
+    const [crimeTypes, setCrimeTypes] = useState(['All']);
     const [selectedCrime, setSelectedCrime] = useState('All');
+    const [viewport, setViewport] = useState(null);
+    const requestId = useRef(0);
 
     // Center based on the Folium map: [52.814172, -2.079479]
     const center = [52.814172, -2.079479];
     const zoom = 9;
 
+    const handleViewportChange = useCallback((bbox, zoomLevel) => {
+        setViewport({ bbox, zoom: zoomLevel });
+    }, []);
+
+    // Crime types for the selector come from the whole archive, not just the viewport
     useEffect(() => {
-        const fetchData = async () => {
+        const fetchTypes = async () => {
             try {
                 const baseUrl = getApiBaseUrl();
-                const response = await fetch(`${baseUrl}/api/crime/all`);
+                const response = await fetch(`${baseUrl}/api/crime/types`);
                 if (!response.ok) {
                     throw new Error('Network response was not ok');
                 }
                 const data = await response.json();
-                setCrimeData(data);
+                setCrimeTypes(['All', ...data.map(d => d.crime_type)]);
             } catch (error) {
-                console.error('Error fetching crime data:', error);
+                console.error('Error fetching crime types:', error);
             }
         };
 
-        fetchData();
+        fetchTypes();
     }, []);
 
-    // Extract unique crime types for the selector
-    const crimeTypes = useMemo(() => {
-        const types = new Set(crimeData.map(d => d.crime_type));
-        return ['All', ...Array.from(types).sort()];
-    }, [crimeData]);
+    // Fetch clusters or points for the visible area, following cursors for dense views
+    useEffect(() => {
+        if (!viewport) return;
+        const currentRequest = ++requestId.current;
+
+        const fetchData = async () => {
+            try {
+                const baseUrl = getApiBaseUrl();
+                const params = new URLSearchParams({ bbox: viewport.bbox, zoom: viewport.zoom });
+                if (selectedCrime !== 'All') {
+                    params.set('crime_type', selectedCrime);
+                }
+
+                let mode = 'clusters';
+                let items = [];
+                let cursor = null;
+                for (let page = 0; page < MAX_PAGES; page++) {
+                    if (cursor !== null) {
+                        params.set('cursor', cursor);
+                    }
+                    const response = await fetch(`${baseUrl}/api/crime?${params}`);
+                    if (!response.ok) {
+                        throw new Error('Network response was not ok');
+                    }
+                    const data = await response.json();
+                    mode = data.mode;
+                    items = items.concat(data.items);
+                    cursor = data.next_cursor;
+                    if (cursor === null || currentRequest !== requestId.current) break;
+                }
+
+                // Ignore responses for viewports the user has already left
+                if (currentRequest === requestId.current) {
+                    setCrimeData({ mode, items });
+                }
+            } catch (error) {
+                console.error('Error fetching crime data:', error);
+            }
+        };
+
+        fetchData();
+    }, [viewport, selectedCrime]);
 
-    // Filter data based on selection
-    const filteredData = useMemo(() => {
-        if (selectedCrime === 'All') return crimeData;
-        return crimeData.filter(d => d.crime_type === selectedCrime);
-    }, [crimeData, selectedCrime]);
+    const incidentCount = crimeData.mode === 'clusters'
+        ? crimeData.items.reduce((total, cluster) => total + cluster.count, 0)
+        : crimeData.items.length;
 
     return (
         <div className="w-full h-full min-h-[600px] bg-bg-base relative z-0 group">
@@ -60,7 +107,7 @@ const CrimeMap = () => {
                     ))}
                 </select>
                 <div className="mt-2 text-xs text-gray-500">
-                    Showing {filteredData.length} incidents
+                    Showing {incidentCount} incidents
                 </div>
             </div>
 
@@ -75,9 +122,33 @@ const CrimeMap = () => {
                     attribution='&copy; <a href="https://www.openstreetmap.org/copyright">OpenStreetMap</a> contributors'
                     url="https://{s}.basemaps.cartocdn.com/light_all/{z}/{x}/{y}{r}.png"
                 />
-                {filteredData.map((point, index) => (
+                <ViewportWatcher onChange={handleViewportChange} />
+                {crimeData.mode === 'clusters' ? crimeData.items.map((cluster) => (
+                    <CircleMarker
+                        key={`${cluster.coordinates[0]},${cluster.coordinates[1]}`}
+                        center={cluster.coordinates}
+                        pathOptions={{
+                            color: '#4A7C59',
+                            fillColor: '#4A7C59',
+                            fillOpacity: 0.5,
+                            weight: 1,
+                            radius: Math.min(30, 6 + Math.sqrt(cluster.count)) // Grow with cluster size
+                        }}
+                    >
+                        <Popup className="botanical-popup">
+                            <div className="font-sans text-sm leading-relaxed text-gray-800">
+                                <h3>{cluster.count} incidents</h3>
+                                {Object.entries(cluster.crime_types)
+                                    .sort((a, b) => b[1] - a[1])
+                                    .map(([type, count]) => (
+                                        <p key={type}>{type}: {count}</p>
+                                    ))}
+                            </div>
+                        </Popup>
+                    </CircleMarker>
+                )) : crimeData.items.map((point) => (
                     <CircleMarker
-                        key={index}
+                        key={point.id}
                         center={point.coordinates}
                         pathOptions={{
                             color: point.original_color,
@@ -1,7 +1,22 @@
 import React from 'react';
 import { VegaEmbed } from 'react-vega';
+import { loader } from 'vega';
 import panelsData from '../data/war_dead_panels.json';
 
+// Panels reference their datasets by URL (see altair_extractor.py) and
+// several panels share one file, so each URL is only fetched once
+const baseLoader = loader();
+const loaded = new Map();
+const sharedLoader = {
+    ...baseLoader,
+    load: (uri, options) => {
+        if (!loaded.has(uri)) {
+            loaded.set(uri, baseLoader.load(uri, options));
+        }
+        return loaded.get(uri);
+    },
+};
+
 const DataPanels = () => {
     return (
         <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-8 w-full">
@@ -14,7 +29,7 @@ const DataPanels = () => {
           `}
                 >
                     <div className="w-full h-full min-h-[300px]">
-                        <VegaEmbed spec={spec} className="w-full" />
+                        <VegaEmbed spec={spec} options={{ loader: sharedLoader }} className="w-full" />
                     </div>
                 </div>
             ))}
@@ -4,7 +4,31 @@ import { Document, Page, pdfjs } from 'react-pdf';
 // Set worker URL to load PDF.js worker from local public folder
 pdfjs.GlobalWorkerOptions.workerSrc = '/pdf.worker.min.mjs';
 
-const PdfThumbnail = ({ pdfPath, altTitle }) => {
+// Pre-rendered WebP thumbnails (see build_thumbnails.py) are used when
+// portfolio.json has them; otherwise page 1 is rendered with pdf.js
+const PdfThumbnail = ({ pdfPath, altTitle, thumbnail }) => {
+    if (thumbnail) {
+        return (
+            <div className="w-full h-full relative overflow-hidden bg-gray-100 flex items-center justify-center">
+                <img
+                    src={thumbnail.src}
+                    srcSet={thumbnail.srcset}
+                    sizes="(min-width: 1024px) 33vw, (min-width: 768px) 50vw, 100vw"
+                    width={thumbnail.width}
+                    height={thumbnail.height}
+                    alt={altTitle || ''}
+                    loading="lazy"
+                    decoding="async"
+                    className="w-full h-auto shadow-sm"
+                />
+            </div>
+        );
+    }
+
+    return <PdfRender pdfPath={pdfPath} />;
+};
+
+const PdfRender = ({ pdfPath }) => {
     const [numPages, setNumPages] = useState(null);
     const [pageNumber, setPageNumber] = useState(1);
     const [loading, setLoading] = useState(true);
@@ -55,7 +55,7 @@ const PortfolioGrid = () => {
                                 >
                                     {/* Thumbnail Container */}
                                     <div className="relative w-full overflow-hidden bg-gray-100 border-4 border-gray-700 shadow-sm group-hover:shadow-xl transition-all duration-300">
-                                        <PdfThumbnail pdfPath={article.pdf_path} />
+                                        <PdfThumbnail pdfPath={article.pdf_path} altTitle={article.title} thumbnail={article.thumbnail} />
 
                                         {/* Hover Overlay */}
                                         <div className="absolute inset-0 bg-brand-sage/0 group-hover:bg-brand-sage/10 transition-colors duration-300" />
@@ -3,54 +3,92 @@ import { VegaEmbed } from 'react-vega';
 import { getApiBaseUrl } from '../utils/api';
 import spec from '../data/regions_chart_spec.json';
 
+// The exported spec filtered by major region with a Vega dropdown over the
+// whole dataset; the dropdown is a React select here instead, and the server
+// only sends the selected major region's series
+const chartSpec = {
+    ...spec,
+    params: (spec.params || []).filter(p => !p.bind),
+    transform: (spec.transform || []).filter(t => !(t.filter && t.filter.param === 'RegionSelection')),
+};
+
 const RegionsChart = () => {
+    const [majorRegions, setMajorRegions] = useState([]);
+    const [majorRegion, setMajorRegion] = useState('');
     const [data, setData] = useState([]);
 
     useEffect(() => {
-        const fetchData = async () => {
+        const fetchMajorRegions = async () => {
             try {
                 const baseUrl = getApiBaseUrl();
-                const response = await fetch(`${baseUrl}/api/regions/time-series`);
-                if (!response.ok) throw new Error('Failed to fetch data');
+                const response = await fetch(`${baseUrl}/api/regions/rollups?by=major_region`);
+                if (!response.ok) throw new Error('Failed to fetch major regions');
                 const result = await response.json();
+                setMajorRegions(result.map(r => r.major_region));
+            } catch (error) {
+                console.error('Error fetching major regions:', error);
+            }
+        };
+        fetchMajorRegions();
+    }, []);
 
-                // Map keys to match spec expectations
-                // Spec uses: "region", "year", "adm_per_100_000_all", "Region" (for legend/filter?)
-                // Let's check the spec again or just map everything.
-                // The spec likely uses "region" (lowercase) and "Region" (Capitalized) for different things or just one.
-                // In the original HTML data: "region", "Region", "major_region", "adm_per_100_000_all"
-
-                const mappedData = result.map(d => ({
-                    ...d,
-                    adm_per_100_000_all: d.adm_per_100k,
-                    Region: d.major_region, // The dropdown likely filters by major region which was called "Region" in dataset
-                    region: d.region
-                }));
+    useEffect(() => {
+        const fetchData = async () => {
+            try {
+                const baseUrl = getApiBaseUrl();
+                const params = majorRegion ? `?major_region=${encodeURIComponent(majorRegion)}` : '';
+                const response = await fetch(`${baseUrl}/api/regions/series${params}`);
+                if (!response.ok) throw new Error('Failed to fetch data');
+                const series = await response.json();
 
-                setData(mappedData);
+                // One row per (region, year), with the field names the spec uses
+                const rows = [];
+                for (const s of series) {
+                    s.years.forEach((year, i) => {
+                        rows.push({
+                            region: s.region,
+                            Region: s.major_region,
+                            year,
+                            adm_per_100_000_all: s.adm_per_100k[i],
+                        });
+                    });
+                }
+                setData(rows);
             } catch (error) {
                 console.error('Error fetching regions data:', error);
             }
         };
         fetchData();
-    }, []);
+    }, [majorRegion]);
 
     const specWithData = {
-        ...spec,
+        ...chartSpec,
         data: { values: data }
     };
 
-    if (data.length === 0) {
-        return <div className="p-4">Loading data...</div>;
-    }
-
     return (
         <div className="w-full bg-white p-4 rounded-lg shadow-sm border border-brand-sage/20 overflow-hidden">
-            <VegaEmbed
-                spec={specWithData}
-                actions={false}
-                className="w-full"
-            />
+            <label className="text-sm text-brand-sage mr-2" htmlFor="major-region">Region</label>
+            <select
+                id="major-region"
+                value={majorRegion}
+                onChange={e => setMajorRegion(e.target.value)}
+                className="text-sm border border-brand-sage/30 rounded px-2 py-1 mb-4"
+            >
+                <option value="">All regions</option>
+                {majorRegions.map(r => (
+                    <option key={r} value={r}>{r}</option>
+                ))}
+            </select>
+            {data.length === 0 ? (
+                <div className="p-4">Loading data...</div>
+            ) : (
+                <VegaEmbed
+                    spec={specWithData}
+                    actions={false}
+                    className="w-full"
+                />
+            )}
             <div className="text-xs text-gray-400 mt-2">
                 Loaded {data.length} records.
             </div>
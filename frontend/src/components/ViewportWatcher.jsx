@@ -0,0 +1,17 @@
+import { useEffect } from 'react';
+import { useMapEvents } from 'react-leaflet';
+
+// Reports the visible bbox and zoom whenever the map settles
+const ViewportWatcher = ({ onChange }) => {
+    const map = useMapEvents({
+        moveend: () => onChange(map.getBounds().toBBoxString(), map.getZoom()),
+    });
+
+    useEffect(() => {
+        onChange(map.getBounds().toBBoxString(), map.getZoom());
+    }, [map, onChange]);
+
+    return null;
+};
+
+export default ViewportWatcher;
@@ -1,31 +1,62 @@
-import React, { useEffect, useState } from 'react';
+import React, { useEffect, useState, useCallback, useRef } from 'react';
 import { MapContainer, TileLayer, CircleMarker, Popup } from 'react-leaflet';
 import 'leaflet/dist/leaflet.css';
 import { getApiBaseUrl } from '../utils/api';
+import ViewportWatcher from './ViewportWatcher';
 
 const WarDeadMap = () => {
-  const [warDeadData, setWarDeadData] = useState([]);
+  const [warDeadData, setWarDeadData] = useState({ mode: 'clusters', items: [] });
+  const [bios, setBios] = useState({});
+  const [viewport, setViewport] = useState(null);
+  const requestId = useRef(0);
   // Center the map roughly on Europe/UK as a starting point
   const center = [50.5, 2.5];
   const zoom = 6;
 
+  const handleViewportChange = useCallback((bbox, zoomLevel) => {
+    setViewport({ bbox, zoom: zoomLevel });
+  }, []);
+
   useEffect(() => {
+    if (!viewport) return;
+    const currentRequest = ++requestId.current;
+
     const fetchData = async () => {
       try {
         const baseUrl = getApiBaseUrl();
-        const response = await fetch(`${baseUrl}/api/war-dead/all`);
+        const params = new URLSearchParams({ bbox: viewport.bbox, zoom: viewport.zoom });
+        const response = await fetch(`${baseUrl}/api/war-dead?${params}`);
         if (!response.ok) {
           throw new Error('Network response was not ok');
         }
         const data = await response.json();
-        setWarDeadData(data);
+        // Ignore responses for viewports the user has already left
+        if (currentRequest === requestId.current) {
+          setWarDeadData(data);
+        }
       } catch (error) {
         console.error('Error fetching war dead data:', error);
       }
     };
 
     fetchData();
-  }, []);
+  }, [viewport]);
+
+  // The bio HTML is only fetched once a cemetery popup is opened
+  const loadBio = useCallback(async (id) => {
+    if (bios[id] !== undefined) return;
+    try {
+      const baseUrl = getApiBaseUrl();
+      const response = await fetch(`${baseUrl}/api/war-dead/${id}/bio`);
+      if (!response.ok) {
+        throw new Error('Network response was not ok');
+      }
+      const data = await response.json();
+      setBios(prev => ({ ...prev, [id]: data.bio_html }));
+    } catch (error) {
+      console.error('Error fetching war dead bio:', error);
+    }
+  }, [bios]);
 
   return (
     <div className="w-full h-full min-h-[600px] bg-bg-base relative z-0">
@@ -40,9 +71,29 @@ const WarDeadMap = () => {
           attribution='&copy; <a href="https://www.openstreetmap.org/copyright">OpenStreetMap</a> contributors'
           url="https://{s}.basemaps.cartocdn.com/light_all/{z}/{x}/{y}{r}.png"
         />
-        {warDeadData.map((point, index) => (
+        <ViewportWatcher onChange={handleViewportChange} />
+        {warDeadData.mode === 'clusters' ? warDeadData.items.map((cluster) => (
+          <CircleMarker
+            key={`${cluster.coordinates[0]},${cluster.coordinates[1]}`}
+            center={cluster.coordinates}
+            pathOptions={{
+              color: '#FF3B30',
+              fillColor: '#FF3B30',
+              fillOpacity: 0.5,
+              weight: 1,
+              radius: Math.min(30, 5 + Math.sqrt(cluster.num_commemorated)) // Grow with men commemorated
+            }}
+          >
+            <Popup className="botanical-popup">
+              <div className="font-sans text-sm leading-relaxed text-gray-800">
+                <h3>{cluster.count} cemeteries</h3>
+                <p>There are {cluster.num_commemorated} men commemorated here. Zoom in for details.</p>
+              </div>
+            </Popup>
+          </CircleMarker>
+        )) : warDeadData.items.map((point) => (
           <CircleMarker
-            key={index}
+            key={point.id}
             center={point.coordinates}
             pathOptions={{
               color: '#FF3B30', // Bright red for warning/war dead
@@ -51,12 +102,20 @@ const WarDeadMap = () => {
               weight: 1,
               radius: 5
             }}
+            eventHandlers={{ popupopen: () => loadBio(point.id) }}
           >
             <Popup className="botanical-popup">
-              <div
-                className="font-sans text-sm leading-relaxed text-gray-800 max-h-64 overflow-y-auto"
-                dangerouslySetInnerHTML={{ __html: point.bio_html }}
-              />
+              {bios[point.id] !== undefined ? (
+                <div
+                  className="font-sans text-sm leading-relaxed text-gray-800 max-h-64 overflow-y-auto"
+                  dangerouslySetInnerHTML={{ __html: bios[point.id] }}
+                />
+              ) : (
+                <div className="font-sans text-sm leading-relaxed text-gray-800">
+                  <h3>{point.cemetery_name}</h3>
+                  <p>There are {point.num_commemorated} men commemorated here.</p>
+                </div>
+              )}
             </Popup>
           </CircleMarker>
         ))}
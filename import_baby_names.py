@@ -1,95 +1,145 @@
+import argparse
 import csv
 import os
-from supabase import create_client, Client
-from dotenv import load_dotenv
+import resource
+import sys
+import tempfile
+import time
 
-# Load environment variables
-load_dotenv()
+from import_engine import ImportCheckpoint, client_for, partition_of, sync_table
 
-url: str = os.environ.get("SUPABASE_URL")
-key: str = os.environ.get("SUPABASE_KEY")
+FILE_PATH = "Baby Names.csv"
+STATE_FILE = "baby_names_import_state.json"
 
-if not url or not key:
-    print("Error: SUPABASE_URL or SUPABASE_KEY not found.")
-    exit(1)
+BABY_NAMES = {
+    "table": "baby_names_archive",
+    "source": FILE_PATH,
+    "columns": {"name": "name", "sex": "sex", "year": "year", "count": "count", "rank": "rank"},
+    "natural_key": ["name", "sex", "year"],
+}
 
-supabase: Client = create_client(url, key)
+def peak_rss_mb():
+    """Peak resident set size of this process in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
 
-def import_baby_names():
-    file_path = "Baby Names.csv"
-    table_name = "baby_names_archive"
-    
-    print(f"Reading {file_path}...")
-    
-    # Dictionary to aggregate data: (name, sex, year) -> {count, rank}
-    data_map = {}
-    
+def partition_rows(file_path, spill_dir, partitions):
+    """Splits the CSV into partition files by import_key range (see
+    partition_of in import_engine.py).
+
+    Every row of a (name, sex, year) key lands in the same partition, so each
+    partition can be pivoted on its own whatever order the CSV is in, and
+    synced against just its own range of the table.
+    """
+    paths = [os.path.join(spill_dir, f"part_{i:03d}.csv") for i in range(partitions)]
+    files = [open(p, "w", newline="", encoding="utf-8") for p in paths]
+    writers = [csv.writer(f) for f in files]
+
+    count = 0
     try:
         with open(file_path, 'r', encoding='utf-8') as f:
             reader = csv.DictReader(f)
             # CSV Columns: ['', 'Name', 'Gender', 'Value', 'Year', 'Measure']
-            
-            count = 0
             for row in reader:
                 count += 1
                 if count % 100000 == 0:
-                    print(f"Processed {count} rows...")
-                
+                    print(f"Partitioned {count} rows...")
                 name = row['Name']
-                gender = row['Gender'] # 'boy' or 'girl'
-                year = int(row['Year'])
-                value = int(row['Value']) if row['Value'] else 0
-                measure = row['Measure'] # 'Count' or 'Rank'
-                
-                # Normalize sex
-                sex = 'M' if gender.lower() == 'boy' else 'F'
-                
-                key = (name, sex, year)
-                
-                if key not in data_map:
-                    data_map[key] = {'count': None, 'rank': None}
-                
-                if measure == 'Count':
-                    data_map[key]['count'] = value
-                elif measure == 'Rank':
-                    data_map[key]['rank'] = value
-
-        print(f"Aggregation complete. Found {len(data_map)} unique records.")
-        
-        # Prepare for bulk insert
-        records = []
-        for (name, sex, year), values in data_map.items():
-            records.append({
-                "name": name,
-                "sex": sex,
-                "year": year,
-                "count": values['count'],
-                "rank": values['rank']
-            })
-        
-        # Batch insert
-        batch_size = 1000
-        total_batches = (len(records) + batch_size - 1) // batch_size
-        
-        print(f"Starting upload of {len(records)} records in {total_batches} batches...")
-        
-        for i in range(0, len(records), batch_size):
-            batch = records[i:i+batch_size]
-            try:
-                supabase.table(table_name).insert(batch).execute()
-                if (i // batch_size) % 10 == 0:
-                    print(f"Uploaded batch {i//batch_size + 1}/{total_batches}")
-            except Exception as e:
-                print(f"Error uploading batch {i//batch_size + 1}: {e}")
-                # Optional: break or continue? Continue might result in partial data.
-                # For now, let's just print error.
-        
-        print("Upload complete.")
-
-    except FileNotFoundError:
+                key = {"name": name, "sex": normalize_sex(row['Gender']), "year": int(row['Year'])}
+                part = partition_of(BABY_NAMES, key, partitions)
+                writers[part].writerow((name, row['Gender'], row['Year'], row['Value'], row['Measure']))
+    finally:
+        for f in files:
+            f.close()
+
+    print(f"Partitioned {count} rows into {partitions} files.")
+    return paths
+
+def normalize_sex(gender):
+    # 'boy' or 'girl'
+    return 'M' if gender.lower() == 'boy' else 'F'
+
+def pivot_partition(path):
+    """Yields one record per (name, sex, year) with its Count and Rank."""
+    # Dictionary to aggregate data: (name, sex, year) -> {count, rank}
+    data_map = {}
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        for name, gender, year, value, measure in csv.reader(f):
+            sex = normalize_sex(gender)
+            key = (name, sex, int(year))
+
+            if key not in data_map:
+                data_map[key] = {'count': None, 'rank': None}
+
+            value = int(value) if value else 0
+            if measure == 'Count':
+                data_map[key]['count'] = value
+            elif measure == 'Rank':
+                data_map[key]['rank'] = value
+
+    for (name, sex, year), values in data_map.items():
+        yield {
+            "name": name,
+            "sex": sex,
+            "year": year,
+            "count": values['count'],
+            "rank": values['rank']
+        }
+
+def import_baby_names(file_path=FILE_PATH, workers=4, partitions=16, prune=False, dry_run=False, local=False, state_file=STATE_FILE, restart=False):
+    if not os.path.exists(file_path):
         print(f"Error: {file_path} not found.")
-    except Exception as e:
-        print(f"Error: {e}")
+        return
+
+    stat = os.stat(file_path)
+    fingerprint = {
+        "file": os.path.abspath(file_path),
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+        "partitions": partitions,
+        "prune": prune,
+    }
+    checkpoint = ImportCheckpoint(state_file, fingerprint, restart)
+    if checkpoint.committed:
+        print(f"Resuming: {len(checkpoint.committed)} of {partitions} partitions already synced.")
+
+    print(f"Reading {file_path}...")
+    start = time.perf_counter()
+
+    with tempfile.TemporaryDirectory(prefix="baby_names_") as spill_dir:
+        paths = partition_rows(file_path, spill_dir, partitions)
+
+        print(f"Syncing with {workers} workers...")
+        # Each partition only reads its own key range of the table. Finished
+        # partitions are checkpointed, and rows already imported with the same
+        # values are skipped, so a rerun after a failure only sends what is
+        # still missing
+        result = sync_table(
+            BABY_NAMES,
+            client=client_for(BABY_NAMES["table"], local),
+            workers=workers,
+            prune=prune,
+            dry_run=dry_run,
+            partitions=[pivot_partition(path) for path in paths],
+            checkpoint=checkpoint,
+        )
+
+    elapsed = time.perf_counter() - start
+    print(f"Finished in {elapsed:.1f}s, peak RSS {peak_rss_mb():.0f} MB.")
+    if not result["ok"]:
+        print(f"Some batches failed. Rerun to resume from {state_file}.")
 
 if __name__ == "__main__":
-    import_baby_names()
+    parser = argparse.ArgumentParser(description="Stream Baby Names.csv into baby_names_archive.")
+    parser.add_argument("--file", default=FILE_PATH)
+    parser.add_argument("--workers", type=int, default=4, help="concurrent upload workers")
+    parser.add_argument("--partitions", type=int, default=16, help="spill partitions; more means less memory")
+    parser.add_argument("--prune", action="store_true", help="delete rows no longer in the source")
+    parser.add_argument("--dry-run", action="store_true", help="report what would change without writing")
+    parser.add_argument("--local", action="store_true", help="import into the local SQLite database")
+    parser.add_argument("--state-file", default=STATE_FILE)
+    parser.add_argument("--restart", action="store_true", help="ignore any saved progress")
+    args = parser.parse_args()
+
+    import_baby_names(args.file, args.workers, args.partitions, args.prune, args.dry_run, args.local, args.state_file, args.restart)
@@ -0,0 +1,371 @@
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from supabase import create_client, Client
+from dotenv import load_dotenv
+
+from backend.cache import invalidate_tables
+from backend.local_db import SQLiteClient, use_local
+from columnar import read_records
+
+# Supabase/PostgREST caps a single select at 1000 rows
+FETCH_PAGE_SIZE = 1000
+
+# Stale keys deleted per request when pruning; they all go into one
+# PostgREST in.(...) filter in the URL, so keep it short
+PRUNE_CHUNK_SIZE = 100
+
+# Partitions split the import_key space by its first 8 hex digits
+KEY_PREFIX_DIGITS = 8
+
+# Adaptive batching: grow while batches are fast, shrink when slow or failing
+INITIAL_BATCH_SIZE = 500
+MIN_BATCH_SIZE = 50
+MAX_BATCH_SIZE = 5000
+TARGET_BATCH_SECONDS = 1.0
+
+def get_client() -> Client:
+    # Load environment variables
+    load_dotenv()
+
+    url: str = os.environ.get("SUPABASE_URL")
+    key: str = os.environ.get("SUPABASE_KEY")
+
+    if not url or not key:
+        print("Error: SUPABASE_URL or SUPABASE_KEY not found.")
+        exit(1)
+
+    return create_client(url, key)
+
+def client_for(table_name, local=False):
+    """The local SQLite database if requested or selected for this table
+    (see backend/local_db.py), otherwise Supabase."""
+    load_dotenv()
+    remote_available = bool(os.environ.get("SUPABASE_URL") and os.environ.get("SUPABASE_KEY"))
+    if local or use_local(table_name, remote_available):
+        return SQLiteClient()
+    return get_client()
+
+def clean_float(value):
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return None
+
+def clean_int(value):
+    """Integer coercion for counts; missing values become 0."""
+    if value is None or value == "":
+        return 0
+    return int(float(value))
+
+def digest(value):
+    return hashlib.sha256(json.dumps(value, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()[:32]
+
+def map_record(spec, item):
+    """The table columns of one source item (see build_records)."""
+    record = {}
+    for column, source in spec["columns"].items():
+        if isinstance(source, tuple):
+            source_key, coerce = source
+            record[column] = coerce(item.get(source_key))
+        else:
+            record[column] = item.get(source)
+    return record
+
+def natural_digest(spec, record):
+    return digest([record[k] for k in spec["natural_key"]])
+
+def build_records(spec, items):
+    """Maps source items to table records with import_key and row_hash.
+
+    spec["columns"] maps each table column to a source key, or to a
+    (source key, coercion) pair. import_key identifies the row by its
+    natural key; repeats of the same natural key in the source get an
+    occurrence suffix so they stay distinct. row_hash covers every column.
+    """
+    seen = {}
+    for item in items:
+        record = map_record(spec, item)
+
+        natural = natural_digest(spec, record)
+        occurrence = seen.get(natural, 0)
+        seen[natural] = occurrence + 1
+
+        record["import_key"] = natural if occurrence == 0 else f"{natural}#{occurrence}"
+        record["row_hash"] = digest(record)
+        yield record
+
+def partition_of(spec, item, partitions):
+    """Index of the import_key range (see key_range) that item's rows fall in.
+
+    Every occurrence of a natural key lands in the same partition.
+    """
+    natural = natural_digest(spec, map_record(spec, item))
+    return (int(natural[:KEY_PREFIX_DIGITS], 16) * partitions) >> (4 * KEY_PREFIX_DIGITS)
+
+def key_range(index, partitions):
+    """(lowest, end) import_key prefixes of a partition; end is None for the last one."""
+    bits = 4 * KEY_PREFIX_DIGITS
+    start = -(-(index << bits) // partitions)
+    end = -(-((index + 1) << bits) // partitions)
+    lo = f"{start:0{KEY_PREFIX_DIGITS}x}"
+    return lo, (f"{end:0{KEY_PREFIX_DIGITS}x}" if index + 1 < partitions else None)
+
+def fetch_existing_hashes(client, table_name, lo=None, hi=None):
+    """Returns {import_key: row_hash} for the rows with lo <= import_key < hi
+    (either bound optional), paging by import_key."""
+    existing = {}
+    last = None
+    while True:
+        query = client.table(table_name) \
+            .select("import_key,row_hash") \
+            .order("import_key") \
+            .limit(FETCH_PAGE_SIZE)
+        if last is not None:
+            query = query.gt("import_key", last)
+        elif lo is not None:
+            query = query.gte("import_key", lo)
+        if hi is not None:
+            query = query.lt("import_key", hi)
+        rows = query.execute().data
+        for row in rows:
+            existing[row["import_key"]] = row["row_hash"]
+        if len(rows) < FETCH_PAGE_SIZE:
+            return existing
+        last = rows[-1]["import_key"]
+
+class ImportCheckpoint:
+    """Finished partition numbers, persisted so a rerun resumes where it stopped.
+
+    The checkpoint is tied to a fingerprint of the source and the settings
+    that decide partition boundaries; if any of them change it starts afresh.
+    """
+
+    def __init__(self, path, fingerprint, restart=False):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.committed = set()
+
+        if not restart and os.path.exists(path):
+            with open(path, "r") as f:
+                saved = json.load(f)
+            if saved.get("fingerprint") == fingerprint:
+                self.committed = set(saved.get("committed", []))
+            else:
+                print(f"{path} is for a different file or settings; starting from scratch.")
+
+    def mark(self, number):
+        self.committed.add(number)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"fingerprint": self.fingerprint, "committed": sorted(self.committed)}, f)
+        os.replace(tmp_path, self.path)
+
+class AdaptiveBatcher:
+    """Batch size controller driven by observed upsert latency."""
+
+    def __init__(self, size=INITIAL_BATCH_SIZE):
+        self.size = size
+        self.lock = threading.Lock()
+
+    def observe(self, rows, seconds, ok=True):
+        with self.lock:
+            if not ok or seconds > TARGET_BATCH_SECONDS:
+                self.size = max(MIN_BATCH_SIZE, self.size // 2)
+            elif seconds < TARGET_BATCH_SECONDS / 2 and rows >= self.size:
+                self.size = min(MAX_BATCH_SIZE, self.size * 2)
+
+def upsert_batch(client, table_name, batch, batcher, retries=3):
+    """Upserts one batch with retries; after a failure an oversized batch is split
+    in half so smaller pieces can get through."""
+    for attempt in range(1, retries + 1):
+        start = time.perf_counter()
+        try:
+            client.table(table_name).upsert(batch, on_conflict="import_key").execute()
+            batcher.observe(len(batch), time.perf_counter() - start)
+            return
+        except Exception as e:
+            batcher.observe(len(batch), time.perf_counter() - start, ok=False)
+            if attempt == retries:
+                raise
+            print(f"Upsert of {len(batch)} rows into {table_name} failed (attempt {attempt}/{retries}): {e}")
+            time.sleep(2 ** attempt)
+            if len(batch) > batcher.size:
+                half = len(batch) // 2
+                upsert_batch(client, table_name, batch[:half], batcher, retries)
+                upsert_batch(client, table_name, batch[half:], batcher, retries)
+                return
+
+def upsert_changed(client, table_name, records, workers=1):
+    """Upserts records with adaptive batch sizes on `workers` threads.
+
+    Returns (upserted, failed) row counts.
+    """
+    batcher = AdaptiveBatcher()
+    counts = {"upserted": 0, "failed": 0}
+    lock = threading.Lock()
+    # Bound the number of batches held in memory while workers are busy
+    slots = threading.BoundedSemaphore(workers * 2)
+
+    def run(batch):
+        try:
+            upsert_batch(client, table_name, batch, batcher)
+            with lock:
+                counts["upserted"] += len(batch)
+        except Exception as e:
+            print(f"Error upserting {len(batch)} rows into {table_name}: {e}")
+            with lock:
+                counts["failed"] += len(batch)
+        finally:
+            slots.release()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        batch = []
+        for record in records:
+            batch.append(record)
+            if len(batch) >= batcher.size:
+                slots.acquire()
+                pool.submit(run, batch)
+                batch = []
+        if batch:
+            slots.acquire()
+            pool.submit(run, batch)
+
+    return counts["upserted"], counts["failed"]
+
+def load_source(spec):
+    # Either indented JSON rows or a columnar bundle (see columnar.py)
+    return read_records(spec["source"])
+
+def sync_partition(spec, client, items, lo=None, hi=None, workers=1, prune=False, dry_run=False):
+    """Syncs the rows with import_keys in [lo, hi) against items; returns counts."""
+    table_name = spec["table"]
+    existing = fetch_existing_hashes(client, table_name, lo, hi)
+
+    counts = {"unchanged": 0, "changed": 0, "upserted": 0, "failed": 0, "deleted": 0}
+    seen_keys = set()
+
+    def changed_records():
+        for record in build_records(spec, items):
+            if prune:
+                seen_keys.add(record["import_key"])
+            if existing.get(record["import_key"]) == record["row_hash"]:
+                counts["unchanged"] += 1
+                continue
+            counts["changed"] += 1
+            yield record
+
+    if dry_run:
+        for _record in changed_records():
+            pass
+    else:
+        counts["upserted"], counts["failed"] = upsert_changed(client, table_name, changed_records(), workers)
+
+    if prune:
+        stale = [k for k in existing if k not in seen_keys]
+        if stale and not dry_run:
+            for i in range(0, len(stale), PRUNE_CHUNK_SIZE):
+                client.table(table_name).delete().in_("import_key", stale[i:i + PRUNE_CHUNK_SIZE]).execute()
+        counts["deleted"] = len(stale)
+    return counts
+
+def sync_table(spec, items=None, client=None, workers=1, prune=False, dry_run=False, partitions=None, checkpoint=None):
+    """Brings spec["table"] in line with the source, touching only changed rows.
+
+    Rows whose row_hash already matches are skipped, so re-importing unchanged
+    data only costs one read of the keys and hashes. With prune, rows whose
+    import_key is no longer produced by the source are deleted. Returns the
+    row counts (unchanged, changed, upserted, failed, deleted) and "ok",
+    True if every changed row was written.
+
+    partitions replaces items for large sources: a list of item iterables,
+    the i-th holding exactly the items for which partition_of(spec, item,
+    len(partitions)) == i. They are synced one at a time against that key
+    range only, so memory is bounded by one partition. A checkpoint
+    (ImportCheckpoint) records finished partitions and a rerun skips them.
+    """
+    table_name = spec["table"]
+    if partitions is None:
+        if items is None:
+            if not os.path.exists(spec["source"]):
+                print(f"Error: {spec['source']} not found.")
+                return {"ok": False, "upserted": 0, "deleted": 0}
+            items = load_source(spec)
+        partitions = [items]
+    client = client or client_for(table_name)
+
+    start = time.perf_counter()
+    totals = {"unchanged": 0, "changed": 0, "upserted": 0, "failed": 0, "deleted": 0}
+    skipped = 0
+    ok = True
+    for number, part_items in enumerate(partitions):
+        if checkpoint is not None and number in checkpoint.committed:
+            skipped += 1
+            continue
+        lo, hi = key_range(number, len(partitions)) if len(partitions) > 1 else (None, None)
+        try:
+            counts = sync_partition(spec, client, part_items, lo, hi, workers, prune, dry_run)
+        except Exception as e:
+            print(f"Error syncing {table_name}: {e}")
+            print(f"Ensure table {table_name} exists with import_key and row_hash columns (see create_tables in backend/main.py).")
+            ok = False
+            break
+        for k, v in counts.items():
+            totals[k] += v
+        if checkpoint is not None and not dry_run and counts["failed"] == 0:
+            checkpoint.mark(number)
+
+        if len(partitions) > 1:
+            elapsed = time.perf_counter() - start
+            processed = totals["unchanged"] + totals["changed"]
+            print(f"{table_name}: partition {number + 1}/{len(partitions)} done, {processed} rows ({processed / max(elapsed, 1e-9):,.0f} rows/sec)")
+
+    elapsed = time.perf_counter() - start
+    rate = (totals["unchanged"] + totals["changed"]) / max(elapsed, 1e-9)
+    resumed = f", {skipped} partitions already done" if skipped else ""
+    if dry_run:
+        print(f"{table_name}: {totals['unchanged']} unchanged, would upsert {totals['changed']}, would delete {totals['deleted']}{resumed}")
+    else:
+        print(f"{table_name}: {totals['unchanged']} unchanged, upserted {totals['upserted']}, deleted {totals['deleted']}, failed {totals['failed']}{resumed} ({elapsed:.1f}s, {rate:,.0f} rows/sec)")
+
+    if not dry_run and (totals["upserted"] or totals["deleted"]):
+        invalidate_tables([table_name])
+    totals["ok"] = ok and totals["failed"] == 0
+    return totals
+
+def run_cli(specs, description=None):
+    """Command line entry point shared by the import_*.py scripts."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--workers", type=int, default=1, help="concurrent upsert workers")
+    parser.add_argument("--prune", action="store_true", help="delete rows no longer in the source")
+    parser.add_argument("--dry-run", action="store_true", help="report what would change without writing")
+    parser.add_argument("--local", action="store_true", help="import into the local SQLite database")
+    args = parser.parse_args()
+
+    changed = []
+    for spec in specs:
+        client = client_for(spec["table"], args.local)
+        result = sync_table(spec, client=client, workers=args.workers, prune=args.prune, dry_run=args.dry_run)
+        if result["upserted"] or result["deleted"]:
+            changed.append(spec["table"])
+
+    if changed and not args.dry_run:
+        refresh_snapshot(changed)
+
+def refresh_snapshot(tables):
+    """Rebuilds the backend's response snapshot entries for tables so the next
+    boot serves the new data."""
+    # Imported here: the backend app is only needed for this step
+    from backend.main import write_response_snapshot
+    try:
+        write_response_snapshot(tables=tables)
+    except Exception as e:
+        print(f"Error writing response snapshot: {e}")
@@ -1,27 +1,20 @@
-import re
+import argparse
 import json
-import os
+
+from columnar import FORMAT, write_records
+from vega_spec import first_dataset, read_specs
 
 def extract_spec(file_path):
     print(f"Reading {file_path}...")
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    # Regex to find the spec variable
-    # var spec = { ... };
-    match = re.search(r'var\s+spec\s*=\s*(\{.*?\});', content, re.DOTALL)
-    if match:
-        json_str = match.group(1)
-        try:
-            return json.loads(json_str)
-        except json.JSONDecodeError as e:
-            print(f"Error decoding JSON from {file_path}: {e}")
-            return None
-    else:
+    specs = read_specs(file_path)
+    if not specs:
         print(f"No spec found in {file_path}")
         return None
+    if len(specs) > 1:
+        print(f"Found {len(specs)} specs in {file_path}, using the first")
+    return specs[0]
 
-def process_charts():
+def process_charts(fmt=FORMAT, arrow=False):
     charts = [
         {
             "file": "line_charts_sexes.html",
@@ -49,20 +42,12 @@ def process_charts():
             continue
 
         # Extract Data
-        data = []
-        if "datasets" in spec:
-            # Usually datasets is a dict where keys are random strings "data-..."
-            # We take the first value found
-            for key, values in spec["datasets"].items():
-                data = values
-                break
-        elif "data" in spec and "values" in spec["data"]:
-            data = spec["data"]["values"]
+        # datasets is usually a dict keyed by random strings "data-..."; the
+        # first one holds the chart's rows
+        data = first_dataset(spec)
         
-        # Save Data
-        os.makedirs(os.path.dirname(chart["data_output"]), exist_ok=True)
-        with open(chart["data_output"], 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2)
+        # Save Data (numbers exported as strings are stored as numbers)
+        write_records(data, chart["data_output"], fmt, arrow=arrow)
         print(f"Saved data to {chart['data_output']} ({len(data)} records)")
 
         # Clean Spec (remove data)
@@ -81,4 +66,9 @@ def process_charts():
         print(f"Saved spec to {chart['spec_output']}")
 
 if __name__ == "__main__":
-    process_charts()
+    parser = argparse.ArgumentParser(description="Split the Altair chart exports into data and spec files.")
+    parser.add_argument("--format", choices=[FORMAT, "rows"], default=FORMAT, help="columnar bundle, or indented JSON rows for the data files")
+    parser.add_argument("--arrow", action="store_true", help="also write Arrow IPC copies of the data (needs pyarrow)")
+    args = parser.parse_args()
+
+    process_charts(args.format, args.arrow)
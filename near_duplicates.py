@@ -0,0 +1,155 @@
+import os
+import re
+import zlib
+
+import numpy as np
+
+# MinHash signature length, split into LSH bands of NUM_PERM // BANDS rows.
+# Two texts become candidates when any band matches, which happens with
+# probability 1 - (1 - s^rows)^bands for Jaccard similarity s: about 0.5 at
+# s = 0.42 and > 0.999 at s = 0.8, so real re-scans are almost never missed.
+NUM_PERM = 128
+BANDS = 32
+
+# Word shingle length
+SHINGLE_SIZE = 3
+
+# Default Jaccard similarity above which two clippings count as the same
+DEFAULT_THRESHOLD = 0.8
+
+# Largest prime below 2**32; with 32-bit shingle hashes a * x + b fits in uint64
+PRIME = 4294967291
+
+def shingles(text, size=SHINGLE_SIZE):
+    """Hashed word shingles of text, ignoring case, punctuation and layout."""
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < size:
+        return set()
+    return {zlib.crc32(" ".join(words[i:i + size]).encode("utf-8")) for i in range(len(words) - size + 1)}
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+class MinHashIndex:
+    """MinHash signatures bucketed by LSH band.
+
+    Only texts sharing a band bucket are ever compared, so finding
+    candidates stays roughly linear in the number of documents.
+    """
+
+    def __init__(self, num_perm=NUM_PERM, bands=BANDS, seed=1):
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, PRIME, num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, PRIME, num_perm, dtype=np.uint64)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.buckets = [{} for _ in range(bands)]
+        self.keys = []
+        self.shingle_sets = []
+
+    def signature(self, shingle_set):
+        x = np.fromiter(shingle_set, dtype=np.uint64, count=len(shingle_set))
+        return ((np.outer(x, self.a) + self.b) % PRIME).min(axis=0)
+
+    def add(self, key, text):
+        """Indexes text under key; texts too short to shingle are skipped."""
+        shingle_set = shingles(text)
+        if not shingle_set:
+            return
+        doc = len(self.keys)
+        self.keys.append(key)
+        self.shingle_sets.append(shingle_set)
+
+        signature = self.signature(shingle_set)
+        for band in range(self.bands):
+            bucket = signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            self.buckets[band].setdefault(bucket, []).append(doc)
+
+    def candidate_pairs(self):
+        pairs = set()
+        for buckets in self.buckets:
+            for docs in buckets.values():
+                for i, first in enumerate(docs):
+                    for second in docs[i + 1:]:
+                        pairs.add((first, second))
+        return pairs
+
+    def similar_pairs(self, threshold=DEFAULT_THRESHOLD):
+        """(doc, doc, similarity) for candidates whose exact Jaccard similarity reaches threshold."""
+        result = []
+        for first, second in sorted(self.candidate_pairs()):
+            similarity = jaccard(self.shingle_sets[first], self.shingle_sets[second])
+            if similarity >= threshold:
+                result.append((first, second, similarity))
+        return result
+
+def choose_keeper(keys, sizes):
+    """Index of the copy to keep.
+
+    Prefers a hand-edited copy (the '_edited' convention cleanup_archive.py
+    relies on), then the one with the most text extracted, then the first.
+    """
+    def score(i):
+        name = os.path.basename(str(keys[i]))
+        return ("_edited" in name, sizes[i], -i)
+    return max(range(len(keys)), key=score)
+
+def find_clusters(items, threshold=DEFAULT_THRESHOLD):
+    """Groups near-duplicate texts.
+
+    items is a list of (key, text) in a stable order. Returns clusters as
+    dicts with the keeper's key and the other members as (key, similarity to
+    the keeper), in input order. Every member is at least threshold similar
+    to its keeper itself: documents only connected through other members
+    (A ~ B ~ C but not A ~ C) are split into separate clusters.
+    """
+    index = MinHashIndex()
+    for key, text in items:
+        index.add(key, text)
+
+    # Union-find over the similar pairs gives the connected components
+    parent = list(range(len(index.keys)))
+
+    def find(doc):
+        while parent[doc] != doc:
+            parent[doc] = parent[parent[doc]]
+            doc = parent[doc]
+        return doc
+
+    for first, second, _similarity in index.similar_pairs(threshold):
+        parent[find(second)] = find(first)
+
+    groups = {}
+    for doc in range(len(index.keys)):
+        groups.setdefault(find(doc), []).append(doc)
+
+    clusters = []
+    for docs in groups.values():
+        # Within a component, take the best keeper and the members close
+        # enough to it, then repeat with whatever is left
+        while len(docs) >= 2:
+            keeper = docs[choose_keeper([index.keys[d] for d in docs], [len(index.shingle_sets[d]) for d in docs])]
+            duplicates = []
+            for d in docs:
+                if d == keeper:
+                    continue
+                similarity = jaccard(index.shingle_sets[keeper], index.shingle_sets[d])
+                if similarity >= threshold:
+                    duplicates.append((d, similarity))
+            if duplicates:
+                clusters.append({
+                    "keeper": index.keys[keeper],
+                    "duplicates": [(index.keys[d], similarity) for d, similarity in duplicates],
+                })
+            taken = {keeper, *(d for d, _similarity in duplicates)}
+            docs = [d for d in docs if d not in taken]
+    return clusters
+
+def print_report(clusters):
+    print(f"--- NEAR-DUPLICATES: {len(clusters)} clusters ---")
+    for cluster in clusters:
+        print(f"[KEEP] {os.path.basename(str(cluster['keeper']))}")
+        for key, similarity in cluster["duplicates"]:
+            print(f"       {similarity:.2f}  {os.path.basename(str(key))}")
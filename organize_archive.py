@@ -1,20 +1,29 @@
+import argparse
 import os
 import hashlib
+import mmap
 import shutil
 import re
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pypdf import PdfReader
 from datetime import datetime
 
+from archive_manifest import ANALYZER_VERSION, MANIFEST_FILE, ArchiveManifest
+from near_duplicates import DEFAULT_THRESHOLD, find_clusters, print_report
+
 # Configuration
 SOURCE_DIR = "public/articles"
 DUPLICATES_DIR = os.path.join(SOURCE_DIR, "_duplicates")
 
 def calculate_file_hash(filepath):
-    """Calculates the SHA-256 hash of a file."""
+    """Calculates the SHA-256 hash of a file, hashing it through a memory map."""
     sha256_hash = hashlib.sha256()
     with open(filepath, "rb") as f:
-        for byte_block in iter(lambda: f.read(4096), b""):
-            sha256_hash.update(byte_block)
+        # mmap can't map an empty file
+        if os.fstat(f.fileno()).st_size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                sha256_hash.update(mapped)
     return sha256_hash.hexdigest()
 
 def extract_text_from_pdf(filepath):
@@ -27,6 +36,15 @@ def extract_text_from_pdf(filepath):
         print(f"Error reading {filepath}: {e}")
     return ""
 
+def extract_pages_from_pdf(filepath):
+    """Extracts the text of every page of a PDF."""
+    try:
+        reader = PdfReader(filepath)
+        return [page.extract_text() or "" for page in reader.pages]
+    except Exception as e:
+        print(f"Error reading {filepath}: {e}")
+    return []
+
 def fix_double_text(text):
     """Fixes text that looks like 'TTHHEE QQUUIICCKK' -> 'THE QUICK'."""
     if len(text) < 10:
@@ -217,7 +235,33 @@ def analyze_text(text):
             
     return title, date_str
 
-def scan_and_organize(directory, dry_run=True):
+def extract_and_analyze(filepath, text=None):
+    """Worker task: the first-page text (unless already known) with its title and date."""
+    if text is None:
+        text = extract_text_from_pdf(filepath)
+    title, date = analyze_text(text)
+    return text, title, date
+
+def run_tasks(pool, workers, fn, *arg_lists):
+    """Maps fn over the argument lists in order, on the process pool if there is one."""
+    if pool is None or len(arg_lists[0]) < 2:
+        return list(map(fn, *arg_lists))
+    # A few chunks per worker keeps IPC low while still balancing uneven PDFs
+    chunksize = max(1, len(arg_lists[0]) // (workers * 4))
+    return list(pool.map(fn, *arg_lists, chunksize=chunksize))
+
+def plan_name(filename, title, date):
+    clean_title = clean_filename(title)
+    
+    if date:
+        return f"{date}_{clean_title}.pdf"
+    # Fallback if title found but no date, or just analyzed
+    if title != "Unknown_Title":
+        return f"{clean_title}.pdf"
+    base, ext = os.path.splitext(filename)
+    return f"{base}_analyzed{ext}"
+
+def scan_and_organize(directory, dry_run=True, manifest_file=MANIFEST_FILE, workers=1, near_threshold=None):
     print(f"Scanning {directory}...")
     print(f"Dry Run: {dry_run}\n")
 
@@ -227,41 +271,97 @@ def scan_and_organize(directory, dry_run=True):
 
     files = [f for f in os.listdir(directory) if f.lower().endswith('.pdf')]
     seen_hashes = {}
-    
-    # Plan storage
-    moves = [] # (src, dest, reason)
-
-    for filename in files:
-        filepath = os.path.join(directory, filename)
-        file_hash = calculate_file_hash(filepath)
-
-        if file_hash in seen_hashes:
-            # Duplicate found
-            original_file = seen_hashes[file_hash]
-            dest = os.path.join(DUPLICATES_DIR, filename)
-            moves.append((filepath, dest, f"Duplicate of {original_file}"))
-        else:
-            seen_hashes[file_hash] = filename
-            
-            # Analyze for rename
-            text = extract_text_from_pdf(filepath)
-            title, date = analyze_text(text)
-            
-            clean_title = clean_filename(title)
-            
-            if date:
-                new_filename = f"{date}_{clean_title}.pdf"
+
+    # Hashes, text and analysis from earlier runs, for files whose size and mtime haven't changed
+    manifest = ArchiveManifest(manifest_file)
+    stats = {"cached": 0, "hashed": 0, "parsed": 0}
+    start = time.perf_counter()
+
+    # Hashing, PDF parsing and analysis run on worker processes; every
+    # decision is made here, in listing order, so the plan matches a serial run
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        paths = [os.path.join(directory, f) for f in files]
+        stats_by_path = {p: os.stat(p) for p in paths}
+        entries = {p: manifest.lookup(p, stats_by_path[p]) for p in paths}
+
+        to_hash = [p for p in paths if not entries[p]]
+        hashes = {p: e["sha256"] for p, e in entries.items() if e}
+        hashes.update(zip(to_hash, run_tasks(pool, workers, calculate_file_hash, to_hash)))
+        stats["cached"] = len(paths) - len(to_hash)
+        stats["hashed"] = len(to_hash)
+
+        # First pass: the first file with each hash is the original
+        duplicate_moves = {}
+        originals = []
+        for filename, filepath in zip(files, paths):
+            file_hash = hashes[filepath]
+            if file_hash in seen_hashes:
+                # Duplicate found
+                original_file = seen_hashes[file_hash]
+                dest = os.path.join(DUPLICATES_DIR, filename)
+                duplicate_moves[filepath] = (filepath, dest, f"Duplicate of {original_file}")
+                if not entries[filepath]:
+                    manifest.store(filepath, stats_by_path[filepath], file_hash)
+            else:
+                seen_hashes[file_hash] = filename
+                originals.append((filename, filepath))
+
+        # Analyze originals, reusing cached text and analysis where possible
+        results = {}
+        to_analyze, known_text = [], []
+        for _filename, filepath in originals:
+            entry = entries[filepath]
+            if entry and entry["text"] is not None:
+                if entry["analyzer_version"] == ANALYZER_VERSION:
+                    results[filepath] = (entry["text"], entry["title"], entry["date"])
+                    continue
+                text = entry["text"]
             else:
-                # Fallback if title found but no date, or just analyzed
-                if title != "Unknown_Title":
-                    new_filename = f"{clean_title}.pdf"
-                else:
-                    base, ext = os.path.splitext(filename)
-                    new_filename = f"{base}_analyzed{ext}"
+                # Same bytes under another path (e.g. a copy) can reuse its text
+                text = manifest.text_for_hash(hashes[filepath])
+                if text is None:
+                    stats["parsed"] += 1
+            to_analyze.append(filepath)
+            known_text.append(text)
+
+        for filepath, result in zip(to_analyze, run_tasks(pool, workers, extract_and_analyze, to_analyze, known_text)):
+            text, title, date = result
+            manifest.store(filepath, stats_by_path[filepath], hashes[filepath], text, title, date)
+            results[filepath] = result
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    # Re-scans of the same clipping differ in bytes but not (much) in text
+    if near_threshold is not None:
+        clusters = find_clusters([(filepath, results[filepath][0]) for _filename, filepath in originals], near_threshold)
+        print_report(clusters)
+        print()
+        for cluster in clusters:
+            keeper = os.path.basename(cluster["keeper"])
+            for filepath, similarity in cluster["duplicates"]:
+                dest = os.path.join(DUPLICATES_DIR, os.path.basename(filepath))
+                duplicate_moves[filepath] = (filepath, dest, f"Near-duplicate of {keeper} (similarity {similarity:.2f})")
+
+    # Second pass: rename plan, in listing order
+    renames = {}
+    for filename, filepath in originals:
+        if filepath in duplicate_moves:
+            continue
+        _text, title, date = results[filepath]
+        new_filename = plan_name(filename, title, date)
+        if new_filename != filename:
+            dest = os.path.join(directory, new_filename)
+            renames[filepath] = (filepath, dest, f"Renaming based on content: Title='{title}', Date='{date}'")
 
-            if new_filename != filename:
-                dest = os.path.join(directory, new_filename)
-                moves.append((filepath, dest, f"Renaming based on content: Title='{title}', Date='{date}'"))
+    # Plan storage: (src, dest, reason), in listing order as a serial scan plans them
+    moves = [duplicate_moves.get(p) or renames[p] for p in paths if p in duplicate_moves or p in renames]
+
+    manifest.prune(directory, paths)
+    manifest.commit()
+    print(f"Scanned {len(files)} files in {time.perf_counter() - start:.1f}s with {workers} worker(s): "
+          f"{stats['cached']} from manifest, {stats['hashed']} hashed, {stats['parsed']} parsed.\n")
 
     # Execute or Print Plan
     import json
@@ -293,6 +393,7 @@ def scan_and_organize(directory, dry_run=True):
                         counter += 1
                 
                 shutil.move(src, dest)
+                manifest.move(src, dest)
                 print(f"Moved: {os.path.basename(src)} -> {os.path.basename(dest)}")
                 
                 # Store mapping (relative paths for portability)
@@ -307,6 +408,17 @@ def scan_and_organize(directory, dry_run=True):
             json.dump(mapping, f, indent=2)
         print(f"Mapping saved to {mapping_file}")
 
+    manifest.close()
+
 if __name__ == "__main__":
-    # Execute for real
-    scan_and_organize(SOURCE_DIR, dry_run=False)
+    parser = argparse.ArgumentParser(description="Deduplicate and rename archive PDFs by content.")
+    parser.add_argument("directory", nargs="?", default=SOURCE_DIR)
+    parser.add_argument("--dry-run", action="store_true", help="print the plan without moving anything")
+    parser.add_argument("--manifest", default=MANIFEST_FILE, help="SQLite cache of hashes and extracted text")
+    parser.add_argument("--near-duplicates", type=float, nargs="?", const=DEFAULT_THRESHOLD, default=None, metavar="THRESHOLD",
+                        help=f"also treat clippings with similar text as duplicates (Jaccard, default {DEFAULT_THRESHOLD})")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processes for hashing and PDF parsing; 1 runs serially")
+    args = parser.parse_args()
+
+    # Execute for real unless --dry-run
+    scan_and_organize(args.directory, dry_run=args.dry_run, manifest_file=args.manifest, workers=args.workers, near_threshold=args.near_duplicates)
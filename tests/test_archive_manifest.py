@@ -0,0 +1,63 @@
+import os
+import re
+
+import pytest
+
+pytest.importorskip("pypdf")
+
+from archive_manifest import ArchiveManifest
+from organize_archive import scan_and_organize
+
+
+def scan_counts(capsys):
+    out = capsys.readouterr().out
+    match = re.search(r"(\d+) from manifest, (\d+) hashed, (\d+) parsed", out)
+    return tuple(int(n) for n in match.groups()), out
+
+
+def test_manifest_rows_are_trusted_only_while_unchanged(tmp_path):
+    path = tmp_path / "a.pdf"
+    path.write_bytes(b"one")
+    manifest = ArchiveManifest(str(tmp_path / "manifest.sqlite"))
+    manifest.store(str(path), os.stat(path), "hash1", "text", "Title", "2020-01-01")
+    assert manifest.lookup(str(path), os.stat(path)) == {
+        "sha256": "hash1", "text": "text", "title": "Title", "date": "2020-01-01", "analyzer_version": 1,
+    }
+    assert manifest.text_for_hash("hash1") == "text"
+
+    path.write_bytes(b"changed")
+    assert manifest.lookup(str(path), os.stat(path)) is None
+
+    moved = tmp_path / "b.pdf"
+    path.rename(moved)
+    manifest.move(str(path), str(moved))
+    assert manifest.text_for_hash("hash1") == "text"
+    assert manifest.prune(str(tmp_path), []) == 1
+    assert manifest.text_for_hash("hash1") is None
+    manifest.close()
+
+
+def test_rescan_skips_unchanged_files(tmp_path, make_pdf, capsys):
+    articles = tmp_path / "articles"
+    manifest = str(tmp_path / "manifest.sqlite")
+    make_pdf(articles / "a.pdf", ["Council approves a new budget for the city centre", "12 March 2019"])
+    make_pdf(articles / "b.pdf", ["Local school celebrates record exam results this year", "1 June 2020"])
+    make_pdf(articles / "c.pdf", ["Football club unveils plans for a bigger stadium soon"])
+
+    scan_and_organize(str(articles), dry_run=True, manifest_file=manifest)
+    (cached, hashed, parsed), first = scan_counts(capsys)
+    assert (cached, hashed, parsed) == (0, 3, 3)
+    assert "a.pdf -> 2019-03-12_Council_approves_a_new_budget_for_the_city_centre_12_March_2019.pdf" in first
+
+    scan_and_organize(str(articles), dry_run=True, manifest_file=manifest)
+    (cached, hashed, parsed), second = scan_counts(capsys)
+    assert (cached, hashed, parsed) == (3, 0, 0)
+    assert second.split("--- DRY RUN PLAN ---")[1] == first.split("--- DRY RUN PLAN ---")[1]
+
+    # A changed file is hashed and parsed again; the others still come from the manifest
+    make_pdf(articles / "b.pdf", ["Hospital opens a new accident and emergency wing", "2 July 2021"])
+    os.utime(articles / "b.pdf", ns=(1, 1))
+    scan_and_organize(str(articles), dry_run=True, manifest_file=manifest)
+    (cached, hashed, parsed), third = scan_counts(capsys)
+    assert (cached, hashed, parsed) == (2, 1, 1)
+    assert "b.pdf -> 2021-07-02_Hospital_opens" in third
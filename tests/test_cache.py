@@ -0,0 +1,184 @@
+import gzip
+import threading
+import time
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from backend import cache
+from backend.cache import MIN_COMPRESS_SIZE, CacheEntry, ResponseCache, cache_key, choose_encoding, compress, etag_matches, invalidate_tables
+
+
+@pytest.mark.parametrize("accept, available, expected", [
+    (None, {"gzip": b""}, None),
+    ("gzip, deflate, br", {"gzip": b"", "br": b""}, "br"),
+    ("gzip, deflate, br", {"gzip": b""}, "gzip"),
+    ("gzip;q=1.0, br;q=0.5", {"gzip": b"", "br": b""}, "gzip"),
+    ("br;q=0, gzip;q=0", {"gzip": b"", "br": b""}, None),
+    ("*", {"gzip": b""}, "gzip"),
+    ("identity", {"gzip": b"", "br": b""}, None),
+    ("gzip;q=oops", {"gzip": b""}, None),
+])
+def test_choose_encoding(accept, available, expected):
+    assert choose_encoding(accept, available) == expected
+
+
+def test_compress_skips_small_bodies():
+    assert compress(b"x" * (MIN_COMPRESS_SIZE - 1)) == {}
+    body = b'{"a":1}' * 500
+    for best in (False, True):
+        variants = compress(body, best)
+        assert gzip.decompress(variants["gzip"]) == body
+        if cache.brotli is not None:
+            assert cache.brotli.decompress(variants["br"]) == body
+
+
+def test_etag_matches():
+    etags = ['"abc"', '"abc-gzip"']
+    assert etag_matches('"abc"', etags)
+    assert etag_matches('W/"abc-gzip"', etags)
+    assert etag_matches('"x", "abc"', etags)
+    assert etag_matches("*", etags)
+    assert not etag_matches('"abcd"', etags)
+
+
+def test_cache_key_uses_only_normalised_params():
+    assert cache_key("/api/x") == "/api/x"
+    assert cache_key("/api/x", {"max_points": None}) == "/api/x"
+    assert cache_key("/api/x", {"b": 2, "a": "North East"}) == "/api/x?a=North%20East&b=2"
+    assert cache_key("/api/x", {"regions": ["A", "B"]}) == "/api/x?regions=A%2CB"
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "STAMP_CHECK_INTERVAL", 0)
+    monkeypatch.delenv("API_BASE_URL", raising=False)
+    response_cache = ResponseCache(stamp_file=str(tmp_path / "stamps.json"))
+    calls = []
+
+    def produce(size):
+        calls.append(size)
+        return {"rows": [{"id": i, "name": f"row {i}"} for i in range(size)], "version": len(calls)}
+
+    app = FastAPI()
+
+    @app.get("/items")
+    def items(request: Request, size: int = 1):
+        return response_cache.respond(request, ["items_archive"], lambda: produce(size), {"size": size})
+
+    app.state.calls = calls
+    app.state.cache = response_cache
+    return app
+
+
+def test_cached_response_and_304(app):
+    client = TestClient(app)
+    first = client.get("/items", headers={"Accept-Encoding": "identity"})
+    assert first.status_code == 200
+    assert first.json()["version"] == 1
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"] == "public, no-cache"
+    assert first.headers["vary"] == "Accept-Encoding"
+
+    again = client.get("/items", headers={"Accept-Encoding": "identity", "If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["etag"] == etag
+
+    stale = client.get("/items", headers={"Accept-Encoding": "identity", "If-None-Match": '"other"'})
+    assert stale.status_code == 200
+    assert stale.json() == first.json()
+    # Every request after the first was served from the cache
+    assert app.state.calls == [1]
+
+
+def test_ignored_and_reordered_params_share_an_entry(app):
+    client = TestClient(app)
+    client.get("/items?size=2")
+    client.get("/items?size=02&_=12345")
+    client.get("/items?cachebust=1&size=2")
+    assert app.state.calls == [2]
+    assert list(app.state.cache.entries) == ["/items?size=2"]
+
+
+def test_compressed_variants_have_their_own_etag(app):
+    client = TestClient(app)
+    plain = client.get("/items?size=200", headers={"Accept-Encoding": "identity"})
+    zipped = client.get("/items?size=200", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in plain.headers
+    assert zipped.headers["content-encoding"] == "gzip"
+    assert zipped.json() == plain.json()
+    assert zipped.headers["etag"] != plain.headers["etag"]
+
+    revalidated = client.get("/items?size=200", headers={"Accept-Encoding": "gzip", "If-None-Match": zipped.headers["etag"]})
+    assert revalidated.status_code == 304
+    assert app.state.calls == [200]
+
+
+def test_stamp_file_invalidates_entries(app):
+    client = TestClient(app)
+    etag = client.get("/items").headers["etag"]
+    fired = []
+    app.state.cache.on_invalidate("items_archive", lambda: fired.append(True))
+
+    invalidate_tables(["other_archive"], app.state.cache.stamp_file)
+    assert client.get("/items", headers={"If-None-Match": etag}).status_code == 304
+    assert fired == []
+
+    invalidate_tables(["items_archive"], app.state.cache.stamp_file)
+    refreshed = client.get("/items", headers={"If-None-Match": etag})
+    assert refreshed.status_code == 200
+    assert refreshed.json()["version"] == 2
+    assert fired == [True]
+
+
+def test_entries_are_an_lru_bounded_by_size(tmp_path):
+    size = CacheEntry(b"x" * 100, [], 60).size
+    response_cache = ResponseCache(stamp_file=str(tmp_path / "stamps.json"), max_bytes=3 * size)
+    for key in "abc":
+        response_cache.get(key, ["t"], lambda: "x" * 98)
+    assert response_cache.lookup("a") is not None
+
+    response_cache.get("d", ["t"], lambda: "x" * 98)
+    # b was the least recently used once a was looked up again
+    assert list(response_cache.entries) == ["c", "a", "d"]
+    assert response_cache.size == 3 * size
+
+    response_cache.invalidate(["t"])
+    assert not response_cache.entries and response_cache.size == 0
+
+
+def test_expired_entries_are_dropped(tmp_path):
+    response_cache = ResponseCache(ttl=0.01, stamp_file=str(tmp_path / "stamps.json"))
+    response_cache.get("a", ["t"], lambda: [1])
+    time.sleep(0.02)
+    assert response_cache.lookup("a") is None
+    assert "a" not in response_cache.entries
+    assert response_cache.size == 0
+
+
+def test_concurrent_fills_share_one_producer_call(tmp_path):
+    response_cache = ResponseCache(stamp_file=str(tmp_path / "stamps.json"))
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def producer():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return [1]
+
+    threads = [threading.Thread(target=response_cache.fill, args=("a", ["t"], producer)) for _ in range(4)]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert calls == [1]
+    # Fill locks only live while a fill is running
+    assert response_cache.fill_locks == {}
@@ -0,0 +1,81 @@
+import json
+
+import pytest
+
+from columnar import decode_columns, encode_columns, normalize, parse_number, read_records, write_records
+
+
+def round_trip(records, float32=False):
+    # Through JSON, as the bundle is stored
+    return decode_columns(json.loads(json.dumps(encode_columns(records, float32))))
+
+
+def test_round_trip_column_types():
+    records = [
+        {"region": "North", "year": 2001, "rate": 363.39, "coordinates": [51.123456, -0.987654], "extra": {"a": 1}},
+        {"region": "North", "year": 2002, "rate": 12.5, "coordinates": [52.0, -1.5], "extra": None},
+        {"region": "South", "year": 2003, "rate": 0.1, "coordinates": [53.25, 0.75], "extra": [1, 2]},
+        {"region": "North", "year": 2004, "rate": 7.0, "coordinates": [54.5, 1.0], "extra": "x"},
+    ]
+    bundle = encode_columns(records)
+    types = {column["name"]: column["type"] for column in bundle["columns"]}
+    assert types == {"region": "dict", "year": "number", "rate": "number", "coordinates": "number", "extra": "json"}
+    assert round_trip(records) == records
+
+
+def test_round_trip_large_and_inexact_numbers():
+    records = [{"big": 2 ** 40, "third": 1 / 3}, {"big": -(2 ** 40), "third": 2 / 3}]
+    assert round_trip(records) == records
+
+
+def test_float32_is_close_not_exact():
+    records = [{"lat": 51.123456789}, {"lat": -0.000123456789}]
+    decoded = round_trip(records, float32=True)
+    assert decoded[0]["lat"] == pytest.approx(51.123456789, abs=1e-5)
+
+
+def test_nulls_and_markers_in_number_columns():
+    records = [
+        {"year": "2001", "count": "154", "rate": "363.39"},
+        {"year": "2002", "count": "*", "rate": ""},
+        {"year": "2003", "count": None, "rate": "400"},
+    ]
+    bundle = encode_columns(records)
+    assert all(column["type"] == "number" for column in bundle["columns"])
+    assert round_trip(records) == [
+        {"year": 2001, "count": 154, "rate": 363.39},
+        {"year": 2002, "count": None, "rate": None},
+        {"year": 2003, "count": None, "rate": 400.0},
+    ]
+
+
+def test_normalize_leaves_text_columns_alone():
+    assert normalize(["a", "1"]) == ["a", "1"]
+    assert normalize(["*", ""]) == ["*", ""]
+    assert normalize(["0154", "1"]) == ["0154", "1"]
+    assert parse_number("1e3") is None
+    assert parse_number("-2.5") == -2.5
+
+
+def test_reads_version_1_bundles():
+    bundle = encode_columns([{"n": 1}, {"n": 2}])
+    bundle["version"] = 1
+    assert decode_columns(bundle) == [{"n": 1}, {"n": 2}]
+
+    bundle["version"] = 99
+    with pytest.raises(ValueError):
+        decode_columns(bundle)
+
+
+@pytest.mark.parametrize("fmt", ["columnar", "rows"])
+def test_write_and_read_records(tmp_path, fmt):
+    records = [{"name": "a", "value": 1.5}, {"name": "b", "value": None}]
+    path = tmp_path / "out" / "data.json"
+    assert write_records(iter(records), str(path), fmt) == 2
+    assert read_records(str(path)) == records
+
+
+def test_empty_records(tmp_path):
+    path = tmp_path / "empty.json"
+    assert write_records([], str(path)) == 0
+    assert read_records(str(path)) == []
@@ -0,0 +1,86 @@
+import numpy as np
+from fastapi.testclient import TestClient
+
+from backend import main, regions
+from backend.downsample import MAX_POINTS, MIN_POINTS, combined_series, downsample_rows, downsample_series, lttb_indices
+
+
+def test_lttb_keeps_ends_and_peaks():
+    x = np.arange(100)
+    y = np.zeros(100)
+    y[37] = 10.0
+    y[71] = -10.0
+    keep = lttb_indices(x, y, 10)
+    assert len(keep) == 10
+    assert keep[0] == 0 and keep[-1] == 99
+    assert 37 in keep and 71 in keep
+    assert list(keep) == sorted(keep)
+
+
+def test_lttb_returns_everything_when_not_needed():
+    assert list(lttb_indices([1, 2, 3], [1, 2, 3], 5)) == [0, 1, 2]
+    assert list(lttb_indices([1, 2, 3, 4], [1, 2, 3, 4], None)) == [0, 1, 2, 3]
+    assert list(lttb_indices([1, 2, 3, 4], [1, 2, 3, 4], 2)) == [0, 1, 2, 3]
+
+
+def test_lttb_prefers_real_points_over_nan():
+    y = [1.0, np.nan, 5.0, np.nan, np.nan, 2.0, np.nan, 3.0]
+    keep = lttb_indices(range(8), y, 4)
+    assert all(not np.isnan(y[i]) for i in keep)
+
+
+def test_downsample_series_keeps_lists_aligned():
+    series = {"name": "x", "years": list(range(50)), "counts": [i * i for i in range(50)], "ranks": list(range(50, 100))}
+    result = downsample_series(series, "years", "counts", ["years", "counts", "ranks"], 10)
+    assert len(result["years"]) == len(result["counts"]) == len(result["ranks"]) == 10
+    assert all(c == y * y for y, c in zip(result["years"], result["counts"]))
+    assert all(r == y + 50 for y, r in zip(result["years"], result["ranks"]))
+    assert result["name"] == "x"
+    assert downsample_series(series, "years", "counts", ["years"], 100) is series
+
+
+def test_combined_series_scales_each_column():
+    combined = combined_series([[0.0, 5.0, 10.0], [1000.0, np.nan, 3000.0]])
+    assert combined.tolist() == [0.0, 0.5, 1.0]
+    assert np.isnan(combined_series([[np.nan], [np.nan]])[0])
+
+
+def test_downsample_rows_caps_each_group():
+    rows = [{"g": g, "year": year, "a": year % 7, "b": None if year % 5 == 0 else year} for g in "xy" for year in range(200)]
+    result = downsample_rows(rows, "year", ["a", "b"], 20, group_key="g")
+    assert len([r for r in result if r["g"] == "x"]) == 20
+    assert len([r for r in result if r["g"] == "y"]) == 20
+    # Order of the input is kept
+    assert result == [r for r in rows if r in result]
+
+
+def test_downsample_rows_single_column_matches_lttb():
+    rows = [{"year": i, "v": float((i * 37) % 11)} for i in range(60)]
+    keep = lttb_indices([r["year"] for r in rows], combined_series([[r["v"] for r in rows]]), 12)
+    assert downsample_rows(rows, "year", ["v"], 12) == [rows[i] for i in keep]
+    assert downsample_rows(rows, "year", ["v"], None) is rows
+
+
+def test_endpoints_reject_max_points_outside_the_limits(monkeypatch):
+    monkeypatch.setattr(main, "has_db", lambda table_name: True)
+    client = TestClient(main.app)
+    for path, params in [
+        ("/api/sexes/time-series", {}),
+        ("/api/regions/time-series", {}),
+        ("/api/regions/series", {}),
+        ("/api/baby-names/trends", {"names": "Ada"}),
+    ]:
+        for max_points in (MIN_POINTS - 1, MAX_POINTS + 1):
+            response = client.get(path, params={**params, "max_points": max_points})
+            assert response.status_code == 422, (path, max_points)
+
+
+def test_region_series_memo_is_bounded(monkeypatch):
+    monkeypatch.setattr(regions, "DOWNSAMPLE_CACHE_SIZE", 2)
+    rows = [{"id": i, "major_region": "M", "region": "R", "year": 1900 + i, "adm_per_100k": float(i % 7), "admissions_total": i} for i in range(50)]
+    series = regions.RegionSeries(rows)
+    for max_points in (5, 6, 5, 7):
+        (result,) = series.series(max_points=max_points)
+        assert len(result["years"]) == max_points
+    # 5 was used again after 6, so 6 is the one dropped
+    assert [key[-1] for key in series.downsampled] == [5, 7]
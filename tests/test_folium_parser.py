@@ -0,0 +1,53 @@
+import io
+
+from folium_parser import iter_circles, iter_tokens, js_string
+
+FOLIUM_HTML = """
+<script>
+    var circle_a = L.circle(
+        [51.5, -0.12],
+        {"color": "red", "fill": true, "radius": 100}
+    ).addTo(map_1);
+    var popup_1 = L.popup({"maxWidth": "100%"});
+    var html_1 = $(`<div><h3>Alpha</h3></div>`)[0];
+    popup_1.setContent(html_1);
+    circle_a.bindPopup(popup_1);
+
+    var circle_b = L.circle([52.25, 1.5], 50, {"color": "blue"}).addTo(map_1);
+    circle_b.bindPopup(popup_2);
+    var html_2 = $(`<div><h3>Beta</h3></div>`)[0];
+    popup_2.setContent(html_2);
+
+    var circle_c = L.circle([-3e-1, 4], {color: 'green'}).addTo(map_1);
+    circle_c.bindPopup("Gamma \\"quoted\\" \\u00e9");
+
+    var circle_d = L.circle([10, 10], {"color": "grey"}).addTo(map_1);
+</script>
+"""
+
+EXPECTED = [
+    {"id": "circle_a", "coordinates": [51.5, -0.12], "color": "red", "popup": "<div><h3>Alpha</h3></div>"},
+    {"id": "circle_b", "coordinates": [52.25, 1.5], "color": "blue", "popup": "<div><h3>Beta</h3></div>"},
+    {"id": "circle_c", "coordinates": [-0.3, 4.0], "color": "green", "popup": 'Gamma "quoted" é'},
+]
+
+
+def test_iter_circles_resolves_both_popup_styles():
+    assert list(iter_circles(io.StringIO(FOLIUM_HTML))) == EXPECTED
+
+
+def test_iter_circles_across_chunk_boundaries():
+    # Tiny chunks split every token; the result must not change
+    for chunk_size in (1, 7, 64):
+        assert list(iter_circles(io.StringIO(FOLIUM_HTML), chunk_size)) == EXPECTED
+
+
+def test_iter_tokens_skips_unterminated_token():
+    text = "var broken = L.circle([1, 2], {\"color\": \"red\"\nvar html_9 = $(`<b>ok</b>`)[0];"
+    tokens = list(iter_tokens(io.StringIO(text), chunk_size=16))
+    assert [t.group("html") for t in tokens] == ["html_9"]
+
+
+def test_js_string():
+    assert js_string(r"a\nb") == "a\nb"
+    assert js_string("bad \\x escape") == "bad \\x escape"
@@ -0,0 +1,73 @@
+import csv
+import json
+
+import pytest
+
+import import_baby_names
+import import_engine
+from backend.local_db import SQLiteClient
+
+
+def write_csv(path, names):
+    rows = []
+    for name in names:
+        for gender in ("Boy", "Girl"):
+            for year in (2020, 2021):
+                rows.append({"Name": name, "Gender": gender, "Value": str(len(name) + year - 2020), "Year": str(year), "Measure": "Count"})
+                rows.append({"Name": name, "Gender": gender, "Value": "7", "Year": str(year), "Measure": "Rank"})
+    # The importer must not depend on the CSV being grouped by name
+    rows.reverse()
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, ["", "Name", "Gender", "Value", "Year", "Measure"])
+        writer.writeheader()
+        for i, row in enumerate(rows):
+            writer.writerow({"": i, **row})
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    client = SQLiteClient(str(tmp_path / "archive.db"))
+    monkeypatch.setattr(import_baby_names, "client_for", lambda table_name, local=False: client)
+    monkeypatch.setattr(import_engine, "invalidate_tables", lambda tables: None)
+    return client
+
+
+def stored(client):
+    rows = client.table("baby_names_archive").select("name,sex,year,count,rank").execute().data
+    return sorted((r["name"], r["sex"], r["year"], r["count"], r["rank"]) for r in rows)
+
+
+def test_normalize_sex():
+    assert import_baby_names.normalize_sex("Boy") == "M"
+    assert import_baby_names.normalize_sex("girl") == "F"
+
+
+def test_import_pivots_and_resumes(client, tmp_path, capsys):
+    source = str(tmp_path / "names.csv")
+    state = str(tmp_path / "state.json")
+    write_csv(source, ["Ada", "Bob", "Cleo"])
+
+    import_baby_names.import_baby_names(source, workers=2, partitions=4, state_file=state)
+    rows = stored(client)
+    assert len(rows) == 12
+    assert ("Ada", "F", 2021, 4, 7) in rows and ("Cleo", "M", 2020, 4, 7) in rows
+    assert sorted(json.load(open(state))["committed"]) == [0, 1, 2, 3]
+
+    # Every partition is checkpointed, so a rerun reads nothing from the table
+    capsys.readouterr()
+    import_baby_names.import_baby_names(source, partitions=4, state_file=state)
+    assert "4 partitions already done" in capsys.readouterr().out
+
+    import_baby_names.import_baby_names(source, partitions=4, state_file=state, restart=True)
+    assert "12 unchanged, upserted 0" in capsys.readouterr().out
+
+
+def test_import_prunes_removed_names(client, tmp_path):
+    source = str(tmp_path / "names.csv")
+    write_csv(source, ["Ada", "Bob", "Cleo"])
+    import_baby_names.import_baby_names(source, partitions=3, state_file=str(tmp_path / "a.json"))
+
+    write_csv(source, ["Ada", "Cleo"])
+    import_baby_names.import_baby_names(source, partitions=3, prune=True, state_file=str(tmp_path / "b.json"))
+    assert {r[0] for r in stored(client)} == {"Ada", "Cleo"}
+    assert len(stored(client)) == 8
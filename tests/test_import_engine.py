@@ -0,0 +1,141 @@
+import pytest
+
+import import_engine
+from backend.local_db import SQLiteClient
+from import_engine import (
+    KEY_PREFIX_DIGITS, ImportCheckpoint, build_records, clean_float, clean_int, fetch_existing_hashes, key_range,
+    partition_of, sync_table,
+)
+
+SPEC = {
+    "table": "war_dead_archive",
+    "source": "unused.json",
+    "columns": {
+        "cemetery_name": "cemetery_name",
+        "coordinates": "coordinates",
+        "bio_html": "bio_html",
+        "num_commemorated": ("num_commemorated", clean_int),
+    },
+    "natural_key": ["cemetery_name", "coordinates"],
+}
+
+
+def cemeteries(n, bio="bio"):
+    return [{"cemetery_name": f"Cemetery {i}", "coordinates": [50 + i / 100, 1.0], "bio_html": bio, "num_commemorated": str(i)} for i in range(n)]
+
+
+@pytest.fixture
+def client(tmp_path):
+    return SQLiteClient(str(tmp_path / "archive.db"))
+
+
+@pytest.fixture
+def invalidated(monkeypatch):
+    tables = []
+    monkeypatch.setattr(import_engine, "invalidate_tables", tables.extend)
+    return tables
+
+
+def all_rows(client):
+    return client.table("war_dead_archive").select("*").execute().data
+
+
+def test_clean_values():
+    assert clean_float("n/a") is None
+    assert clean_float("1.5") == 1.5
+    assert clean_int("") == 0
+    assert clean_int("12.0") == 12
+
+
+def test_build_records_keys_and_hashes():
+    items = cemeteries(2) + [dict(cemeteries(1)[0], bio_html="other")]
+    records = list(build_records(SPEC, items))
+    assert records[0]["num_commemorated"] == 0
+    # A repeated natural key gets an occurrence suffix
+    assert records[2]["import_key"] == records[0]["import_key"] + "#1"
+    assert records[2]["row_hash"] != records[0]["row_hash"]
+    assert records == list(build_records(SPEC, items))
+
+
+@pytest.mark.parametrize("partitions", [1, 3, 7, 16])
+def test_key_ranges_cover_every_prefix_once(partitions):
+    ranges = [key_range(i, partitions) for i in range(partitions)]
+    assert ranges[0][0] == "0" * KEY_PREFIX_DIGITS
+    assert ranges[-1][1] is None
+    for (_lo, hi), (next_lo, _next_hi) in zip(ranges, ranges[1:]):
+        assert hi == next_lo
+
+    for record, item in zip(build_records(SPEC, cemeteries(200)), cemeteries(200)):
+        lo, hi = ranges[partition_of(SPEC, item, partitions)]
+        assert lo <= record["import_key"] and (hi is None or record["import_key"] < hi)
+
+
+def test_fetch_existing_hashes_pages_and_ranges(client, monkeypatch):
+    monkeypatch.setattr(import_engine, "FETCH_PAGE_SIZE", 7)
+    records = list(build_records(SPEC, cemeteries(30)))
+    client.table("war_dead_archive").insert(records).execute()
+
+    assert fetch_existing_hashes(client, "war_dead_archive") == {r["import_key"]: r["row_hash"] for r in records}
+    lo, hi = key_range(1, 4)
+    assert fetch_existing_hashes(client, "war_dead_archive", lo, hi) == {
+        r["import_key"]: r["row_hash"] for r in records if lo <= r["import_key"] < hi
+    }
+
+
+def test_sync_table_only_writes_changes(client, invalidated):
+    first = sync_table(SPEC, cemeteries(20), client)
+    assert first["ok"] and first["upserted"] == 20
+    assert len(all_rows(client)) == 20
+    assert invalidated == ["war_dead_archive"]
+
+    unchanged = sync_table(SPEC, cemeteries(20), client)
+    assert unchanged["unchanged"] == 20 and unchanged["upserted"] == 0
+    # Nothing written, so nothing to invalidate
+    assert invalidated == ["war_dead_archive"]
+
+    items = cemeteries(20)
+    items[3]["bio_html"] = "updated"
+    changed = sync_table(SPEC, items, client)
+    assert (changed["unchanged"], changed["upserted"]) == (19, 1)
+    assert sorted(r["bio_html"] for r in all_rows(client)).count("updated") == 1
+
+
+def test_sync_table_dry_run_and_prune(client, invalidated, monkeypatch):
+    monkeypatch.setattr(import_engine, "PRUNE_CHUNK_SIZE", 3)
+    sync_table(SPEC, cemeteries(20), client)
+
+    dry = sync_table(SPEC, cemeteries(12), client, prune=True, dry_run=True)
+    assert dry["deleted"] == 8
+    assert len(all_rows(client)) == 20
+
+    pruned = sync_table(SPEC, cemeteries(12), client, prune=True)
+    assert pruned["ok"] and pruned["deleted"] == 8
+    assert sorted(r["cemetery_name"] for r in all_rows(client)) == sorted(f"Cemetery {i}" for i in range(12))
+
+
+def split(items, partitions):
+    parts = [[] for _ in range(partitions)]
+    for item in items:
+        parts[partition_of(SPEC, item, partitions)].append(item)
+    return parts
+
+
+def test_partitioned_sync_with_checkpoint(client, invalidated, tmp_path):
+    items = cemeteries(50)
+    state = str(tmp_path / "state.json")
+    checkpoint = ImportCheckpoint(state, "v1")
+    result = sync_table(SPEC, client=client, prune=True, partitions=split(items, 4), checkpoint=checkpoint)
+    assert result["ok"] and result["upserted"] == 50 and result["deleted"] == 0
+    assert checkpoint.committed == {0, 1, 2, 3}
+
+    # A rerun with the same fingerprint skips every finished partition
+    resumed = sync_table(SPEC, client=client, partitions=split(items, 4), checkpoint=ImportCheckpoint(state, "v1"))
+    assert resumed["unchanged"] + resumed["changed"] == 0
+
+    # Pruning one partition never touches rows in the others
+    restarted = ImportCheckpoint(state, "v2")
+    assert restarted.committed == set()
+    result = sync_table(SPEC, client=client, prune=True, partitions=split(items[:40], 4), checkpoint=restarted)
+    assert (result["unchanged"], result["deleted"]) == (40, 10)
+    assert len(all_rows(client)) == 40
+    assert ImportCheckpoint(state, "v2", restart=True).committed == set()
@@ -0,0 +1,95 @@
+import threading
+
+import pytest
+
+from backend import local_db
+from backend.local_db import SQLiteClient, use_local
+
+
+@pytest.fixture
+def client(tmp_path):
+    client = SQLiteClient(str(tmp_path / "data" / "archive.db"))
+    client.table("crime_data_archive").insert([
+        {"crime_type": "theft", "location": "A", "coordinates": [51.5, -0.1], "import_key": "k1"},
+        {"crime_type": "burglary", "location": "B", "coordinates": [52.0, -1.0], "import_key": "k2"},
+        {"crime_type": "theft", "location": "C", "coordinates": None, "import_key": "k3"},
+        {"crime_type": "arson", "location": "D", "coordinates": [53.0, 0.5], "import_key": "k4"},
+    ]).execute()
+    return client
+
+
+def crimes(client):
+    return client.table("crime_data_archive")
+
+
+def test_select_decodes_json_columns(client):
+    rows = crimes(client).select("*").order("id").execute().data
+    assert rows[0] == {
+        "id": 1, "crime_type": "theft", "location": "A", "coordinates": [51.5, -0.1],
+        "original_color": None, "import_key": "k1", "row_hash": None,
+    }
+    assert rows[2]["coordinates"] is None
+    assert crimes(client).select("id, location").eq("id", 2).execute().data == [{"id": 2, "location": "B"}]
+
+
+def test_filters_order_and_paging(client):
+    def ids(query):
+        return [row["id"] for row in query.execute().data]
+
+    assert ids(crimes(client).select("id").eq("crime_type", "theft").order("id")) == [1, 3]
+    assert ids(crimes(client).select("id").gt("id", 1).lt("id", 4).order("id", desc=True)) == [3, 2]
+    assert ids(crimes(client).select("id").gte("import_key", "k3").order("id")) == [3, 4]
+    assert ids(crimes(client).select("id").in_("location", ["A", "D", "Z"]).order("id")) == [1, 4]
+    assert ids(crimes(client).select("id").in_("location", [])) == []
+    assert ids(crimes(client).select("id").order("crime_type").order("id", desc=True)) == [4, 2, 3, 1]
+    assert ids(crimes(client).select("id").order("id").limit(2)) == [1, 2]
+    assert ids(crimes(client).select("id").order("id").range(1, 2)) == [2, 3]
+
+
+def test_upsert_and_delete(client):
+    crimes(client).upsert([
+        {"crime_type": "theft", "location": "A2", "coordinates": [1, 2], "import_key": "k1"},
+        {"crime_type": "fraud", "location": "E", "coordinates": [3, 4], "import_key": "k5"},
+    ], on_conflict="import_key").execute()
+    rows = {row["import_key"]: row for row in crimes(client).select("*").execute().data}
+    assert len(rows) == 5
+    # An upsert updates in place, keeping the id
+    assert rows["k1"]["id"] == 1 and rows["k1"]["location"] == "A2" and rows["k1"]["coordinates"] == [1, 2]
+
+    crimes(client).delete().in_("import_key", ["k2", "k5"]).execute()
+    crimes(client).delete().eq("crime_type", "arson").execute()
+    assert sorted(row["import_key"] for row in crimes(client).select("import_key").execute().data) == ["k1", "k3"]
+
+
+def test_rejects_unknown_tables_and_columns(client):
+    with pytest.raises(ValueError):
+        client.table("users")
+    with pytest.raises(ValueError):
+        crimes(client).select("id, password")
+    with pytest.raises(ValueError):
+        crimes(client).select("*").eq("id; DROP TABLE crime_data_archive", 1)
+
+
+def test_each_thread_gets_its_own_connection(client):
+    connections = []
+    thread = threading.Thread(target=lambda: connections.append(client.connection()))
+    thread.start()
+    thread.join()
+    assert connections[0] is not client.connection()
+    assert client.connection() is client.connection()
+
+
+def test_use_local(tmp_path, monkeypatch):
+    path = str(tmp_path / "archive.db")
+    monkeypatch.setattr(local_db, "LOCAL_DB_TABLES", "")
+    assert not use_local("crime_data_archive", False, path)
+    SQLiteClient(path)
+    assert use_local("crime_data_archive", False, path)
+    assert not use_local("crime_data_archive", True, path)
+    assert not use_local("tarot_logs", False, path)
+
+    monkeypatch.setattr(local_db, "LOCAL_DB_TABLES", "crime_data_archive, war_dead_archive")
+    assert use_local("war_dead_archive", True, path)
+    assert not use_local("baby_names_archive", True, path)
+    monkeypatch.setattr(local_db, "LOCAL_DB_TABLES", "*")
+    assert use_local("baby_names_archive", True, path)
@@ -0,0 +1,25 @@
+import pytest
+
+from backend import main
+from backend.local_db import SQLiteClient
+
+
+@pytest.fixture
+def local_db(tmp_path, monkeypatch):
+    client = SQLiteClient(str(tmp_path / "archive.db"))
+    monkeypatch.setattr(main, "db_for", lambda table_name: client)
+    monkeypatch.setattr(main, "has_db", lambda table_name: True)
+    return client
+
+
+def test_fetch_all_rows_pages_by_id(local_db, monkeypatch):
+    monkeypatch.setattr(main, "FETCH_PAGE_SIZE", 3)
+    rows = [{"crime_type": f"type {i}", "coordinates": [51.0, -1.0]} for i in range(10)]
+    local_db.table("crime_data_archive").insert(rows).execute()
+    # Gaps in the ids must not skip or repeat rows
+    local_db.table("crime_data_archive").delete().in_("id", [2, 3, 7]).execute()
+
+    fetched = main.fetch_all_rows("crime_data_archive")
+    assert [row["id"] for row in fetched] == [1, 4, 5, 6, 8, 9, 10]
+    assert fetched[0] == {"id": 1, "crime_type": "type 0", "location": None, "coordinates": [51.0, -1.0], "original_color": None}
+    assert main.fetch_all_rows("war_dead_archive") == []
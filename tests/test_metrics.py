@@ -0,0 +1,97 @@
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import main, metrics
+from backend.metrics import Counter, Gauge, Histogram, REQUESTS, db_call, format_labels, render_metrics
+
+
+def test_format_labels_escapes_values():
+    assert format_labels((), ()) == ""
+    assert format_labels(("a", "b"), ('say "hi"', "back\\slash\nnew")) == '{a="say \\"hi\\"",b="back\\\\slash\\nnew"}'
+    assert format_labels(("a",), ("x",), 'le="1"') == '{a="x",le="1"}'
+
+
+def test_counter_renders_one_line_per_label_set():
+    registry = []
+    counter = Counter("jobs_total", "Jobs run.", ("kind",), registry=registry)
+    counter.inc("b")
+    counter.inc("a", amount=3)
+    counter.inc("b")
+    assert render_metrics(registry).decode() == (
+        "# HELP jobs_total Jobs run.\n"
+        "# TYPE jobs_total counter\n"
+        'jobs_total{kind="a"} 3\n'
+        'jobs_total{kind="b"} 2\n'
+    )
+
+
+def test_histogram_renders_cumulative_buckets_sum_and_count():
+    registry = []
+    histogram = Histogram("wait_seconds", "Waits.", buckets=(1.0, 0.5), registry=registry)
+    for value in (0.25, 0.5, 0.75, 4.0):
+        histogram.observe(value)
+    assert histogram.render() == [
+        "# HELP wait_seconds Waits.",
+        "# TYPE wait_seconds histogram",
+        'wait_seconds_bucket{le="0.5"} 2',
+        'wait_seconds_bucket{le="1.0"} 3',
+        'wait_seconds_bucket{le="+Inf"} 4',
+        "wait_seconds_sum 5.5",
+        "wait_seconds_count 4",
+    ]
+
+
+def test_gauge_reads_its_value_at_scrape_time():
+    registry = []
+    value = [1]
+    Gauge("queue_depth", "Queued jobs.", lambda: value[0], registry=registry)
+    value[0] = 7
+    assert render_metrics(registry).decode().splitlines()[-1] == "queue_depth 7"
+
+
+def test_sharded_counter_totals_every_thread():
+    counter = Counter("hits_total", "Hits.", ("route",), registry=[])
+    histogram = Histogram("hit_seconds", "Hits.", buckets=(1.0,), registry=[])
+
+    def record():
+        for _ in range(1000):
+            counter.inc("/a")
+            histogram.observe(0.5)
+
+    threads = [threading.Thread(target=record) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    counter.inc("/a")
+
+    assert len(counter.shards) == 9
+    assert counter.collect() == {("/a",): 8001}
+    assert histogram.collect() == {(): [8000, 0, 4000.0]}
+
+
+def test_db_call_counts_errors(monkeypatch):
+    errors = Counter("errors_total", "Errors.", ("table", "backend"), registry=[])
+    monkeypatch.setattr(metrics, "DB_CALL_ERRORS", errors)
+    with db_call("t", "sqlite"):
+        pass
+    with pytest.raises(RuntimeError):
+        with db_call("t", "sqlite"):
+            raise RuntimeError("boom")
+    assert errors.collect() == {("t", "sqlite"): 1}
+
+
+def test_middleware_counts_requests_by_route_template():
+    client = TestClient(main.app)
+    before = REQUESTS.collect().get(("GET", "/metrics", "200"), 0)
+    client.get("/metrics")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert REQUESTS.collect()[("GET", "/metrics", "200")] == before + 2
+    assert "# TYPE http_request_duration_seconds histogram" in response.text
+
+    client.get("/no/such/route")
+    assert REQUESTS.collect()[("GET", "unmatched", "404")] >= 1
@@ -0,0 +1,92 @@
+from backend import names
+from backend.names import PRECOMPUTED_PREFIX_LEN, BabyNameStore, NamePrefixIndex
+
+ROWS = [
+    {"name": "Oliver", "sex": "M", "year": 2000, "count": 500},
+    {"name": "Oliver", "sex": "M", "year": 2001, "count": 600},
+    {"name": "Olivia", "sex": "F", "year": 2000, "count": 900},
+    {"name": "Olive", "sex": "F", "year": 2000, "count": 40},
+    {"name": "Ollie", "sex": "M", "year": 2000, "count": 300},
+    {"name": "Amelia", "sex": "F", "year": 2000, "count": 700},
+    {"name": "Amy", "sex": "F", "year": 2000, "count": None},
+]
+
+
+def test_prefix_search_ranks_by_total_count():
+    index = NamePrefixIndex(ROWS)
+    assert len(index) == 6
+    # Oliver's two years add up to more than Olivia's one
+    assert index.search("ol") == ["Oliver", "Olivia", "Ollie", "Olive"]
+    assert index.search("oliv") == ["Oliver", "Olivia", "Olive"]
+    assert index.search("  AM ") == ["Amelia", "Amy"]
+
+
+def test_short_prefixes_are_precomputed():
+    index = NamePrefixIndex(ROWS)
+    assert set(index.top) >= {"o", "ol", "oli", "a", "am", "ame"}
+    assert all(len(prefix) <= PRECOMPUTED_PREFIX_LEN for prefix in index.top)
+    assert index.search("oli") is index.top["oli"]
+    assert index.search("oli") == index._rank("oli")
+
+
+def test_prefix_search_limit_and_misses():
+    index = NamePrefixIndex(ROWS, limit=2)
+    assert index.search("o") == ["Oliver", "Olivia"]
+    assert index.search("olivert") == []
+    assert index.search("zz") == []
+    assert index.search("") == []
+
+
+def trend_rows():
+    rows = []
+    for year in range(1990, 2000):
+        rows.append({"name": "Ada", "sex": "F", "year": year, "count": 10 * (year - 1989), "rank": 100 - (year - 1990)})
+        rows.append({"name": "Other", "sex": "F", "year": year, "count": 90, "rank": None if year == 1995 else 50})
+    rows.append({"name": "Ada", "sex": "M", "year": 1995, "count": 5, "rank": None})
+    return rows
+
+
+def test_store_trends_per_name_and_sex():
+    store = BabyNameStore(trend_rows())
+    assert len(store) == 21
+    assert [t["name"] for t in store.trends(["ada", "Nobody"])] == ["Ada", "Ada"]
+
+    female, male = store.trends(["Ada"])
+    assert female["sex"] == "F" and male["sex"] == "M"
+    assert female["years"] == list(range(1990, 2000))
+    assert female["counts"] == [10 * i for i in range(1, 11)]
+    assert female["ranks"] == list(range(100, 90, -1))
+    assert male == {"name": "Ada", "sex": "M", "years": [1995], "counts": [5], "ranks": [None]}
+    assert {"name": "Ada", "count": 555} in list(store.name_totals())
+
+
+def test_store_trend_extras():
+    store = BabyNameStore(trend_rows())
+    (female, _male) = store.trends(["Ada"], ["share", "rank_delta"])
+    # Ada's share of all recorded F births that year (Other adds 90 each year)
+    assert female["share"][0] == round(10 / 100, 8)
+    assert female["share"][-1] == round(100 / 190, 8)
+    assert female["rank_delta"] == [None] + [1] * 9
+
+    (other,) = store.trends(["Other"], ["rank_delta"])
+    assert other["ranks"][5] is None
+    assert other["rank_delta"][5] is None and other["rank_delta"][6] is None
+    assert other["rank_delta"][7] == 0
+
+
+def test_store_downsampling_is_memoised_and_bounded(monkeypatch):
+    store = BabyNameStore(trend_rows())
+    (female, _male) = store.trends(["Ada"], ["share"], max_points=4)
+    assert len(female["years"]) == len(female["counts"]) == len(female["share"]) == 4
+    assert female["years"][0] == 1990 and female["years"][-1] == 1999
+    assert len(store.downsampled) == 1
+
+    monkeypatch.setattr(names, "DOWNSAMPLE_CACHE_SIZE", 3)
+    for max_points in range(3, 9):
+        store.trends(["Ada", "Other"], max_points=max_points)
+    assert len(store.downsampled) == 3
+    # A hit moves the entry to the back, so it outlives newer ones
+    store.trends(["Ada"], max_points=8)
+    store.trends(["Other"], max_points=9)
+    store.trends(["Ada"], max_points=9)
+    assert (store.name_ids["Ada"], 0, 8) in store.downsampled
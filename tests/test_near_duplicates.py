@@ -0,0 +1,40 @@
+from near_duplicates import choose_keeper, find_clusters, jaccard, shingles
+
+BASE = " ".join(f"word{i}" for i in range(60))
+
+
+def test_shingles_and_jaccard():
+    assert shingles("a b c d") == shingles("A  b\nc d")
+    assert jaccard(set(), {1}) == 0.0
+    assert jaccard({1, 2}, {2, 3}) == 1 / 3
+
+
+def test_choose_keeper_prefers_edited_then_longest():
+    assert choose_keeper(["a.txt", "a_edited.txt", "b.txt"], [100, 1, 200]) == 1
+    assert choose_keeper(["a.txt", "b.txt"], [100, 200]) == 1
+    assert choose_keeper(["a.txt", "b.txt"], [100, 100]) == 0
+
+
+def test_find_clusters_groups_copies():
+    items = [
+        ("one.txt", BASE),
+        ("copy.txt", BASE + " word60"),
+        ("other.txt", " ".join(f"other{i}" for i in range(60))),
+    ]
+    (cluster,) = find_clusters(items)
+    assert cluster["keeper"] == "copy.txt"
+    assert [key for key, _similarity in cluster["duplicates"]] == ["one.txt"]
+    assert cluster["duplicates"][0][1] >= 0.8
+
+
+def test_members_are_compared_against_the_keeper():
+    words = [f"word{i}" for i in range(100)]
+    a = " ".join(words[:60])
+    b = " ".join(words[10:70])
+    c = " ".join(words[20:80])
+    # a ~ b and b ~ c at about 0.7, a ~ c just under 0.5
+    clusters = find_clusters([("a", a), ("b", b), ("c", c)], threshold=0.5)
+    for cluster in clusters:
+        for _key, similarity in cluster["duplicates"]:
+            assert similarity >= 0.5
+    assert not any({cluster["keeper"], *(k for k, _s in cluster["duplicates"])} >= {"a", "c"} for cluster in clusters)
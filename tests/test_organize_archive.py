@@ -0,0 +1,51 @@
+import shutil
+
+import pytest
+
+pytest.importorskip("pypdf")
+
+from organize_archive import analyze_text, fix_double_text, plan_name, scan_and_organize
+
+HEADLINES = [
+    "Council approves a new budget for the city centre",
+    "Local school celebrates record exam results this year",
+    "Football club unveils plans for a bigger stadium soon",
+    "Hospital opens a new accident and emergency wing",
+    "Short",
+]
+
+
+def plan(capsys):
+    return capsys.readouterr().out.split("--- DRY RUN PLAN ---")[1]
+
+
+def test_parallel_scan_matches_serial(tmp_path, make_pdf, capsys):
+    articles = tmp_path / "articles"
+    for i in range(12):
+        lines = [HEADLINES[i % len(HEADLINES)] + f" part {i}"]
+        if i % 3:
+            lines.append(f"{i + 1} March 2019")
+        make_pdf(articles / f"scan_{i:02d}.pdf", lines)
+    # Exact copies are duplicates of the first file in listing order
+    shutil.copy(articles / "scan_03.pdf", articles / "copy_of_03.pdf")
+    shutil.copy(articles / "scan_03.pdf", articles / "zz_copy.pdf")
+    make_pdf(articles / "empty.pdf", [])
+
+    scan_and_organize(str(articles), dry_run=True, manifest_file=str(tmp_path / "serial.sqlite"), workers=1)
+    serial = plan(capsys)
+    scan_and_organize(str(articles), dry_run=True, manifest_file=str(tmp_path / "parallel.sqlite"), workers=3)
+    parallel = plan(capsys)
+
+    assert parallel == serial
+    assert serial.count("Reason: Duplicate of") == 2
+    assert "empty.pdf -> empty_analyzed.pdf" in serial
+
+
+def test_analyze_text():
+    title, date = analyze_text("www.thesentinel.co.uk\nMonday, 4 March\nCouncil approves a new budget for the city centre\nafter a long debate\n12/03/2019")
+    assert title == "Council approves a new budget for the city centre after a long debate"
+    assert date == "2019-03-12"
+    assert analyze_text("") == ("Unknown_Title", None)
+    assert fix_double_text("TTHHEE  QQUUIICCKK") == "THE  QUICK"
+    assert plan_name("a.pdf", "Unknown_Title", None) == "a_analyzed.pdf"
+    assert plan_name("a.pdf", "A title: here?", "2020-01-02") == "2020-01-02_A_title_here.pdf"
@@ -0,0 +1,108 @@
+import math
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from backend import main
+from backend.regions import RegionSeries, ranks_within
+
+
+def row(id, major, region, year, rate, total):
+    return {"id": id, "major_region": major, "region": region, "year": year, "adm_per_100k": rate, "admissions_total": total}
+
+
+ROWS = [
+    row(1, "North", "Leeds", 2019, 10.0, 100),
+    row(2, "North", "Leeds", 2020, 12.5, 125),
+    row(3, "North", "Leeds", 2022, 11.0, 110),
+    row(4, "North", "York", 2019, 20.0, 50),
+    row(5, "North", "York", 2020, 10.0, 25),
+    row(6, "South", "Bath", 2019, 30.0, 30),
+    row(7, "South", "Bath", 2020, None, None),
+]
+
+
+def test_ranks_within_groups_share_tied_ranks():
+    groups = np.array([1, 1, 1, 1, 2, 2])
+    values = np.array([5.0, 7.0, 7.0, 1.0, np.nan, 3.0])
+    assert ranks_within(groups, values).tolist() == [3, 1, 1, 4, 0, 1]
+
+
+def test_filtered_rows_apply_every_filter_in_id_order():
+    series = RegionSeries(list(reversed(ROWS)))
+    assert [r["id"] for r in series.filtered_rows()] == [1, 2, 3, 4, 5, 6, 7]
+    assert [r["id"] for r in series.filtered_rows(regions=["leeds", "Bath", "Nowhere"])] == [1, 2, 3, 6, 7]
+    assert [r["id"] for r in series.filtered_rows(major_region="North", year_from=2020)] == [2, 3, 5]
+    assert [r["id"] for r in series.filtered_rows(year_to=2019)] == [1, 4, 6]
+    assert series.filtered_rows(major_region="Nowhere") == []
+
+
+def test_series_yoy_change_and_rank():
+    series = RegionSeries(ROWS)
+    by_region = {s["region"]: s for s in series.series()}
+
+    leeds = by_region["Leeds"]
+    assert leeds["major_region"] == "North"
+    assert leeds["years"] == [2019, 2020, 2022]
+    # No change across the 2021 gap
+    assert leeds["yoy_change"] == [None, 2.5, None]
+    assert leeds["rank"] == [3, 1, 1]
+
+    assert by_region["York"]["yoy_change"] == [None, -10.0]
+    assert by_region["York"]["rank"] == [2, 2]
+
+    bath = by_region["Bath"]
+    assert bath["adm_per_100k"] == [30.0, None]
+    assert bath["admissions_total"] == [30, None]
+    assert bath["rank"] == [1, None]
+
+
+def test_series_by_major_region_matches_filtered_series():
+    series = RegionSeries(ROWS)
+    assert series.series(major_region="North") == series._series(series.select(major_region="North"))
+    assert [s["region"] for s in series.series(major_region="North", year_from=2020)] == ["Leeds", "York"]
+
+
+def test_major_region_rollup_weights_rates_by_population():
+    series = RegionSeries(ROWS)
+    north, south = series.rollups["major_region"]
+
+    assert north["major_region"] == "North"
+    assert north["years"] == [2019, 2020, 2022]
+    assert north["regions"] == [2, 2, 1]
+    assert north["admissions_total"] == [150, 150, 110]
+    # 150 admissions over 1,000,000 + 250,000 people
+    assert north["adm_per_100k"][0] == 12.0
+    assert north["yoy_change"][2] is None
+
+    assert south["major_region"] == "South"
+    assert south["rank"][0] == 1
+    assert north["rank"][0] == 2
+
+
+def test_year_rollup_reports_totals_median_and_top_region():
+    series = RegionSeries(ROWS)
+    y2019, y2020, y2022 = series.rollups["year"]
+
+    assert y2019["year"] == 2019
+    assert y2019["regions"] == 3
+    assert y2019["admissions_total"] == 180
+    assert y2019["median_adm_per_100k"] == 20.0
+    assert y2019["top_region"] == "Bath"
+
+    assert y2020["top_region"] == "Leeds"
+    assert math.isclose(y2020["yoy_change"], y2020["adm_per_100k"] - y2019["adm_per_100k"], abs_tol=0.002)
+    assert y2022["yoy_change"] is None
+
+
+def test_empty_archive_has_no_series_or_rollups():
+    series = RegionSeries([])
+    assert len(series) == 0
+    assert series.series() == []
+    assert series.rollups == {"major_region": [], "year": []}
+
+
+def test_rollups_endpoint_rejects_unknown_grouping(monkeypatch):
+    monkeypatch.setattr(main, "has_db", lambda table_name: True)
+    response = TestClient(main.app).get("/api/regions/rollups", params={"by": "bad"})
+    assert response.status_code == 400
@@ -0,0 +1,102 @@
+import pytest
+from fastapi.testclient import TestClient
+
+pytest.importorskip("pypdf")
+
+import build_article_index
+from backend import main
+from backend.db import LazyValue
+from backend.search import ArticleIndex, decode_positions, encode_positions, parse_query
+from build_article_index import build_index
+
+PAGES = {
+    "budget.pdf": [
+        ["Council budget approved", "The council budget was approved after a long debate."],
+        ["The city council said the budget protects libraries & parks."],
+    ],
+    "stadium.pdf": [["Football club stadium plans", "The club wants a bigger stadium near the council offices."]],
+    "school.pdf": [["School results", "Pupils at the school beat their record results."]],
+}
+
+
+@pytest.fixture
+def articles(tmp_path, make_pdf, monkeypatch):
+    monkeypatch.setattr(build_article_index, "invalidate_tables", lambda tables: None)
+    monkeypatch.setattr(build_article_index, "load_portfolio", lambda: {"school.pdf": {"id": 7, "title": "Record results", "pdf_path": "/articles/school.pdf"}})
+    directory = tmp_path / "articles"
+    for filename, pages in PAGES.items():
+        make_pdf(directory / filename, *pages)
+    return directory
+
+
+def test_positions_round_trip():
+    positions = [0, 1, 5, 127, 128, 300, 20000]
+    assert decode_positions(encode_positions(positions)) == positions
+    assert decode_positions(b"") == []
+
+
+def test_parse_query():
+    assert parse_query('council "city  Budget" "one" x-ray') == (["council", "one", "x", "ray"], [["city", "budget"]])
+
+
+def test_bm25_ranking_phrases_and_snippets(articles, tmp_path):
+    index_file = str(tmp_path / "index.sqlite")
+    build_index(str(articles), index_file)
+    index = ArticleIndex(index_file)
+    assert len(index) == 3
+
+    results = index.search("council")
+    # budget.pdf says council three times, stadium.pdf once
+    assert [r["pdf_path"] for r in results] == ["/articles/budget.pdf", "/articles/stadium.pdf"]
+    assert results[0]["score"] > results[1]["score"] > 0
+    assert results[0]["title"] == "budget"
+    assert "<mark>Council</mark>" in results[0]["snippet"]
+
+    # The phrase only occurs on page 2 of budget.pdf
+    (phrase_hit,) = index.search('"city council"')
+    assert phrase_hit["pdf_path"] == "/articles/budget.pdf"
+    assert phrase_hit["page"] == 2
+    assert "<mark>city</mark> <mark>council</mark>" in phrase_hit["snippet"]
+    assert "libraries &amp; parks" in phrase_hit["snippet"]
+    assert index.search('"council stadium"') == []
+
+    (school,) = index.search("RESULTS")
+    assert (school["id"], school["title"]) == (7, "Record results")
+    assert index.search("   ") == []
+    assert index.search("nothing") == []
+    assert len(index.search("the", limit=2)) == 2
+
+
+def test_rebuild_only_reindexes_changed_files(articles, tmp_path, make_pdf, capsys):
+    index_file = str(tmp_path / "index.sqlite")
+    build_index(str(articles), index_file)
+    assert "3 new or changed, 0 removed, 0 unchanged" in capsys.readouterr().out
+
+    build_index(str(articles), index_file)
+    assert "0 new or changed, 0 removed, 3 unchanged" in capsys.readouterr().out
+
+    make_pdf(articles / "stadium.pdf", ["Stadium plans dropped by the club"])
+    (articles / "school.pdf").unlink()
+    build_index(str(articles), index_file)
+    assert "1 new or changed, 1 removed, 1 unchanged" in capsys.readouterr().out
+
+    index = ArticleIndex(index_file)
+    assert [r["pdf_path"] for r in index.search("dropped")] == ["/articles/stadium.pdf"]
+    assert index.search("pupils") == []
+    assert [r["pdf_path"] for r in index.search("council")] == ["/articles/budget.pdf"]
+
+
+def test_search_endpoint(articles, tmp_path, monkeypatch):
+    index_file = str(tmp_path / "index.sqlite")
+    monkeypatch.setattr(main, "article_index", LazyValue(lambda: ArticleIndex(index_file)))
+    client = TestClient(main.app)
+
+    missing = client.get("/api/articles/search", params={"q": "council"})
+    assert missing.status_code == 503
+    assert "build_article_index.py" in missing.json()["detail"]
+
+    build_index(str(articles), index_file)
+    main.article_index.reset()
+    found = client.get("/api/articles/search", params={"q": "council", "limit": 1})
+    assert found.status_code == 200
+    assert [r["pdf_path"] for r in found.json()] == ["/articles/budget.pdf"]
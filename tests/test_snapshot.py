@@ -0,0 +1,92 @@
+import pytest
+
+from backend import main
+from backend.cache import CacheEntry, ResponseCache, compress
+from backend.snapshot import ResponseSnapshot, write_snapshot
+
+BODY = b'{"rows":[' + b",".join(b'{"id":%d}' % i for i in range(300)) + b"]}"
+
+
+@pytest.fixture
+def snapshot_path(tmp_path):
+    path = str(tmp_path / "data" / "snapshot.bin")
+    write_snapshot({
+        "/api/a": (["a_archive"], {None: BODY, **compress(BODY, best=True)}),
+        "/api/b?x=1": (["a_archive", "b_archive"], {None: b"[]"}),
+    }, path)
+    return path
+
+
+def test_read_and_take(snapshot_path):
+    snapshot = ResponseSnapshot.load(snapshot_path)
+    assert len(snapshot) == 2
+
+    tables, variants = snapshot.read("/api/a", {})
+    assert tables == ["a_archive"]
+    assert variants[None] == BODY
+    assert set(variants) == {None, "gzip", "br"}
+    assert snapshot.read("/api/a", {}) is not None
+
+    assert snapshot.take("/api/b?x=1", {})[1] == {None: b"[]"}
+    assert snapshot.take("/api/b?x=1", {}) is None
+    assert snapshot.read("/api/missing", {}) is None
+    snapshot.close()
+
+
+def test_stamped_tables_are_not_served(snapshot_path):
+    snapshot = ResponseSnapshot(snapshot_path)
+    assert snapshot.read("/api/b?x=1", {"b_archive": snapshot.created + 1}) is None
+    assert snapshot.read("/api/b?x=1", {"b_archive": snapshot.created - 1}) is not None
+    assert snapshot.read("/api/a", {"b_archive": snapshot.created + 1}) is not None
+    snapshot.close()
+
+
+def test_discard(snapshot_path):
+    snapshot = ResponseSnapshot(snapshot_path)
+    snapshot.discard(["b_archive"])
+    assert list(snapshot.entries) == ["/api/a"]
+    snapshot.discard()
+    assert len(snapshot) == 0
+    snapshot.close()
+
+
+def test_load_ignores_missing_or_foreign_files(tmp_path):
+    assert ResponseSnapshot.load(str(tmp_path / "missing.bin")) is None
+    other = tmp_path / "other.bin"
+    other.write_bytes(b"not a snapshot")
+    assert ResponseSnapshot.load(str(other)) is None
+
+
+def test_seeds_response_cache(snapshot_path, tmp_path):
+    response_cache = ResponseCache(stamp_file=str(tmp_path / "stamps.json"))
+    response_cache.attach_snapshot(ResponseSnapshot(snapshot_path))
+
+    entry = response_cache.lookup("/api/a")
+    assert entry.body == BODY
+    assert set(entry.variants) == {"gzip", "br"}
+    # Same representation, same ETag as a fresh fill of the same body
+    assert entry.etag == CacheEntry(BODY, ["a_archive"], 60).etag
+    assert response_cache.lookup("/api/a") is entry
+
+    response_cache.invalidate(["b_archive"])
+    assert response_cache.lookup("/api/b?x=1") is None
+
+
+def test_refresh_rebuilds_only_changed_tables(tmp_path, monkeypatch):
+    path = str(tmp_path / "snapshot.bin")
+    bodies = {"a": [1], "b": [2]}
+    monkeypatch.setattr(main, "has_db", lambda table_name: True)
+    monkeypatch.setattr(main, "read_stamps", lambda: {})
+    monkeypatch.setattr(main, "snapshot_routes", lambda tables=None: {
+        "/api/a": (["a_archive"], lambda: bodies["a"]),
+        "/api/b": (["b_archive"], lambda: bodies["b"]),
+    })
+
+    main.write_response_snapshot(path)
+    bodies["a"], bodies["b"] = [10], [20]
+    main.write_response_snapshot(path, tables=["b_archive"])
+
+    snapshot = ResponseSnapshot(path)
+    assert bytes(snapshot.read("/api/a", {})[1][None]) == main.serialize([1])
+    assert bytes(snapshot.read("/api/b", {})[1][None]) == main.serialize([20])
+    snapshot.close()
@@ -0,0 +1,130 @@
+import pytest
+
+from fastapi.testclient import TestClient
+
+from backend import main
+from backend.spatial import ClusterPyramid, CrimeIndex, GridBuckets, WarDeadIndex, cluster_cell_size, parse_bbox
+
+
+def test_parse_bbox():
+    assert parse_bbox("-1.5,50,0.25,51") == (-1.5, 50.0, 0.25, 51.0)
+
+
+@pytest.mark.parametrize("value", [
+    None, "", "1,2,3", "a,b,c,d", "1,2,0,3", "0,3,1,2",
+    "nan,0,1,1", "0,0,inf,1", "-1e400,0,1,1", "0,-91,1,1", "0,0,1,90.5", "-181,0,1,1", "0,0,180.1,1",
+])
+def test_parse_bbox_rejects(value):
+    with pytest.raises(ValueError):
+        parse_bbox(value)
+
+
+def test_parse_bbox_accepts_the_whole_world():
+    assert parse_bbox("-180,-90,180,90") == (-180.0, -90.0, 180.0, 90.0)
+
+
+def test_crime_endpoint_rejects_bad_bbox(monkeypatch):
+    monkeypatch.setattr(main, "has_db", lambda table_name: True)
+    client = TestClient(main.app)
+    for bbox in ("nan,0,1,1", "0,0,1,inf", "0,0,1,100"):
+        response = client.get("/api/crime", params={"bbox": bbox, "zoom": 15})
+        assert response.status_code == 400
+
+
+def test_cluster_cell_size_halves_per_zoom():
+    assert cluster_cell_size(0) == 90.0
+    assert cluster_cell_size(5) == cluster_cell_size(4) / 2
+
+
+def test_grid_buckets_query_matches_cells_overlapping_bbox():
+    grid = GridBuckets(1.0)
+    grid.add(0.5, 0.5, "a")
+    grid.add(0.5, 5.5, "b")
+    grid.add(-3.5, -3.5, "c")
+    assert sorted(grid.query((0, 0, 1, 1))) == ["a"]
+    assert sorted(grid.query((-10, -10, 10, 10))) == ["a", "b", "c"]
+    # A bbox much larger than the occupied area walks the occupied cells instead
+    assert sorted(grid.query((-1000, -1000, 1000, 1000))) == ["a", "b", "c"]
+
+
+def test_cluster_pyramid_aggregates_counts_weights_and_groups():
+    pyramid = ClusterPyramid(max_zoom=3, weight_field="weight", group_field="kind")
+    pyramid.add(51.0, -1.0, {"weight": 2, "kind": "x"})
+    pyramid.add(51.2, -1.2, {"weight": 3, "kind": "y"})
+    pyramid.build()
+
+    world = (-180, -90, 180, 90)
+    for zoom in range(3):
+        (cluster,) = pyramid.query(world, zoom)
+        assert cluster["count"] == 2
+        assert cluster["weight"] == 5
+        assert cluster["kinds"] == {"x": 1, "y": 1}
+        assert cluster["coordinates"] == [51.1, -1.1]
+
+    (only_y,) = pyramid.query(world, 0, "y")
+    assert only_y["count"] == 1
+    assert pyramid.query(world, 0, "z") == []
+
+
+def crime_rows(n):
+    return [
+        {"id": i, "crime_type": "burglary" if i % 2 else "theft", "location": f"street {i}",
+         "coordinates": [51.0 + i * 0.001, -1.0], "original_color": "red"}
+        for i in range(1, n + 1)
+    ] + [{"id": n + 1, "crime_type": "theft", "coordinates": None}]
+
+
+def test_crime_index_pages_points_by_id():
+    index = CrimeIndex(crime_rows(10))
+    assert len(index) == 10
+    assert index.crime_types == {"burglary": 5, "theft": 5}
+
+    bbox = (-2, 50, 0, 52)
+    first = index.query(bbox, zoom=16, limit=4)
+    assert first["mode"] == "points"
+    assert [p["id"] for p in first["items"]] == [1, 2, 3, 4]
+    second = index.query(bbox, zoom=16, cursor=first["next_cursor"], limit=4)
+    assert [p["id"] for p in second["items"]] == [5, 6, 7, 8]
+    last = index.query(bbox, zoom=16, cursor=second["next_cursor"], limit=4)
+    assert [p["id"] for p in last["items"]] == [9, 10]
+    assert last["next_cursor"] is None
+
+    thefts = index.query(bbox, zoom=16, crime_type="theft")
+    assert [p["id"] for p in thefts["items"]] == [2, 4, 6, 8, 10]
+
+
+def test_crime_index_clusters_below_max_zoom():
+    index = CrimeIndex(crime_rows(10))
+    result = index.query((-180, -90, 180, 90), zoom=2)
+    assert result["mode"] == "clusters"
+    assert sum(c["count"] for c in result["items"]) == 10
+    burglaries = index.query((-180, -90, 180, 90), zoom=2, crime_type="burglary")
+    assert sum(c["count"] for c in burglaries["items"]) == 5
+
+
+def test_war_dead_index_keeps_bios_aside():
+    rows = [
+        {"id": 1, "cemetery_name": "A", "coordinates": [50.0, 1.0], "bio_html": "<h3>A</h3>", "num_commemorated": 10},
+        {"id": 2, "cemetery_name": "B", "coordinates": [50.5, 1.5], "bio_html": None, "num_commemorated": None},
+    ]
+    index = WarDeadIndex(rows)
+    assert len(index) == 2
+
+    points = index.query((0, 49, 2, 51), zoom=12)
+    assert points["mode"] == "points"
+    assert [p["id"] for p in points["items"]] == [1, 2]
+    assert all("bio_html" not in p for p in points["items"])
+    assert points["items"][1]["num_commemorated"] == 0
+
+    (cluster,) = index.query((-180, -90, 180, 90), zoom=0)["items"]
+    assert cluster["num_commemorated"] == 10
+
+    assert index.bio(1) == "<h3>A</h3>"
+    assert index.bio(2) == ""
+    assert index.bio(3) is None
+
+
+def test_war_dead_endpoint_rejects_bad_bbox(monkeypatch):
+    monkeypatch.setattr(main, "has_db", lambda table_name: True)
+    response = TestClient(main.app).get("/api/war-dead", params={"bbox": "-inf,0,1,1", "zoom": 5})
+    assert response.status_code == 400
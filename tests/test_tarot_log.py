@@ -0,0 +1,106 @@
+import json
+import threading
+
+import pytest
+
+from backend.tarot_log import BackgroundSink, JsonLinesSink, LogSink, SupabaseSink, export_json, read_history
+
+
+def test_concurrent_writes_are_all_kept(tmp_path):
+    path = str(tmp_path / "log.jsonl")
+    sink = JsonLinesSink(path, batch_size=7, flush_interval=0.01)
+
+    def write(thread):
+        for i in range(200):
+            sink.write({"thread": thread, "i": i, "question": "é" * (i % 5)})
+
+    threads = [threading.Thread(target=write, args=(t,)) for t in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    sink.close()
+
+    history = read_history(path, str(tmp_path / "missing.json"))
+    assert len(history) == 1600
+    for t in range(8):
+        assert [e["i"] for e in history if e["thread"] == t] == list(range(200))
+
+
+def test_rotation_keeps_history_in_order(tmp_path):
+    path = str(tmp_path / "log.jsonl")
+    sink = JsonLinesSink(path, max_bytes=200, max_files=3, batch_size=1, flush_interval=0)
+    for i in range(100):
+        sink.write({"i": i})
+    sink.close()
+
+    rotated = sorted(p.name for p in tmp_path.iterdir() if p.name != "log.jsonl")
+    assert rotated == ["log.jsonl.1", "log.jsonl.2", "log.jsonl.3"]
+    numbers = [e["i"] for e in read_history(path, str(tmp_path / "missing.json"))]
+    # The oldest files were dropped; what is left is the newest entries, in order
+    assert numbers[0] > 0
+    assert numbers == list(range(numbers[0], 100))
+
+
+def test_read_history_with_legacy_file_and_torn_line(tmp_path):
+    legacy = tmp_path / "history.json"
+    legacy.write_text(json.dumps([{"i": 0}]))
+    path = tmp_path / "log.jsonl"
+    path.write_text('{"i": 1}\n\n{"i": 2}\n{"i": 3')
+    assert read_history(str(path), str(legacy)) == [{"i": 0}, {"i": 1}, {"i": 2}]
+
+    output = tmp_path / "export.json"
+    export_json(str(output), str(path), str(legacy))
+    assert json.loads(output.read_text()) == [{"i": 0}, {"i": 1}, {"i": 2}]
+
+
+class FailingTable:
+    def __init__(self, inserted, fail):
+        self.inserted = inserted
+        self.fail = fail
+
+    def insert(self, rows):
+        self.rows = rows
+        return self
+
+    def execute(self):
+        if self.fail:
+            raise RuntimeError("network down")
+        self.inserted.extend(self.rows)
+
+
+class FakeClient:
+    def __init__(self, fail=False):
+        self.inserted = []
+        self.fail = fail
+
+    def table(self, table_name):
+        assert table_name == "tarot_logs"
+        return FailingTable(self.inserted, self.fail)
+
+
+def test_supabase_sink_batches_inserts(tmp_path):
+    client = FakeClient()
+    fallback = JsonLinesSink(str(tmp_path / "log.jsonl"))
+    sink = SupabaseSink(client, "tarot_logs", fallback=fallback, batch_size=10, flush_interval=1)
+    for i in range(25):
+        sink.write({"i": i})
+    sink.close()
+    assert [e["i"] for e in client.inserted] == list(range(25))
+    assert not (tmp_path / "log.jsonl").exists()
+
+
+def test_supabase_sink_falls_back_to_local_log(tmp_path):
+    path = str(tmp_path / "log.jsonl")
+    sink = SupabaseSink(FakeClient(fail=True), "tarot_logs", fallback=JsonLinesSink(path), batch_size=5, flush_interval=0)
+    for i in range(12):
+        sink.write({"i": i})
+    sink.close()
+    assert [e["i"] for e in read_history(path, str(tmp_path / "missing.json"))] == list(range(12))
+
+
+def test_sink_base_classes_are_abstract():
+    with pytest.raises(TypeError):
+        LogSink()
+    with pytest.raises(TypeError):
+        BackgroundSink()
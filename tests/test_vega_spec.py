@@ -0,0 +1,64 @@
+import json
+
+from vega_spec import extract_specs, first_dataset, is_vega_lite, iter_panels, read_specs, resolve_data
+
+SPEC = {
+    "$schema": "https://vega.github.io/schema/vega-lite/v5.json",
+    "datasets": {"data-1": [{"year": 2000, "value": 1}], "data-2": [{"year": 2001, "value": 2}]},
+    "data": {"name": "data-1"},
+    "vconcat": [
+        {"mark": "line", "title": "top"},
+        {"hconcat": [
+            {"mark": "bar", "title": "left", "data": {"name": "data-2"}},
+            {"layer": [{"mark": "rule"}, {"mark": "text"}], "title": "right"},
+        ]},
+    ],
+}
+
+
+def page(*assignments):
+    return "<script>\n" + "\n".join(assignments) + "\n</script>"
+
+
+def test_extract_specs_in_order():
+    other = {"mark": "point", "description": "braces } and ; inside strings"}
+    html = page(
+        f"var spec = {json.dumps(SPEC)};",
+        'var embedOpt = {"mode": "vega-lite"};',
+        "var jsLiteral = {mode: 'vega-lite'};",
+        f"const spec1 = {json.dumps(other)};",
+    )
+    assert extract_specs(html) == [SPEC, other]
+
+
+def test_read_specs(tmp_path):
+    path = tmp_path / "chart.html"
+    path.write_text(page(f"let chart = {json.dumps(SPEC)}"), encoding="utf-8")
+    assert read_specs(str(path)) == [SPEC]
+
+
+def test_is_vega_lite():
+    assert is_vega_lite({"$schema": "https://vega.github.io/schema/vega-lite/v4.json"})
+    assert is_vega_lite({"layer": []})
+    assert not is_vega_lite({"actions": False})
+    assert not is_vega_lite([{"mark": "bar"}])
+
+
+def test_iter_panels_flattens_concatenations_with_nearest_data():
+    panels = [(view.get("title"), data) for view, data in iter_panels(SPEC)]
+    assert panels == [
+        ("top", {"name": "data-1"}),
+        ("left", {"name": "data-2"}),
+        ("right", {"name": "data-1"}),
+    ]
+
+
+def test_resolve_data_and_first_dataset():
+    refs = {"data-1": {"values": [1]}}
+    assert resolve_data({"name": "data-1"}, refs) == {"values": [1]}
+    assert resolve_data({"name": "other"}, refs) == {"name": "other"}
+    assert resolve_data(None, refs) is None
+
+    assert first_dataset(SPEC) == [{"year": 2000, "value": 1}]
+    assert first_dataset({"data": {"values": [3]}}) == [3]
+    assert first_dataset({"mark": "bar"}) == []
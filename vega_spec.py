@@ -0,0 +1,90 @@
+import json
+import re
+
+# Shared reader for the Vega-Lite specs that Altair (and vega-embed pages in
+# general) write into HTML exports. Used by altair_extractor.py and
+# multi_chart_extractor.py.
+
+# `var spec = {`, `const spec1 = {`, ... - the JSON itself is read by the
+# decoder, so braces or semicolons inside strings can't end it early
+SPEC_MARKER = re.compile(r"\b(?:var|let|const)\s+\w+\s*=\s*(?=\{)")
+
+# Keys that make a top-level object a view rather than e.g. embed options
+VIEW_KEYS = ("mark", "layer", "vconcat", "hconcat", "concat", "facet", "repeat")
+
+# Composition operators whose children are separate panels; a layered,
+# faceted or repeated chart is drawn as one panel
+CONCAT_KEYS = ("vconcat", "hconcat", "concat")
+
+_decoder = json.JSONDecoder()
+
+
+def is_vega_lite(obj):
+    if not isinstance(obj, dict):
+        return False
+    return "vega-lite" in str(obj.get("$schema", "")) or any(key in obj for key in VIEW_KEYS)
+
+
+def extract_specs(content):
+    """Every Vega-Lite spec assigned to a JS variable in content, in order.
+
+    Each marker is decoded in place with raw_decode, and the search resumes
+    after the object it read, so the document is scanned once.
+    """
+    specs = []
+    pos = 0
+    while True:
+        match = SPEC_MARKER.search(content, pos)
+        if match is None:
+            return specs
+        try:
+            obj, end = _decoder.raw_decode(content, match.end())
+        except json.JSONDecodeError:
+            # A JS object literal, not JSON; skip past the marker
+            pos = match.end()
+            continue
+        if is_vega_lite(obj):
+            specs.append(obj)
+        pos = end
+
+
+def read_specs(file_path):
+    with open(file_path, "r", encoding="utf-8") as f:
+        return extract_specs(f.read())
+
+
+def iter_panels(spec, data=None):
+    """Yields (view, data) for each panel in spec, depth first.
+
+    Concatenations of any depth are flattened into their leaf views; data
+    is the nearest "data" declared on the view or one of its parents.
+    """
+    data = spec.get("data", data)
+    children = None
+    for key in CONCAT_KEYS:
+        if key in spec:
+            children = spec[key]
+            break
+    if children is None:
+        yield spec, data
+        return
+    for child in children:
+        yield from iter_panels(child, data)
+
+
+def resolve_data(data, refs):
+    """Replaces a reference to a named top-level dataset with refs[name].
+
+    refs maps dataset names to the data to use instead, e.g. {"values": [...]}
+    to inline the rows or {"url": ...} to point at an external file.
+    """
+    if isinstance(data, dict) and data.get("name") in refs:
+        return refs[data["name"]]
+    return data
+
+
+def first_dataset(spec):
+    """The rows of the spec's data: its first named dataset, or inline values."""
+    for values in spec.get("datasets", {}).values():
+        return values
+    return spec.get("data", {}).get("values", [])